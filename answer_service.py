@@ -0,0 +1,239 @@
+"""
+答题记录服务
+批量判分并在一个事务内保存用户答案，写入后读取用户在涉及关卡中的全部答题记录，判断关卡是否完成、更新关卡成绩汇总
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+from level_summary import save_summaries, summarize_level
+from models import db, Question, User, UserAnswer, upsert
+from question_cache import question_bundle_cache
+from question_handlers import QuestionHandlerFactory
+
+
+class AnswerSubmissionError(ValueError):
+    """提交的答案数据无效"""
+
+
+def grade_answer(question, answer):
+    """使用题型处理器判断答案，返回 (是否正确, 得分)"""
+    handler = QuestionHandlerFactory.get_handler(question['question_type'])
+    form_data = handler.answer_to_form_data(answer)
+    try:
+        is_correct = bool(handler.validate_answer(SimpleNamespace(**question), form_data))
+    except (TypeError, ValueError, AttributeError):
+        # 答案格式与题型不符，按答错处理
+        is_correct = False
+    return is_correct, (question['score'] or 0) if is_correct else 0
+
+
+def _to_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def lock_user_answers(user_id):
+    """
+    让同一用户的答案提交依次执行，避免并发提交按各自的快照覆盖成绩汇总
+
+    PostgreSQL 锁定用户行直到事务结束；SQLite 同一时间只有一个写事务，
+    upsert 取得写锁后读到的答题记录已包含其他已提交的答案，无需额外加锁
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(db.select(User.id).where(User.id == user_id).with_for_update())
+
+
+def _answer_ages(submissions, sent_at):
+    """
+    离线答案的作答时间距离现在的时长 {题目ID: timedelta}
+
+    queued_at 和 sent_at 都是客户端时钟的毫秒时间戳，只用两者之差，不受客户端时钟偏差影响
+    """
+    if sent_at is None:
+        return {}
+    if not isinstance(sent_at, (int, float)) or isinstance(sent_at, bool):
+        raise AnswerSubmissionError('提交时间格式错误')
+    ages = {}
+    for question_id, item in submissions.items():
+        queued_at = item.get('queued_at')
+        if queued_at is None:
+            continue
+        if not isinstance(queued_at, (int, float)) or isinstance(queued_at, bool):
+            raise AnswerSubmissionError('作答时间格式错误')
+        ages[question_id] = timedelta(milliseconds=max(sent_at - queued_at, 0))
+    return ages
+
+
+def _drop_stale(user_id, latest, ages):
+    """
+    去掉比已保存答案更早作答的离线答案，返回 ({题目ID: 作答时间}, [被跳过的题目ID])
+
+    作答时间按数据库时钟换算，与 attempt_time 的默认值 now() 一致
+    """
+    now = db.session.scalar(db.select(db.func.now()))
+    answered_at = {qid: now - age for qid, age in ages.items()}
+    saved = db.session.query(UserAnswer.question_id, UserAnswer.attempt_time).filter(
+        UserAnswer.user_id == user_id,
+        UserAnswer.question_id.in_(list(answered_at))
+    )
+    stale = [
+        row.question_id for row in saved
+        if row.attempt_time is not None and row.attempt_time >= answered_at[row.question_id]
+    ]
+    for qid in stale:
+        del latest[qid]
+        del answered_at[qid]
+    return answered_at, stale
+
+
+def submit_answers(user_id, submissions, level_id=None, skip_unknown=False, sent_at=None):
+    """
+    批量判分并保存答案
+
+    参数:
+    - user_id: 用户ID
+    - submissions: [{'question_id': 1, 'answer': ['A'], 'time_spent': 12}, ...]
+    - level_id: 若指定，则所有题目必须属于该关卡
+    - skip_unknown: 为True时跳过不存在的题目，其余答案照常保存；否则整批拒绝
+    - sent_at: 重放离线答案时客户端发出请求的毫秒时间戳。此时答案可附带 queued_at（离线保存的时间），
+      比已保存答案更早作答的答案不再写入，以免旧答案覆盖之后在线提交的答案
+
+    返回:
+    - {'results': [...], 'completed_levels': [level_id, ...], 'skipped': [question_id, ...],
+       'stale': [question_id, ...]}
+
+    整批答案通过一条 INSERT ... ON CONFLICT 语句在一个事务内写入，
+    成绩汇总在同一事务中根据写入后的答题记录重新计算；
+    每个涉及的关卡最多调用一次 update_level_progress
+    """
+    if not submissions:
+        raise AnswerSubmissionError('缺少答案数据')
+
+    # 同一题重复提交时以最后一次为准
+    latest = {}
+    for item in submissions:
+        if not isinstance(item, dict) or 'question_id' not in item:
+            raise AnswerSubmissionError('答案数据格式错误')
+        question_id = item['question_id']
+        # 题目ID来自 JSON 请求体，可能是列表等不可哈希的值
+        if not isinstance(question_id, int) or isinstance(question_id, bool):
+            raise AnswerSubmissionError('题目ID必须是整数')
+        # 没有作答的题目不判分、不保存，否则会被记为答错并计入关卡完成
+        if item.get('answer') is None:
+            raise AnswerSubmissionError('缺少答案')
+        latest[question_id] = item
+
+    # 找出每道题所属的关卡
+    if level_id is not None:
+        level_ids = {level_id}
+    else:
+        level_ids = {
+            row.level_id for row in db.session.query(Question.level_id).filter(
+                Question.id.in_(list(latest))
+            ).distinct()
+        }
+
+    bundles = {}
+    level_questions = {}
+    questions = {}
+    for lid in level_ids:
+        bundle = question_bundle_cache.get(lid)
+        if bundle is None:
+            continue
+        bundles[lid] = bundle
+        level_questions[lid] = {q['id'] for q in bundle['questions']}
+        for q in bundle['questions']:
+            questions[q['id']] = dict(q, level_id=lid)
+
+    unknown = [qid for qid in latest if qid not in questions]
+    if unknown and not skip_unknown:
+        raise AnswerSubmissionError('题目不存在或不属于该关卡')
+    for qid in unknown:
+        del latest[qid]
+    ages = _answer_ages(latest, sent_at)
+    if not latest:
+        return {'results': [], 'completed_levels': [], 'skipped': unknown, 'stale': []}
+
+    results = []
+    try:
+        lock_user_answers(user_id)
+        # 取得锁之后再比较作答时间，期间不会有同一用户的其他提交写入
+        answered_at, stale = _drop_stale(user_id, latest, ages) if ages else ({}, [])
+        if not latest:
+            db.session.commit()
+            return {'results': [], 'completed_levels': [], 'skipped': unknown, 'stale': stale}
+
+        rows, replayed_rows = [], []
+        for question_id, item in latest.items():
+            question = questions[question_id]
+            answer = item.get('answer')
+            is_correct, score = grade_answer(question, answer)
+
+            row = {
+                'user_id': user_id,
+                'question_id': question_id,
+                'answer_content': answer,
+                'is_correct': is_correct,
+                'score': score,
+                'time_spent': _to_int(item.get('time_spent')),
+            }
+            if question_id in answered_at:
+                replayed_rows.append(dict(row, attempt_time=answered_at[question_id]))
+            else:
+                rows.append(row)
+            results.append({
+                'question_id': question_id,
+                'level_id': question['level_id'],
+                'answer': answer,
+                'is_correct': is_correct,
+                'score': score,
+            })
+
+        # 重复作答时覆盖上一次的答案，保留首次作答的用时
+        upsert(UserAnswer, rows, ['user_id', 'question_id'],
+               update_columns=['answer_content', 'is_correct', 'score'],
+               extra_updates={'attempt_time': db.func.now()})
+        # 离线答案的 attempt_time 记为实际作答时间，之后重放的更早答案同样不会覆盖它
+        upsert(UserAnswer, replayed_rows, ['user_id', 'question_id'],
+               update_columns=['answer_content', 'is_correct', 'score', 'attempt_time'])
+
+        # 写入后在同一事务内一次查询取出用户在这些关卡中的全部答题记录，
+        # 其中包含并发提交已写入的答案，据此判断关卡是否完成并重新计算成绩汇总
+        answered = {
+            row.question_id: (row.is_correct, row.score)
+            for row in db.session.query(
+                UserAnswer.question_id, UserAnswer.is_correct, UserAnswer.score
+            ).filter(
+                UserAnswer.user_id == user_id,
+                UserAnswer.question_id.in_(list(questions))
+            )
+        }
+        completed_levels = [
+            lid for lid, ids in level_questions.items()
+            if ids and ids <= answered.keys()
+        ]
+
+        level_rows, kp_rows = [], []
+        for lid in {questions[qid]['level_id'] for qid in latest}:
+            level_row, level_kp_rows = summarize_level(user_id, bundles[lid], answered)
+            level_rows.append(level_row)
+            kp_rows.extend(level_kp_rows)
+        save_summaries(level_rows, kp_rows)
+        if completed_levels:
+            from update_progress import update_level_progress
+            for lid in completed_levels:
+                update_level_progress(user_id, lid, 'completed', commit=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'results': results,
+        'completed_levels': completed_levels,
+        'skipped': unknown,
+        'stale': stale,
+    }
@@ -1,25 +1,68 @@
 from flask import Flask
 from flask_login import LoginManager
-from models import db, User
-import os
+from models import db
+from config import Config
+from database import init_database
+from sessions import init_sessions
+from templating import init_templates, warm_templates
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quiz.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config.from_object(Config)
+
+init_templates(app)
+init_sessions(app)
+init_database(app)
+
+from instrumentation import request_metrics
+request_metrics.init_app(app)
 
-db.init_app(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+from user_cache import user_identity_cache
+user_identity_cache.init_app(app)
+
+from passwords import password_hasher
+password_hasher.init_app(app)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # 返回缓存的不可变身份记录，大多数请求不再查询 user 表
+    return user_identity_cache.get(int(user_id))
+
+# 课程内容包在其他缓存之前加载，配合 gunicorn 的 preload_app 由各 worker 共享
+from content_pack import content_packs
+content_packs.init_app(app)
+
+from question_cache import question_bundle_cache
+question_bundle_cache.init_app(app)
+
+from course_tree import course_graph_cache
+course_graph_cache.init_app(app)
+
+from assets import static_assets
+static_assets.init_app(app)
+
+from conditional import conditional_pages
+conditional_pages.init_app(app)
 
 from routes import init_routes
 init_routes(app)
 
+from question_routes import register_question_routes
+register_question_routes(app)
+
+from quiz_api import register_quiz_api
+register_quiz_api(app)
+
+from offline import register_offline_routes
+register_offline_routes(app)
+
+# 预编译全部模板；配合 gunicorn 的 preload_app，编译结果在 fork 前完成并由各 worker 共享
+if app.config['TEMPLATE_WARMUP']:
+    warm_templates(app)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
@@ -0,0 +1,24 @@
+"""
+ASGI 入口
+用 a2wsgi 把 Flask 应用包装为 ASGI 应用，由 uvicorn 管理连接：
+空闲的 keep-alive 连接和尚未发完请求头的客户端只占用一个协程。
+收到请求头后请求立即交给线程池，Flask 读取 request.form / get_json() 时
+由工作线程逐块等待事件循环接收请求体，上传慢的客户端在整个上传期间占用一个线程
+
+用法:
+    SERVER_MODE=asgi gunicorn --config gunicorn.conf.py
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+"""
+
+import os
+
+from a2wsgi import WSGIMiddleware
+
+# 直接用 uvicorn 启动时也按 ASGI 模式取默认配置（如密码哈希进程池）
+os.environ.setdefault('SERVER_MODE', 'asgi')
+
+from app import app as flask_app
+
+# 线程池大小即每个 worker 同时处理的请求数（包括仍在接收请求体的请求），超出的请求排队等待；
+# 调大时同时调大数据库连接池（DB_POOL_SIZE + DB_MAX_OVERFLOW）
+app = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_THREADS'])
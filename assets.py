@@ -0,0 +1,237 @@
+"""
+静态资源清单
+启动时扫描 static/ 目录，按文件内容哈希生成带指纹的文件名（如 css/style.3f2a1b9c0d4e.css），
+url_for('static', ...) 自动改写为带指纹的地址，无需额外的构建步骤
+
+- 带指纹的资源返回 immutable 的长期缓存头，内容变化后地址随之变化
+- 文本类资源启动时预先压缩为 gzip（安装了 brotli 时同时生成 br），按 Accept-Encoding 返回
+- 开启 ASSET_BUNDLE_JS 后，预先注册的脚本组合（如 core.js + 题型脚本）合并为一个文件下发
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+# 带指纹的静态资源缓存一年
+FINGERPRINT_MAX_AGE = 365 * 24 * 3600
+
+# 需要预压缩的资源类型，图片等已压缩格式不再压缩
+COMPRESSIBLE_TYPES = {'application/javascript', 'text/javascript', 'application/json',
+                      'application/manifest+json', 'image/svg+xml'}
+# 小于该字节数的文件压缩收益很小，直接原样返回
+MIN_COMPRESS_SIZE = 512
+# 超过该字节数的文件不放入内存，带指纹的请求直接从磁盘发送
+MAX_MEMORY_SIZE = 1024 * 1024
+
+BUNDLE_DIR = 'bundles'
+
+# 客户端同时接受多种编码时优先使用压缩率更高的
+ENCODING_PREFERENCE = ('br', 'gzip', 'identity')
+
+
+def _is_compressible(mimetype):
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def _fingerprinted_name(filename, digest):
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+class Asset:
+    """清单中的一个资源：原始文件名、带指纹的文件名和各编码的内容"""
+
+    __slots__ = ('filename', 'hashed', 'digest', 'mimetype', 'mtime', 'variants')
+
+    def __init__(self, filename, data, mtime=None):
+        self.filename = filename
+        self.digest = hashlib.md5(data).hexdigest()[:12]
+        self.hashed = _fingerprinted_name(filename, self.digest)
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.mtime = mtime
+        self.variants = None
+        if len(data) <= MAX_MEMORY_SIZE:
+            self.variants = {'identity': data}
+            if _is_compressible(self.mimetype) and len(data) >= MIN_COMPRESS_SIZE:
+                self._compress(data)
+
+    def _compress(self, data):
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            self.variants['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(data)
+            if len(compressed) < len(data):
+                self.variants['br'] = compressed
+
+
+class AssetManifest:
+    """
+    进程内的静态资源清单
+
+    清单在 init_app 时一次性生成；ASSET_AUTO_RELOAD 或调试模式下，
+    生成地址时会检查文件修改时间并重新计算变化文件的指纹
+    """
+
+    def __init__(self):
+        self.static_folder = None
+        self.enabled = False
+        self.bundle_js = False
+        self.auto_reload = False
+        self.max_age = FINGERPRINT_MAX_AGE
+        self._assets = {}   # 原始文件名 -> Asset
+        self._hashed = {}   # 带指纹的文件名 -> Asset
+        self._bundles = {}  # 成员文件元组 -> 合并文件名
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('ASSET_MANIFEST', True)
+        self.bundle_js = app.config.get('ASSET_BUNDLE_JS', False)
+        self.auto_reload = app.config.get('ASSET_AUTO_RELOAD', False)
+        self.max_age = app.config.get('ASSET_MAX_AGE', FINGERPRINT_MAX_AGE)
+        self.static_folder = app.static_folder
+
+        app.jinja_env.globals['script_urls'] = self.script_urls
+        if not self.enabled:
+            return
+
+        self.build()
+        app.url_defaults(self._rewrite_url)
+        app.view_functions['static'] = self.serve
+
+    def build(self):
+        """扫描 static/ 目录生成清单，返回资源数量"""
+        for dirpath, _dirnames, filenames in os.walk(self.static_folder):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                self._load(os.path.relpath(path, self.static_folder).replace(os.sep, '/'))
+        return len(self._assets)
+
+    def _load(self, filename):
+        path = os.path.join(self.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        return self._add(Asset(filename, data, mtime))
+
+    def _add(self, asset):
+        with self._lock:
+            self._assets[asset.filename] = asset
+            # 旧的指纹保留在清单中，已打开的页面仍能加载到内容
+            self._hashed[asset.hashed] = asset
+        return asset
+
+    def filenames(self):
+        """返回清单中的全部原始文件名（含已注册的合并文件）"""
+        return sorted(self._assets)
+
+    def fingerprint(self):
+        """全部资源指纹的摘要，任一静态文件变化时随之变化"""
+        hashed = '|'.join(asset.hashed for _name, asset in sorted(self._assets.items()))
+        return hashlib.md5(hashed.encode()).hexdigest()
+
+    def get(self, filename):
+        """返回资源的清单条目，文件不存在时返回None"""
+        asset = self._assets.get(filename)
+        if asset is not None and asset.mtime is not None and (self.auto_reload or current_app.debug):
+            try:
+                changed = os.path.getmtime(os.path.join(self.static_folder, filename)) != asset.mtime
+            except OSError:
+                changed = False
+            if changed:
+                asset = self._load(filename)
+                self._refresh_bundles(filename)
+        return asset
+
+    def register_bundle(self, filenames):
+        """
+        注册一组按顺序合并的脚本，返回合并文件名
+
+        合并文件名由成员列表决定，各 worker 注册相同的组合时得到相同的地址
+        """
+        members = tuple(filenames)
+        name = f"{BUNDLE_DIR}/{hashlib.md5('|'.join(members).encode()).hexdigest()[:10]}.js"
+        self._bundles[members] = name
+        if self.enabled:
+            self._build_bundle(members, name)
+        return name
+
+    def _build_bundle(self, members, name):
+        parts = []
+        for filename in members:
+            asset = self._assets.get(filename)
+            if asset is None or asset.variants is None:
+                return
+            # 每个文件单独成段，避免上一个文件缺少结尾分号或换行时影响下一个文件
+            parts.append(f'/* {filename} */\n'.encode() + asset.variants['identity'] + b'\n;\n')
+        self._add(Asset(name, b''.join(parts)))
+
+    def _refresh_bundles(self, filename):
+        for members, name in self._bundles.items():
+            if filename in members:
+                self._build_bundle(members, name)
+
+    def script_urls(self, filenames):
+        """
+        返回页面需要引入的脚本地址
+
+        开启 ASSET_BUNDLE_JS 且该组合已注册时返回合并文件的地址，否则逐个返回
+        """
+        members = tuple(filenames)
+        if self.enabled and self.bundle_js and self._bundles.get(members) in self._assets:
+            for filename in members:
+                self.get(filename)  # 调试模式下成员文件变化时重新合并
+            return [url_for('static', filename=self._bundles[members])]
+        return [url_for('static', filename=filename) for filename in members]
+
+    def _rewrite_url(self, endpoint, values):
+        if endpoint != 'static' or 'filename' not in values:
+            return
+        asset = self.get(values['filename'])
+        if asset is not None:
+            values['filename'] = asset.hashed
+
+    def serve(self, filename):
+        """
+        静态文件视图
+
+        带指纹的地址按 Accept-Encoding 返回预压缩内容和 immutable 缓存头，
+        其他地址交给 Flask 默认的静态文件处理
+        """
+        asset = self._hashed.get(filename)
+        if asset is None:
+            return current_app.send_static_file(filename)
+
+        if asset.variants is None:
+            response = send_from_directory(self.static_folder, asset.filename, max_age=self.max_age)
+        else:
+            offered = [e for e in ENCODING_PREFERENCE if e in asset.variants]
+            encoding = request.accept_encodings.best_match(offered) or 'identity'
+            response = current_app.response_class(asset.variants[encoding], mimetype=asset.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+            if len(asset.variants) > 1:
+                response.vary.add('Accept-Encoding')
+            response.set_etag(f'{asset.digest}-{encoding}')
+            response.make_conditional(request)
+
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        response.cache_control.immutable = True
+        return response
+
+
+static_assets = AssetManifest()
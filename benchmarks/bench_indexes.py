@@ -0,0 +1,137 @@
+"""
+热点查询索引基准测试
+在不带复合索引的数据库上生成数据，分别在建索引前后输出查询计划和查询耗时
+
+用法:
+    python benchmarks/bench_indexes.py --users 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+
+from models import db
+from seed_data import seed
+
+# 本次新增的索引和唯一约束（见 models.py 中各模型的 __table_args__）
+HOT_INDEXES = {
+    'ix_unit_course_order', 'ix_level_unit_order', 'ix_question_level_order',
+    'uq_user_progress_user_level', 'uq_user_answer_user_question',
+}
+
+QUERIES = {
+    'user_answer(user_id, question_id)':
+        'SELECT * FROM user_answer WHERE user_id = :user_id AND question_id = :question_id',
+    'user_progress(user_id, level_id)':
+        'SELECT * FROM user_progress WHERE user_id = :user_id AND level_id = :level_id',
+    'question(level_id, order)':
+        'SELECT * FROM question WHERE level_id = :level_id ORDER BY "order"',
+    'level(unit_id, order)':
+        'SELECT * FROM level WHERE unit_id = :unit_id AND "order" = :order',
+    'unit(course_id, order)':
+        'SELECT * FROM unit WHERE course_id = :course_id AND "order" = :order',
+}
+
+
+def create_schema_without_hot_indexes(engine):
+    """按模型建表，但去掉热点查询的复合索引和唯一约束"""
+    metadata = sa.MetaData()
+    for table in db.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        for index in list(copy.indexes):
+            if index.name in HOT_INDEXES:
+                copy.indexes.discard(index)
+        for constraint in list(copy.constraints):
+            if constraint.name in HOT_INDEXES:
+                copy.constraints.discard(constraint)
+    metadata.create_all(engine)
+
+
+def create_hot_indexes(engine):
+    """补建热点索引，唯一约束以唯一索引的形式创建"""
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in HOT_INDEXES:
+                    index.create(conn)
+            for constraint in table.constraints:
+                if isinstance(constraint, sa.UniqueConstraint) and constraint.name in HOT_INDEXES:
+                    sa.Index(constraint.name, *constraint.columns, unique=True).create(conn)
+
+
+def random_params(conn, rng):
+    """生成每类查询的随机参数"""
+    max_user = conn.execute(sa.text('SELECT MAX(id) FROM "user"')).scalar()
+    max_question = conn.execute(sa.text('SELECT MAX(id) FROM question')).scalar()
+    max_level = conn.execute(sa.text('SELECT MAX(id) FROM level')).scalar()
+    max_unit = conn.execute(sa.text('SELECT MAX(id) FROM unit')).scalar()
+    max_course = conn.execute(sa.text('SELECT MAX(id) FROM course')).scalar()
+    return {
+        'user_answer(user_id, question_id)':
+            lambda: {'user_id': rng.randint(1, max_user), 'question_id': rng.randint(1, max_question)},
+        'user_progress(user_id, level_id)':
+            lambda: {'user_id': rng.randint(1, max_user), 'level_id': rng.randint(1, max_level)},
+        'question(level_id, order)':
+            lambda: {'level_id': rng.randint(1, max_level)},
+        'level(unit_id, order)':
+            lambda: {'unit_id': rng.randint(1, max_unit), 'order': rng.randint(1, 5)},
+        'unit(course_id, order)':
+            lambda: {'course_id': rng.randint(1, max_course), 'order': rng.randint(1, 8)},
+    }
+
+
+def run(engine, label, iterations, seed_value=7):
+    rng = random.Random(seed_value)
+    print(f"\n===== {label} =====")
+    with engine.connect() as conn:
+        params = random_params(conn, rng)
+        for name, sql in QUERIES.items():
+            plan = conn.execute(sa.text('EXPLAIN QUERY PLAN ' + sql), params[name]()).fetchall()
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                conn.execute(sa.text(sql), params[name]()).fetchall()
+                timings.append((time.perf_counter() - started) * 1e6)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name}")
+            print(f"  计划: {' / '.join(row[-1] for row in plan)}")
+            print(f"  平均 {statistics.mean(timings):.0f}µs  p95 {p95:.0f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点查询索引前后对比')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--db', help='SQLite数据库文件路径，默认使用临时文件')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    if os.path.exists(path):
+        os.remove(path)
+    engine = sa.create_engine(f'sqlite:///{path}')
+
+    create_schema_without_hot_indexes(engine)
+    started = time.perf_counter()
+    counts = seed(engine, users=args.users)
+    print(f"数据生成完成（{time.perf_counter() - started:.1f}s）: {counts}")
+
+    run(engine, '无复合索引', args.iterations)
+
+    started = time.perf_counter()
+    create_hot_indexes(engine)
+    print(f"\n建索引用时 {time.perf_counter() - started:.1f}s")
+
+    run(engine, '有复合索引', args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+question_to_dict 微基准测试
+对比旧方式（每次访问属性都 json.loads 文本列）和 JSON 列（加载时解码一次）的序列化耗时
+
+用法:
+    python benchmarks/bench_question_to_dict.py --questions 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from models import db, MultipleChoiceQuestion
+from question_cache import question_to_dict
+from seed_data import seed
+
+
+class LegacyMultipleChoice:
+    """模拟改造前的模型：选项和答案以文本保存，属性访问时才解码"""
+
+    def __init__(self, row):
+        (self.id, self.content, self.question_type, self.score, self.order,
+         self.explanation, self._options, self._correct_answer) = row
+
+    @property
+    def options(self):
+        return json.loads(self._options)
+
+    @property
+    def correct_answer(self):
+        return json.loads(self._correct_answer)
+
+
+def timed(label, func, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"{label}: {elapsed * 1000:.1f}ms/轮")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='question_to_dict 微基准测试')
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    engine = sa.create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    # 每门课 8 单元 × 5 关 × 10 题 = 400 题，其中一半是选择题
+    seed(engine, users=0, courses=max(1, args.questions * 2 // 400))
+
+    with Session(engine) as session:
+        rows = session.execute(sa.text(
+            'SELECT id, content, question_type, score, "order", explanation, options, correct_answer '
+            "FROM question WHERE question_type = 'multiple_choice'"
+        )).fetchall()[:args.questions]
+        legacy = [LegacyMultipleChoice(row) for row in rows]
+
+        started = time.perf_counter()
+        current = session.query(MultipleChoiceQuestion).limit(args.questions).all()
+        print(f"ORM加载 {len(current)} 道选择题（含JSON解码）: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        # 旧代码中每个题目页面都会对整关题目调用 question_to_dict，
+        # 模板中再次访问 options/correct_answer，这里按每题访问三次计
+        def serialize_legacy():
+            for q in legacy:
+                question_to_dict(q)
+                q.options
+                q.correct_answer
+
+        def serialize_current():
+            for q in current:
+                question_to_dict(q)
+                q.options
+                q.correct_answer
+
+        before = timed('文本列 + 属性内 json.loads', serialize_legacy, args.rounds)
+        after = timed('JSON列（加载时解码一次）', serialize_current, args.rounds)
+        print(f"加速比: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
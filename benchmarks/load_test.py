@@ -0,0 +1,345 @@
+"""
+答题流程压测脚本
+模拟一个班级的学生同时答题：登录 → 打开游戏地图 → 逐题打开 /quiz/<level_id>/<i> 并提交
+/question/<id>/answer → 打开关卡结果页，按路由输出 p50/p95/p99 延迟、吞吐量和 SQL 语句数
+
+用法:
+    # 进程内运行（Flask 测试客户端），自动生成数据，可统计每个请求的 SQL 语句数
+    python benchmarks/load_test.py --seed --students 200 --concurrency 20
+
+    # 压测已启动的服务（例如 gunicorn），数据库需事先用 seed_data.py --layout classroom 生成
+    python benchmarks/seed_data.py --layout classroom --db /tmp/quiz-load.db --users 200
+    DATABASE_URL=sqlite:////tmp/quiz-load.db gunicorn --config gunicorn.conf.py app:app
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --students 200 --concurrency 20
+
+进程内模式受 GIL 限制，吞吐量只适合做前后对比；绝对吞吐量请用 --url 压测 gunicorn
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import unicodedata
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+
+from seed_data import DEFAULT_PASSWORD
+
+ROUTES = [
+    'POST /login',
+    'GET /game/<course_id>',
+    'GET /quiz/<level_id>/<i>',
+    'POST /question/<id>/answer',
+    'GET /level/<level_id>/result',
+]
+
+
+class Recorder:
+    """线程安全地记录每个路由的耗时、SQL语句数和错误数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {route: [] for route in ROUTES}
+        self.statements = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+
+    def add(self, route, elapsed, status, statements=None):
+        with self._lock:
+            self.timings[route].append(elapsed)
+            if statements is not None:
+                self.statements[route].append(statements)
+            if status >= 400:
+                self.errors[route] += 1
+
+
+class StatementCounter:
+    """通过引擎事件统计当前线程执行的SQL语句数"""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        sa.event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+class InProcessClient:
+    """使用 Flask 测试客户端发送请求"""
+
+    def __init__(self, app, counter):
+        self._client = app.test_client()
+        self._counter = counter
+
+    def request(self, method, path, data=None):
+        self._counter.reset()
+        response = self._client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code, self._counter.count
+
+
+# 服务开启 METRICS_SERVER_TIMING 时从 Server-Timing 响应头中读取SQL语句数
+SERVER_TIMING_STATEMENTS = re.compile(r'db;desc="(\d+) statements"')
+
+
+def _statements_from_headers(headers):
+    match = SERVER_TIMING_STATEMENTS.search(headers.get('Server-Timing') or '')
+    return int(match.group(1)) if match else None
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """通过 HTTP 请求已启动的服务，每个学生使用独立的 Cookie"""
+
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip('/')
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data, doseq=True).encode() if data is not None else None
+        req = urllib.request.Request(self._base_url + path, data=body, method=method)
+        try:
+            with self._opener.open(req) as response:
+                response.read()
+                return response.status, _statements_from_headers(response.headers)
+        except urllib.error.HTTPError as e:
+            # 未跟随的重定向也会以 HTTPError 的形式返回
+            e.read()
+            return e.code, _statements_from_headers(e.headers)
+
+
+def load_plan(engine, students, levels_per_student):
+    """
+    从数据库读取每个学生的答题计划
+
+    返回:
+    - [{'username', 'course_id', 'levels': [{'id', 'questions': [...]}, ...]}, ...]
+    """
+    with engine.connect() as conn:
+        courses = {
+            (row.grade, row.subject + row.term): row.id
+            for row in conn.execute(sa.text('SELECT id, grade, subject, term FROM course'))
+        }
+        course_levels = {}
+        for row in conn.execute(sa.text(
+            'SELECT unit.course_id, level.id FROM level JOIN unit ON unit.id = level.unit_id '
+            'WHERE NOT level.is_midterm AND NOT level.is_final '
+            'ORDER BY unit.course_id, unit."order", level."order"'
+        )):
+            course_levels.setdefault(row.course_id, []).append(row.id)
+
+        wanted = {lid for levels in course_levels.values() for lid in levels[:levels_per_student]}
+        level_questions = {}
+        for row in conn.execute(sa.text(
+            'SELECT id, level_id, question_type, correct_answer FROM question ORDER BY level_id, "order"'
+        )):
+            if row.level_id in wanted:
+                correct = row.correct_answer
+                if isinstance(correct, str):
+                    correct = json.loads(correct)
+                level_questions.setdefault(row.level_id, []).append({
+                    'id': row.id, 'type': row.question_type, 'correct_answer': correct,
+                })
+
+        users = conn.execute(sa.text(
+            'SELECT username, last_grade, last_course FROM "user" ORDER BY id LIMIT :limit'
+        ), {'limit': students}).fetchall()
+
+    plan = []
+    for user in users:
+        course_id = courses.get((user.last_grade, user.last_course))
+        if course_id is None:
+            continue
+        plan.append({
+            'username': user.username,
+            'course_id': course_id,
+            'levels': [
+                {'id': lid, 'questions': level_questions.get(lid, [])}
+                for lid in course_levels.get(course_id, [])[:levels_per_student]
+            ],
+        })
+    return plan
+
+
+def answer_form(question, correct):
+    """按题型构造答题表单，correct 为 False 时故意答错"""
+    if question['type'] == 'multiple_choice':
+        right = [str(c) for c in question['correct_answer']]
+        wrong = [c for c in 'ABCD' if c not in right][:1]
+        return {'option': right if correct else wrong}
+    if question['type'] == 'true_false':
+        value = bool(question['correct_answer']) == correct
+        return {'answer': 'true' if value else 'false'}
+    return {'answer': ''}
+
+
+def run_student(client, recorder, student, password, correct_rate, rng):
+    """按顺序完成一个学生的答题流程"""
+    def call(route, method, path, data=None):
+        started = time.perf_counter()
+        status, statements = client.request(method, path, data)
+        recorder.add(route, (time.perf_counter() - started) * 1000, status, statements)
+        return status
+
+    if call('POST /login', 'POST', '/login',
+            {'username': student['username'], 'password': password}) >= 400:
+        return
+    call('GET /game/<course_id>', 'GET', f"/game/{student['course_id']}")
+    for level in student['levels']:
+        for i, question in enumerate(level['questions']):
+            call('GET /quiz/<level_id>/<i>', 'GET', f"/quiz/{level['id']}/{i}")
+            call('POST /question/<id>/answer', 'POST', f"/question/{question['id']}/answer",
+                 dict(answer_form(question, rng.random() < correct_rate), time_spent=rng.randint(3, 30)))
+        call('GET /level/<level_id>/result', 'GET', f"/level/{level['id']}/result")
+
+
+def percentile(values, p):
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(recorder, elapsed):
+    """汇总每个路由的统计结果"""
+    routes = {}
+    for route in ROUTES:
+        timings = recorder.timings[route]
+        statements = recorder.statements[route]
+        routes[route] = {
+            'requests': len(timings),
+            'errors': recorder.errors[route],
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'statements_avg': round(sum(statements) / len(statements), 1) if statements else None,
+            'statements_max': max(statements) if statements else None,
+        }
+    total = sum(r['requests'] for r in routes.values())
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'routes': routes,
+    }
+
+
+def _rjust(text, width):
+    """按显示宽度右对齐，中文字符占两列"""
+    display = sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+    return ' ' * max(0, width - display) + text
+
+
+def print_report(summary):
+    headers = ['请求数', '错误', 'p50(ms)', 'p95(ms)', 'p99(ms)', 'SQL均值', 'SQL最大']
+    widths = [8, 6, 10, 10, 10, 9, 9]
+    print('\n路由' + ' ' * 26 + ''.join(_rjust(h, w) for h, w in zip(headers, widths)))
+    for route, r in summary['routes'].items():
+        avg = '-' if r['statements_avg'] is None else f"{r['statements_avg']:.1f}"
+        peak = '-' if r['statements_max'] is None else str(r['statements_max'])
+        print(f"{route:<30}{r['requests']:>8}{r['errors']:>6}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{avg:>9}{peak:>9}")
+    print(f"\n共 {summary['requests']} 个请求，用时 {summary['elapsed_s']:.1f}s，"
+          f"吞吐量 {summary['throughput_rps']:.1f} 请求/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟班级答题流程的压测脚本')
+    parser.add_argument('--url', help='已启动服务的地址；不指定时在进程内使用 Flask 测试客户端')
+    parser.add_argument('--db', default='/tmp/quiz-load.db', help='SQLite数据库文件路径')
+    parser.add_argument('--database-url', help='数据库地址，指定后忽略 --db（例如 PostgreSQL）')
+    parser.add_argument('--seed', action='store_true', help='压测前重新生成数据（仅限 SQLite）')
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--courses', type=int, default=12, help='--seed 时生成的课程数')
+    parser.add_argument('--levels', type=int, default=2, help='每个学生完成的关卡数')
+    parser.add_argument('--concurrency', type=int, default=10, help='同时答题的学生数')
+    parser.add_argument('--correct-rate', type=float, default=0.8)
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--json', help='将统计结果写入JSON文件，便于与上次结果对比')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f'sqlite:///{os.path.abspath(args.db)}'
+    if args.seed:
+        if args.database_url:
+            parser.error('--seed 只支持 SQLite 数据库文件')
+        from models import db
+        from seed_data import seed_classroom
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        engine = sa.create_engine(database_url)
+        db.metadata.create_all(engine)
+        counts = seed_classroom(engine, students=args.students, courses=args.courses,
+                                password=args.password)
+        print(f"数据生成完成: {counts}")
+    else:
+        engine = sa.create_engine(database_url)
+
+    plan = load_plan(engine, args.students, args.levels)
+    if not plan:
+        parser.error('数据库中没有可用的学生账号，请先运行 seed_data.py --layout classroom 或使用 --seed')
+    engine.dispose()
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+        quiet = contextlib.nullcontext()
+    else:
+        # 应用在导入时读取 DATABASE_URL
+        os.environ['DATABASE_URL'] = database_url
+        from app import app
+        from models import db
+        with app.app_context():
+            counter = StatementCounter(db.engine)
+        make_client = lambda: InProcessClient(app, counter)
+        # 屏蔽路由中的调试输出
+        quiet = contextlib.redirect_stdout(io.StringIO())
+
+    recorder = Recorder()
+    requests_per_student = sum(len(level['questions']) * 2 + 1 for level in plan[0]['levels']) + 2
+    print(f"{len(plan)} 名学生，并发 {args.concurrency}，每人约 {requests_per_student} 个请求")
+
+    started = time.perf_counter()
+    with quiet, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(run_student, make_client(), recorder, student, args.password,
+                        args.correct_rate, random.Random(n))
+            for n, student in enumerate(plan)
+        ]
+        for future in futures:
+            future.result()
+    summary = summarize(recorder, time.perf_counter() - started)
+
+    print_report(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"统计结果已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
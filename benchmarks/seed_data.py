@@ -0,0 +1,225 @@
+"""
+合成数据生成脚本
+批量生成课程、单元、关卡、题目、用户以及答题和进度记录，用于基准测试
+
+- synthetic：按参数生成的单元和关卡，用户带有答题和进度记录，用于查询基准测试
+- classroom：按 init_db.py 中示例课程的单元/关卡结构复制出多门课程，题目关联知识点，
+  只创建可登录的学生账号，供 load_test.py 压测使用
+
+用法:
+    python benchmarks/seed_data.py --db /tmp/quiz-bench.db --users 100000
+    python benchmarks/seed_data.py --layout classroom --db /tmp/quiz-load.db --users 500 --courses 12
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+from models import db
+
+GRADES = ['一年级', '二年级', '三年级', '四年级', '五年级', '六年级']
+SUBJECTS = ['语文', '数学', '英语']
+TERMS = ['上册', '下册']
+
+KNOWLEDGE_POINTS = [
+    ('课文内容理解', '阅读'), ('词语理解', '词汇'), ('字词辨析', '词汇'),
+    ('中心思想理解', '阅读'), ('人物性格分析', '阅读'), ('文学常识', '文学常识'),
+]
+
+DEFAULT_PASSWORD = 'student123'
+
+
+def _insert(conn, table_name, rows, chunk_size=10000):
+    table = db.metadata.tables[table_name]
+    for start in range(0, len(rows), chunk_size):
+        conn.execute(table.insert(), rows[start:start + chunk_size])
+
+
+def synthetic_units(units_per_course=8, levels_per_unit=5):
+    """按数量生成单元/关卡结构，格式与 init_db.SAMPLE_UNITS 相同，每个单元最后一关为 Boss 关"""
+    return [
+        {'name': f'第{u + 1}单元', 'levels': [
+            {'title': f'关卡{u + 1}-{l + 1}', 'content_ref': f'第{l + 1}课', 'is_boss': l == levels_per_unit - 1}
+            for l in range(levels_per_unit)
+        ]}
+        for u in range(units_per_course)
+    ]
+
+
+def seed(engine, users=1000, courses=6, units_per_course=8, levels_per_unit=5,
+         questions_per_level=10, levels_per_user=5, password_hash='x', rng=None,
+         units=None, knowledge_points=()):
+    """
+    向空数据库写入合成数据
+
+    参数:
+    - engine: SQLAlchemy引擎，表结构需已创建
+    - users: 用户数量，用户名为 student{n}；用户按顺序分配到各门课程，
+      分配结果写入 last_grade/last_course，与学生在选课页面选择课程后的状态一致
+    - units: 每门课程的单元/关卡结构（格式同 init_db.SAMPLE_UNITS），
+      为空时按 units_per_course、levels_per_unit 生成
+    - knowledge_points: (名称, 分类) 列表，不为空时每道题随机关联其中一个知识点
+    - levels_per_user: 每个用户完成的关卡数，这些关卡的题目全部作答；为 0 时只创建账号
+    - password_hash: 所有用户共用的密码哈希
+
+    返回:
+    - 各表写入的行数
+    """
+    rng = rng or random.Random(42)
+    units = units or synthetic_units(units_per_course, levels_per_unit)
+    counts = {}
+
+    with engine.begin() as conn:
+        kp_rows = [{'id': i + 1, 'name': name, 'category': category}
+                   for i, (name, category) in enumerate(knowledge_points)]
+        _insert(conn, 'knowledge_point', kp_rows)
+
+        course_rows = []
+        for i in range(courses):
+            grade = GRADES[i // (len(SUBJECTS) * len(TERMS)) % len(GRADES)]
+            subject = SUBJECTS[i // len(TERMS) % len(SUBJECTS)]
+            term = TERMS[i % len(TERMS)]
+            course_rows.append({'id': i + 1, 'grade': grade, 'subject': subject, 'term': term})
+        _insert(conn, 'course', course_rows)
+
+        unit_rows, level_rows, question_rows, link_rows = [], [], [], []
+        course_levels = {}
+        level_questions = {}
+        for course in course_rows:
+            for unit_order, unit_data in enumerate(units, 1):
+                unit_id = len(unit_rows) + 1
+                unit_rows.append({'id': unit_id, 'course_id': course['id'],
+                                  'name': unit_data['name'], 'order': unit_order})
+                for level_order, level_data in enumerate(unit_data['levels'], 1):
+                    level_id = len(level_rows) + 1
+                    level_rows.append({
+                        'id': level_id, 'unit_id': unit_id, 'title': level_data['title'],
+                        'content_ref': level_data.get('content_ref'),
+                        'is_boss': level_data.get('is_boss', False),
+                        'is_midterm': level_data.get('is_midterm', False),
+                        'is_final': level_data.get('is_final', False),
+                        'order': level_order,
+                    })
+                    course_levels.setdefault(course['id'], []).append(level_id)
+                    for q in range(questions_per_level):
+                        question_id = len(question_rows) + 1
+                        is_choice = q % 2 == 0
+                        question_rows.append({
+                            'id': question_id, 'level_id': level_id,
+                            'question_type': 'multiple_choice' if is_choice else 'true_false',
+                            'content': f"《{level_data['title']}》第{q + 1}题", 'difficulty': 1 + q % 5,
+                            'score': 5, 'order': q + 1,
+                            'options': [{'id': c, 'content': f'选项{c}'} for c in 'ABCD'] if is_choice else None,
+                            'correct_answer': ['A'] if is_choice else q % 4 == 1,
+                            'explanation': '解析',
+                        })
+                        level_questions.setdefault(level_id, []).append(question_id)
+                        if kp_rows:
+                            link_rows.append({'question_id': question_id,
+                                              'knowledge_point_id': rng.randint(1, len(kp_rows))})
+
+        _insert(conn, 'unit', unit_rows)
+        _insert(conn, 'level', level_rows)
+        _insert(conn, 'question', question_rows)
+        _insert(conn, 'question_knowledge_point', link_rows)
+        counts.update(knowledge_point=len(kp_rows), course=len(course_rows), unit=len(unit_rows),
+                      level=len(level_rows), question=len(question_rows),
+                      question_knowledge_point=len(link_rows))
+
+        user_rows, progress_rows, answer_rows = [], [], []
+        for n in range(users):
+            user_id = n + 1
+            course = course_rows[n % len(course_rows)]
+            user_rows.append({'id': user_id, 'username': f'student{user_id}', 'password': password_hash,
+                              'last_grade': course['grade'], 'last_course': course['subject'] + course['term']})
+            if not levels_per_user:
+                continue
+            levels = course_levels[course['id']]
+            done = levels[:rng.randint(0, min(levels_per_user, len(levels) - 1))]
+            for level_id in done:
+                progress_rows.append({'user_id': user_id, 'level_id': level_id, 'status': 'completed'})
+                for question_id in level_questions[level_id]:
+                    correct = rng.random() < 0.8
+                    answer_rows.append({
+                        'user_id': user_id, 'question_id': question_id,
+                        'answer_content': ['A'] if correct else ['B'],
+                        'is_correct': correct, 'score': 5 if correct else 0,
+                        'time_spent': rng.randint(3, 60),
+                    })
+            progress_rows.append({'user_id': user_id, 'level_id': levels[len(done)], 'status': 'unlocked'})
+
+            # 分块写入，避免一次性在内存中堆积百万行
+            if len(answer_rows) >= 200000:
+                _insert(conn, 'user', user_rows)
+                _insert(conn, 'user_progress', progress_rows)
+                _insert(conn, 'user_answer', answer_rows)
+                counts['user'] = counts.get('user', 0) + len(user_rows)
+                counts['user_progress'] = counts.get('user_progress', 0) + len(progress_rows)
+                counts['user_answer'] = counts.get('user_answer', 0) + len(answer_rows)
+                user_rows, progress_rows, answer_rows = [], [], []
+
+        _insert(conn, 'user', user_rows)
+        _insert(conn, 'user_progress', progress_rows)
+        _insert(conn, 'user_answer', answer_rows)
+        counts['user'] = counts.get('user', 0) + len(user_rows)
+        counts['user_progress'] = counts.get('user_progress', 0) + len(progress_rows)
+        counts['user_answer'] = counts.get('user_answer', 0) + len(answer_rows)
+
+    # 未生成的表（如 classroom 中的答题记录）不列出
+    return {table: count for table, count in counts.items() if count}
+
+
+def seed_classroom(engine, students=500, courses=12, questions_per_level=8,
+                   password=DEFAULT_PASSWORD, rng=None):
+    """
+    按示例课程结构生成压测数据：每门课程都使用 init_db.SAMPLE_UNITS 的单元和关卡结构，
+    题目关联知识点，学生只有账号，密码均为 password
+    """
+    from init_db import SAMPLE_UNITS
+
+    # 所有学生共用一个密码哈希，避免生成数据时计算大量哈希
+    return seed(engine, users=students, courses=courses, questions_per_level=questions_per_level,
+                levels_per_user=0, password_hash=generate_password_hash(password), rng=rng,
+                units=SAMPLE_UNITS, knowledge_points=KNOWLEDGE_POINTS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试用的合成数据')
+    parser.add_argument('--layout', choices=['synthetic', 'classroom'], default='synthetic',
+                        help='classroom 按示例课程结构生成 load_test.py 的压测数据')
+    parser.add_argument('--db', help='SQLite数据库文件路径')
+    parser.add_argument('--users', type=int, help='用户数（默认 synthetic 100000，classroom 500）')
+    parser.add_argument('--courses', type=int, help='课程数（默认 synthetic 6，classroom 12）')
+    parser.add_argument('--questions-per-level', type=int, default=8, help='classroom 每个关卡的题目数')
+    args = parser.parse_args()
+
+    classroom = args.layout == 'classroom'
+    args.db = args.db or ('/tmp/quiz-load.db' if classroom else '/tmp/quiz-bench.db')
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    engine = sa.create_engine(f'sqlite:///{args.db}')
+    db.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    if classroom:
+        counts = seed_classroom(engine, students=args.users or 500, courses=args.courses or 12,
+                                questions_per_level=args.questions_per_level)
+    else:
+        counts = seed(engine, users=args.users or 100000, courses=args.courses or 6)
+    print(f"数据生成完成，用时 {time.perf_counter() - started:.1f}s")
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
+    if classroom:
+        print(f"学生账号: student1 ~ student{counts['user']}，密码 {DEFAULT_PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+页面条件请求
+课程地图、选课页和关卡结果页的 ETag 由廉价的版本戳计算：
+用户进度/答题记录的聚合值、课程结构或题目包的版本，以及模板和静态资源的指纹。
+请求带有匹配的 If-None-Match 时直接返回 304，不执行页面查询和模板渲染
+"""
+
+import hashlib
+
+from flask import current_app, make_response, request
+
+from assets import static_assets
+from models import db, UserAnswer, UserProgress
+
+
+def progress_stamp(user_id):
+    """
+    用户进度的版本戳：最后更新时间、记录数和已完成数
+
+    进度记录只增删和改状态，三者任一变化都说明课程地图需要重新渲染；
+    记录数和完成数可以区分同一秒内的多次更新
+    """
+    return tuple(db.session.query(
+        db.func.max(UserProgress.updated_at),
+        db.func.count(UserProgress.id),
+        db.func.sum(db.case((UserProgress.status == 'completed', 1), else_=0)),
+    ).filter(UserProgress.user_id == user_id).one())
+
+
+def answer_stamp(user_id):
+    """用户答题记录的版本戳：最后作答时间、记录数、总分和答对数"""
+    return tuple(db.session.query(
+        db.func.max(UserAnswer.attempt_time),
+        db.func.count(UserAnswer.id),
+        db.func.sum(UserAnswer.score),
+        db.func.sum(db.case((UserAnswer.is_correct, 1), else_=0)),
+    ).filter(UserAnswer.user_id == user_id).one())
+
+
+class ConditionalPages:
+    """
+    生成页面 ETag 并处理 If-None-Match
+
+    ETag 包含模板源码和静态资源指纹，重新部署后旧的 ETag 自动失效；
+    调试模式下模板随时可能修改，不返回 304
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.salt = ''
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CONDITIONAL_PAGES', True)
+        if not self.enabled:
+            return
+        digest = hashlib.md5()
+        env = app.jinja_env
+        for name in sorted(env.list_templates()):
+            source, _filename, _uptodate = env.loader.get_source(env, name)
+            digest.update(name.encode())
+            digest.update(source.encode())
+        digest.update(static_assets.fingerprint().encode())
+        self.salt = digest.hexdigest()
+
+    def etag(self, *parts):
+        """由页面名称、用户和各版本戳计算 ETag"""
+        return hashlib.md5(repr((self.salt,) + parts).encode()).hexdigest()
+
+    def respond(self, etag, render):
+        """
+        ETag 匹配时返回 304，否则调用 render() 生成页面并附带 ETag
+
+        页面因用户而异，只允许浏览器私有缓存，且每次使用前都需重新验证
+        """
+        if not self.enabled or current_app.debug:
+            return render()
+
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(render())
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response
+
+
+conditional_pages = ConditionalPages()
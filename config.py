@@ -0,0 +1,116 @@
+"""
+应用配置
+数据库连接和连接池参数均可通过环境变量覆盖，未设置时使用本地 SQLite 数据库
+"""
+
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _threaded_workers():
+    """gunicorn 的 worker 是否同时处理多个请求：ASGI 模式，或同步 worker 开启了多线程"""
+    return os.environ.get('SERVER_MODE', 'wsgi') == 'asgi' or _env_int('GUNICORN_THREADS', 1) > 1
+
+
+def database_url():
+    """
+    读取 DATABASE_URL 环境变量
+
+    部分托管平台提供的地址以 postgres:// 开头，SQLAlchemy 只识别 postgresql://
+    """
+    url = os.environ.get('DATABASE_URL', 'sqlite:///quiz.db')
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+class Config:
+    # 签名密钥：未设置时使用实例目录中的密钥文件（首次启动时生成），所有 worker 共用
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SECRET_KEY_FILE = os.environ.get('SECRET_KEY_FILE')
+    # 轮换密钥时把旧密钥放在这里（逗号分隔），用旧密钥签名的会话仍然有效
+    SECRET_KEY_FALLBACKS = [key for key in os.environ.get('SECRET_KEY_FALLBACKS', '').split(',') if key]
+
+    # 会话存储：sqlite、file 或 cookie（Flask 默认的 Cookie 会话）
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sqlite')
+    # 存储路径，为空时使用 instance/sessions.db 或 instance/sessions/
+    SESSION_PATH = os.environ.get('SESSION_PATH')
+    # 进程内会话缓存：最多缓存的会话数、缓存秒数；默认 0 不缓存，
+    # 开启后其他 worker 的修改（包括退出登录）最迟在该时间后才可见
+    SESSION_CACHE_SIZE = _env_int('SESSION_CACHE_SIZE', 1024)
+    SESSION_CACHE_TTL = _env_int('SESSION_CACHE_TTL', 0)
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Lax'
+
+    SQLALCHEMY_DATABASE_URI = database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 连接池（仅对 PostgreSQL 等服务端数据库生效）
+    # 每个 gunicorn worker 各有一个连接池，总连接数约为 workers × (POOL_SIZE + MAX_OVERFLOW)
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)
+
+    # ASGI 模式（asgi.py）下每个 worker 处理请求的线程数，请求从收到请求头起占用线程直到响应交给事件循环
+    ASGI_THREADS = _env_int('ASGI_THREADS', 10)
+
+    # SQLite 连接参数：WAL 模式允许读写并发，busy_timeout 为等待写锁的毫秒数
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = _env_int('SQLITE_BUSY_TIMEOUT', 5000)
+
+    # 请求性能统计：开启后提供 /metrics，可选输出 Server-Timing 响应头
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED')
+    METRICS_SERVER_TIMING = _env_bool('METRICS_SERVER_TIMING')
+    # 超过SQL条数或耗时预算（毫秒）的请求记录警告日志
+    METRICS_LOG_SLOW_REQUESTS = _env_bool('METRICS_LOG_SLOW_REQUESTS')
+    METRICS_STATEMENT_BUDGET = _env_int('METRICS_STATEMENT_BUDGET', 20)
+    METRICS_LATENCY_BUDGET_MS = _env_int('METRICS_LATENCY_BUDGET_MS', 500)
+
+    # 模板：字节码缓存目录（为空时使用 instance/jinja_cache），启动时是否预编译全部模板
+    TEMPLATE_BYTECODE_CACHE = _env_bool('TEMPLATE_BYTECODE_CACHE', True)
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    TEMPLATE_WARMUP = _env_bool('TEMPLATE_WARMUP')
+
+    # 静态资源：按内容哈希生成带指纹的地址并预压缩；开发时可开启自动重新计算指纹
+    ASSET_MANIFEST = _env_bool('ASSET_MANIFEST', True)
+    ASSET_AUTO_RELOAD = _env_bool('ASSET_AUTO_RELOAD')
+    # 将 core.js 与题型脚本合并为一个文件下发
+    ASSET_BUNDLE_JS = _env_bool('ASSET_BUNDLE_JS')
+
+    # 课程地图、选课页和关卡结果页返回 ETag，未变化时返回304
+    CONDITIONAL_PAGES = _env_bool('CONDITIONAL_PAGES', True)
+
+    # 用户身份缓存：最多缓存的用户数、缓存秒数（其他进程修改用户后最迟在该时间后可见）
+    USER_CACHE_SIZE = _env_int('USER_CACHE_SIZE', 4096)
+    USER_CACHE_TTL = _env_int('USER_CACHE_TTL', 60)
+
+    # 密码哈希：算法（werkzeug 的 method 参数，调整后用户下次登录时自动升级）、
+    # 每个 worker 的哈希进程数（0 为在请求线程中计算）、最多同时等待的任务数和等待秒数。
+    # 进程池只对同时处理多个请求的 worker 有用，单线程的同步 worker 默认不创建
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = _env_int('PASSWORD_HASH_WORKERS', 2 if _threaded_workers() else 0)
+    PASSWORD_HASH_MAX_PENDING = _env_int('PASSWORD_HASH_MAX_PENDING', 8)
+    PASSWORD_HASH_TIMEOUT = _env_int('PASSWORD_HASH_TIMEOUT', 5)
+
+    # 课程内容包：文件路径（为空时不使用，课程和题目从数据库读取）、检查文件是否被替换的间隔（秒）
+    CONTENT_PACK = os.environ.get('CONTENT_PACK')
+    CONTENT_PACK_CHECK_INTERVAL = _env_int('CONTENT_PACK_CHECK_INTERVAL', 30)
+
+    # 关卡题目包缓存：最多缓存的关卡数、版本戳检查间隔（秒）
+    QUESTION_CACHE_SIZE = 128
+    QUESTION_CACHE_CHECK_INTERVAL = 5
+    # 课程结构缓存：版本戳检查间隔（秒）
+    COURSE_GRAPH_CHECK_INTERVAL = 60
@@ -0,0 +1,383 @@
+"""
+课程内容包
+课程结构（课程/单元/关卡）和题目在一个学期内基本不变，编译为一个带版本的只读文件：
+
+- python content_pack.py 从数据库导出全部课程和题目，写入 CONTENT_PACK 指定的文件
+- 应用启动时加载为不可变的内存索引；配合 gunicorn 的 preload_app，索引在主进程中加载，
+  worker 通过 fork 共享同一份内存
+- 文件被重新编译后，各 worker 在 CONTENT_PACK_CHECK_INTERVAL 秒内发现并重新加载
+
+加载时与数据库核对版本戳：课程结构不一致时不使用内容包，题目有变化的关卡改为从数据库读取。
+之后每 CONTENT_PACK_CHECK_INTERVAL 秒只读取 content_version 中的修改计数（按主键读一行），
+计数变化后才重新核对；本进程修改课程或题目时立即停用对应内容。
+课程地图、选课页和答题页面从内容包读取静态内容，只有用户进度和答题记录需要查询数据库
+
+用法:
+    python content_pack.py
+    python content_pack.py --output /srv/quiz/content.pack
+"""
+
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from types import MappingProxyType
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import (db, Course, KnowledgePoint, Level, Question, QuestionKnowledgePoint, Unit,
+                    bump_content_version, content_version)
+
+# 内容包文件格式的版本，结构变化时递增，旧格式的文件不再加载
+PACK_FORMAT = 2
+
+PackCourse = namedtuple('PackCourse', 'id grade subject term units')
+PackUnit = namedtuple('PackUnit', 'id course_id name order levels')
+PackLevel = namedtuple('PackLevel', 'id unit_id title content_ref is_boss is_midterm is_final order')
+
+
+class ContentPackError(ValueError):
+    """内容包文件无法使用"""
+
+
+def level_versions(level_ids=None):
+    """
+    计算关卡题目包的版本戳 {level_id: (题目数, 最后更新时间, 页面字段摘要)}
+
+    页面字段摘要覆盖题目包中随关卡显示的内容：关卡标题和课文、单元名称、所属课程和知识点名称。
+    两条查询完成，不限定 level_ids 时计算全部关卡；不存在的关卡不在结果中
+    """
+    stamps = db.session.query(
+        Level.id, Level.title, Level.content_ref, Unit.name, Unit.course_id,
+        db.func.count(Question.id), db.func.max(Question.updated_at)
+    ).outerjoin(Unit, Unit.id == Level.unit_id).outerjoin(
+        Question, Question.level_id == Level.id
+    ).group_by(Level.id, Level.title, Level.content_ref, Unit.name, Unit.course_id)
+    knowledge_points = db.session.query(
+        Question.level_id, KnowledgePoint.id, KnowledgePoint.name
+    ).join(
+        QuestionKnowledgePoint, QuestionKnowledgePoint.question_id == Question.id
+    ).join(
+        KnowledgePoint, KnowledgePoint.id == QuestionKnowledgePoint.knowledge_point_id
+    ).distinct()
+    if level_ids is not None:
+        stamps = stamps.filter(Level.id.in_(level_ids))
+        knowledge_points = knowledge_points.filter(Question.level_id.in_(level_ids))
+
+    level_kps = {}
+    for level_id, kp_id, kp_name in knowledge_points:
+        level_kps.setdefault(level_id, []).append([kp_id, kp_name])
+    versions = {}
+    for level_id, title, content_ref, unit_name, course_id, count, last_updated in stamps:
+        fields = [title, content_ref, unit_name, course_id, sorted(level_kps.get(level_id, ()))]
+        digest = hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode()).hexdigest()[:16]
+        versions[level_id] = (count, str(last_updated), digest)
+    return versions
+
+
+def compile_content_pack(path):
+    """
+    从数据库编译内容包并写入文件
+
+    内容相同时生成的文件和版本号也相同；先写临时文件再替换，运行中的 worker 不会读到写了一半的文件
+
+    返回:
+    - 内容包版本号
+    """
+    # 避免循环导入：course_tree 和 question_cache 在读取时会使用本模块
+    from course_tree import load_all_courses, structure_version
+    from question_cache import build_bundle
+
+    versions = level_versions()
+    courses = []
+    levels = []
+    for course in load_all_courses():
+        units = []
+        for unit in course.units:
+            unit_levels = []
+            for level in unit.levels:
+                unit_levels.append([level.id, level.unit_id, level.title, level.content_ref,
+                                    bool(level.is_boss), bool(level.is_midterm), bool(level.is_final),
+                                    level.order])
+                bundle = build_bundle(level)
+                levels.append({
+                    'version': versions[level.id],
+                    'level': bundle['level'],
+                    'questions': bundle['questions'],
+                    'knowledge_points': sorted(bundle['knowledge_points'].items()),
+                })
+            units.append([unit.id, unit.course_id, unit.name, unit.order, unit_levels])
+        courses.append([course.id, course.grade, course.subject, course.term, units])
+
+    content = {
+        'structure_version': structure_version(),
+        'courses': courses,
+        'levels': levels,
+    }
+    body = json.dumps(content, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    version = hashlib.sha256(body.encode()).hexdigest()[:16]
+    document = json.dumps({
+        'format': PACK_FORMAT,
+        'version': version,
+        'compiled_at': datetime.now().isoformat(timespec='seconds'),
+        'content': content,
+    }, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            f.write(document.encode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return version
+
+
+class ContentPack:
+    """
+    加载后的内容包，所有属性只读
+
+    - courses: {course_id: PackCourse}，单元和关卡按顺序排列，属性与 Course/Unit/Level 模型相同
+    - bundles: {level_id: 题目包}，格式与 question_cache.build_bundle 相同
+    - level_versions: {level_id: 题目版本戳}
+    - course_index: 由 courses 生成的 CourseIndex
+    - structure_version: 编译时的课程结构版本戳
+    - stale_levels: 因题目有变化而未使用的关卡数
+    """
+
+    def __init__(self, document, current_level_versions):
+        # 避免循环导入：course_tree 在读取课程结构时会使用本模块
+        from course_tree import CourseIndex
+
+        content = document['content']
+        self.version = document['version']
+        self.compiled_at = document.get('compiled_at')
+        self.structure_version = content['structure_version']
+
+        courses = {}
+        course_names = {}
+        for course_id, grade, subject, term, units in content['courses']:
+            course = PackCourse(course_id, grade, subject, term, tuple(
+                PackUnit(unit_id, unit_course_id, name, order,
+                         tuple(PackLevel(*level) for level in unit_levels))
+                for unit_id, unit_course_id, name, order, unit_levels in units
+            ))
+            courses[course_id] = course
+            course_names.setdefault((grade, subject + term), course_id)
+
+        bundles = {}
+        versions = {}
+        stale = 0
+        for entry in content['levels']:
+            level_id = entry['level']['id']
+            version = tuple(entry['version'])
+            if current_level_versions.get(level_id) != version:
+                stale += 1
+                continue
+            bundles[level_id] = {
+                'level': entry['level'],
+                'questions': tuple(
+                    dict(question, knowledge_point_ids=tuple(question['knowledge_point_ids']))
+                    for question in entry['questions']
+                ),
+                'knowledge_points': dict(entry['knowledge_points']),
+            }
+            versions[level_id] = version
+
+        self.courses = MappingProxyType(courses)
+        self.bundles = MappingProxyType(bundles)
+        self.level_versions = MappingProxyType(versions)
+        self.stale_levels = stale
+        self.course_index = CourseIndex(courses.values(), version=('pack', self.version))
+        self._course_names = MappingProxyType(course_names)
+
+    def find_course(self, grade, course_name):
+        """按年级和课程名称（如"语文上册"或"语文 上册"）查找课程，找不到时返回None"""
+        course_id = self._course_names.get((grade, course_name.replace(' ', '')))
+        return self.courses.get(course_id)
+
+    def without_levels(self, level_ids):
+        """返回去掉指定关卡题目包的副本，这些关卡改为从数据库读取；课程结构不变"""
+        level_ids = set(level_ids) & self.bundles.keys()
+        if not level_ids:
+            return self
+        pack = copy.copy(self)
+        pack.bundles = MappingProxyType({
+            level_id: bundle for level_id, bundle in self.bundles.items() if level_id not in level_ids
+        })
+        pack.level_versions = MappingProxyType({
+            level_id: version for level_id, version in self.level_versions.items() if level_id not in level_ids
+        })
+        pack.stale_levels = self.stale_levels + len(level_ids)
+        return pack
+
+
+def load_content_pack(path):
+    """
+    读取内容包文件并与数据库核对
+
+    返回:
+    - ContentPack；课程结构与数据库不一致时抛出 ContentPackError
+    """
+    from course_tree import structure_version
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        document = json.load(f)
+    if document.get('format') != PACK_FORMAT:
+        raise ContentPackError(f"内容包格式 {document.get('format')} 与当前版本 {PACK_FORMAT} 不符，请重新编译")
+    if document['content']['structure_version'] != structure_version():
+        raise ContentPackError('课程结构与数据库不一致，请重新编译内容包')
+    return ContentPack(document, level_versions())
+
+
+class ContentPackStore:
+    """
+    当前使用的内容包
+
+    - 未配置 CONTENT_PACK 时 get() 返回None，所有内容从数据库读取
+    - check_interval 秒检查一次文件是否被替换，替换后重新加载；文件无法使用时从数据库读取
+    - 文件未变化时每 check_interval 秒读取一次课程内容修改计数，计数变化后与数据库核对：
+      课程结构变化后停用内容包，题目、关卡或知识点有变化的关卡改为从数据库读取，直到重新编译
+    """
+
+    def __init__(self, check_interval=30):
+        self.path = None
+        self.check_interval = check_interval
+        self._pack = None
+        self._stamp = None
+        self._content_version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """读取配置并在启动时加载内容包"""
+        self.path = app.config.get('CONTENT_PACK') or None
+        self.check_interval = app.config.get('CONTENT_PACK_CHECK_INTERVAL', self.check_interval)
+        if not self.path:
+            return
+        with app.app_context():
+            self._reload()
+            self._checked_at = time.monotonic()
+            # 应用可能在 gunicorn 主进程中加载，核对版本时打开的连接不能带到 fork 出的 worker 里
+            db.session.remove()
+            db.engine.dispose()
+
+    def get(self):
+        """返回当前的 ContentPack，未启用或不可用时返回None"""
+        if not self.path:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    # 先更新检查时间，重新加载期间其他线程继续使用原来的内容包
+                    self._checked_at = now
+                    if self._file_stamp() != self._stamp:
+                        self._reload()
+                    elif self._pack is not None:
+                        self._verify()
+        return self._pack
+
+    def discard_levels(self, level_ids=None):
+        """本进程修改了题目时立即停止使用内容包中对应关卡（为None时全部关卡）的题目包"""
+        with self._lock:
+            pack = self._pack
+            if pack is not None:
+                self._pack = pack.without_levels(pack.bundles.keys() if level_ids is None else level_ids)
+
+    def discard(self):
+        """本进程修改了课程结构时停用内容包，直到文件被重新编译"""
+        with self._lock:
+            self._pack = None
+
+    def _verify(self):
+        from course_tree import structure_version
+
+        # 核对期间的修改会让计数再次变化，下一次检查时重新核对
+        version = content_version()
+        if version == self._content_version:
+            return
+        self._content_version = version
+        pack = self._pack
+        if pack.structure_version != structure_version():
+            current_app.logger.warning('课程结构已修改，停用内容包 %s，从数据库读取课程内容', self.path)
+            self._pack = None
+            return
+        versions = level_versions()
+        stale = [level_id for level_id, version in pack.level_versions.items() if versions.get(level_id) != version]
+        if stale:
+            current_app.logger.warning('内容包 %s 中有 %d 个关卡的题目已修改，这些关卡从数据库读取',
+                                       self.path, len(stale))
+            self._pack = pack.without_levels(stale)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload(self):
+        self._stamp = self._file_stamp()
+        self._content_version = None
+        if self._stamp is None:
+            current_app.logger.warning('内容包 %s 不存在，从数据库读取课程内容', self.path)
+            self._pack = None
+            return
+        try:
+            version = content_version()
+            pack = load_content_pack(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            current_app.logger.warning('内容包 %s 无法使用，从数据库读取课程内容: %s', self.path, e)
+            self._pack = None
+            return
+        if pack.stale_levels:
+            current_app.logger.warning('内容包 %s 中有 %d 个关卡的题目已修改，这些关卡从数据库读取',
+                                       self.path, pack.stale_levels)
+        self._pack = pack
+        self._content_version = version
+
+
+content_packs = ContentPackStore()
+
+CONTENT_MODELS = (Course, Unit, Level, Question, KnowledgePoint, QuestionKnowledgePoint)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_content_version(session, flush_context):
+    """课程内容通过 ORM 写入时，在同一事务中增加修改计数，其他进程的内容包据此发现修改"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CONTENT_MODELS):
+            bump_content_version(session.connection())
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将课程结构和题目编译为内容包')
+    parser.add_argument('--output', help='内容包路径，默认使用 CONTENT_PACK 配置或 instance/content.pack')
+    args = parser.parse_args()
+
+    from app import app
+
+    path = args.output or app.config.get('CONTENT_PACK') or os.path.join(app.instance_path, 'content.pack')
+    started = time.perf_counter()
+    with app.app_context():
+        version = compile_content_pack(path)
+    print(f"已写入 {path}（版本 {version}，{os.path.getsize(path) / 1024:.0f} KB），"
+          f"用时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+课程结构加载模块
+以固定次数的查询一次性加载 课程 → 单元 → 关卡 以及用户进度，避免逐单元、逐关卡查询
+
+进度按稀疏方式存储：user_progress 只保存 'unlocked' 和 'completed'，
+没有记录的关卡由 resolve_progress 根据课程结构推导出状态
+
+课程结构很少变化，CourseGraphCache 在进程内缓存不可变的课程图（关卡顺序和下一关映射），
+结构变化时通过模型事件和版本戳失效；启用内容包时课程和课程图都直接取自内容包
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+
+from content_pack import content_packs
+from models import db, Course, Level, Unit, UserProgress
+
+
+def _tree_options():
+    """单元和关卡使用selectin预加载，每层只需一条查询"""
+    return selectinload(Course.units).selectinload(Unit.levels)
+
+
+def find_course(grade, course_name):
+    """
+    按年级和课程名称（如"语文上册"或"语文 上册"）查找课程，并预加载单元和关卡
+
+    返回:
+    - Course对象（启用内容包时为 PackCourse），找不到时返回None
+    """
+    pack = content_packs.get()
+    if pack is not None:
+        return pack.find_course(grade, course_name)
+    return Course.query.options(_tree_options()).filter(
+        Course.grade == grade,
+        db.or_(
+            Course.subject + Course.term == course_name,
+            Course.subject + ' ' + Course.term == course_name
+        )
+    ).first()
+
+
+def load_course(course_id):
+    """加载课程及其全部单元和关卡，课程不存在时返回None"""
+    pack = content_packs.get()
+    if pack is not None:
+        return pack.courses.get(course_id)
+    return Course.query.options(_tree_options()).filter_by(id=course_id).first()
+
+
+def load_all_courses():
+    """加载全部课程及其单元和关卡"""
+    return Course.query.options(_tree_options()).order_by(Course.id).all()
+
+
+def next_level_map(courses):
+    """
+    计算每个关卡完成后要解锁的下一关
+
+    下一关为同一单元中的后一关；单元最后一关的下一关为下一单元的第一关
+
+    返回:
+    - {level_id: next_level_id}，课程最后一关没有下一关
+    """
+    successors = {}
+    for course in courses:
+        levels = [level for unit in course.units for level in unit.levels]
+        for level, next_level in zip(levels, levels[1:]):
+            successors[level.id] = next_level.id
+    return successors
+
+
+def course_level_ids(course):
+    """按单元、关卡顺序返回课程内全部关卡ID"""
+    return [level.id for unit in course.units for level in unit.levels]
+
+
+def load_user_progress(user_id, level_ids):
+    """一次查询取出用户在指定关卡上的进度 {level_id: status}"""
+    if not level_ids:
+        return {}
+    return {
+        p.level_id: p.status
+        for p in UserProgress.query.filter_by(user_id=user_id).filter(
+            UserProgress.level_id.in_(level_ids)
+        ).all()
+    }
+
+
+def load_course_tree(course_id, user_id=None):
+    """
+    加载课程结构和用户进度
+
+    无论课程有多少单元和关卡，总共只执行4条查询：课程、单元、关卡、进度；
+    启用内容包时只查询进度
+
+    返回:
+    - (course, progress)，课程不存在时返回 (None, {})
+    - progress 覆盖课程内全部关卡，没有记录的关卡状态由课程结构推导
+    """
+    course = load_course(course_id)
+    if course is None:
+        return None, {}
+    stored = {}
+    if user_id is not None:
+        stored = load_user_progress(user_id, course_level_ids(course))
+    return course, resolve_progress(course, stored)
+
+
+def derive_level_status(level, index, previous_status):
+    """
+    推导没有进度记录的关卡状态
+
+    - 期中/期末关卡默认解锁
+    - 单元第一关默认解锁
+    - 前一关已完成则解锁
+    - 其余关卡锁定
+    """
+    if level.is_midterm or level.is_final:
+        return 'unlocked'
+    if index == 0:
+        return 'unlocked'
+    if previous_status == 'completed':
+        return 'unlocked'
+    return 'locked'
+
+
+def resolve_progress(course, stored):
+    """
+    将稀疏存储的进度补全为课程内每个关卡的状态
+
+    参数:
+    - course: 已加载单元和关卡的课程
+    - stored: {level_id: status}，数据库中已有的进度记录
+
+    返回:
+    - {level_id: status}，覆盖课程内全部关卡
+    """
+    progress = {}
+    for unit in course.units:
+        previous_status = None
+        for index, level in enumerate(unit.levels):
+            status = stored.get(level.id)
+            if status not in ('unlocked', 'completed'):
+                status = derive_level_status(level, index, previous_status)
+            progress[level.id] = status
+            previous_status = status
+    return progress
+
+
+CourseGraph = namedtuple('CourseGraph', ['course_id', 'level_ids'])
+
+
+class CourseIndex:
+    """
+    全部课程的不可变结构索引
+
+    - courses: {course_id: CourseGraph}，level_ids 按单元、关卡顺序排列
+    - next_level_ids: {level_id: next_level_id}
+    - level_courses: {level_id: course_id}
+    """
+
+    __slots__ = ('version', 'courses', 'next_level_ids', 'level_courses')
+
+    def __init__(self, courses, version=None):
+        graphs = {}
+        level_courses = {}
+        for course in courses:
+            level_ids = tuple(course_level_ids(course))
+            graphs[course.id] = CourseGraph(course.id, level_ids)
+            for level_id in level_ids:
+                level_courses[level_id] = course.id
+        self.version = version
+        self.courses = MappingProxyType(graphs)
+        self.next_level_ids = MappingProxyType(next_level_map(courses))
+        self.level_courses = MappingProxyType(level_courses)
+
+    def next_level_id(self, level_id):
+        """关卡完成后要解锁的下一关，没有下一关时返回None"""
+        return self.next_level_ids.get(level_id)
+
+
+def structure_version():
+    """
+    计算课程结构的版本戳
+
+    页面上显示的课程、单元和关卡字段（年级科目、单元名称、关卡标题和课文、关卡类型、
+    顺序和所属关系）任一变化都会改变版本戳。三张表都很小，直接取出这些列计算摘要
+    """
+    digest = hashlib.sha256()
+    for query in (
+        db.session.query(Course.id, Course.grade, Course.subject, Course.term).order_by(Course.id),
+        db.session.query(Unit.id, Unit.course_id, Unit.name, Unit.order).order_by(Unit.id),
+        db.session.query(Level.id, Level.unit_id, Level.title, Level.content_ref,
+                         Level.is_boss, Level.is_midterm, Level.is_final, Level.order).order_by(Level.id),
+    ):
+        rows = [list(row) for row in query]
+        digest.update(json.dumps(rows, ensure_ascii=False, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+class CourseGraphCache:
+    """
+    进程内的课程结构缓存
+
+    - 本进程修改课程、单元或关卡时立即失效
+    - 其他进程的修改通过版本戳发现，check_interval 秒内不重复检查
+    """
+
+    def __init__(self, check_interval=60):
+        self.check_interval = check_interval
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.check_interval = app.config.get('COURSE_GRAPH_CHECK_INTERVAL', self.check_interval)
+
+    def get(self):
+        """返回当前的 CourseIndex"""
+        pack = content_packs.get()
+        if pack is not None:
+            return pack.course_index
+
+        now = time.monotonic()
+        index = self._index
+        if index is not None and now - self._checked_at < self.check_interval:
+            return index
+
+        version = structure_version()
+        with self._lock:
+            if self._index is not None and self._index.version == version:
+                self._checked_at = now
+                return self._index
+
+        index = CourseIndex(load_all_courses(), version)
+        with self._lock:
+            self._index = index
+            self._checked_at = now
+        return index
+
+    def invalidate(self):
+        """丢弃缓存的课程结构"""
+        with self._lock:
+            self._index = None
+
+
+course_graph_cache = CourseGraphCache()
+
+
+@event.listens_for(Course, 'after_insert')
+@event.listens_for(Course, 'after_update')
+@event.listens_for(Course, 'after_delete')
+@event.listens_for(Unit, 'after_insert')
+@event.listens_for(Unit, 'after_update')
+@event.listens_for(Unit, 'after_delete')
+@event.listens_for(Level, 'after_insert')
+@event.listens_for(Level, 'after_update')
+@event.listens_for(Level, 'after_delete')
+def _invalidate_course_graph(mapper, connection, target):
+    course_graph_cache.invalidate()
+    # 内容包中的课程结构随之过期
+    content_packs.discard()
@@ -0,0 +1,61 @@
+"""
+数据库引擎配置
+根据数据库类型设置连接池参数，并在每个 SQLite 连接建立时设置 PRAGMA
+"""
+
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from models import db
+
+_sqlite_pragmas = {}
+
+
+def engine_options(config):
+    """
+    根据应用配置生成 SQLALCHEMY_ENGINE_OPTIONS
+
+    - PostgreSQL 等服务端数据库使用 QueuePool，并在取出连接前检测连接是否存活
+    - SQLite 由 SQLAlchemy 自动选择连接池，这里只设置等待锁的超时时间
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    if url.get_backend_name() == 'sqlite':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args.setdefault('timeout', config['SQLITE_BUSY_TIMEOUT'] / 1000)
+        options['connect_args'] = connect_args
+        return options
+
+    options.setdefault('pool_size', config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', True)
+    return options
+
+
+def init_database(app):
+    """为应用设置引擎参数并初始化 db"""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    _sqlite_pragmas.update({
+        'journal_mode': app.config['SQLITE_JOURNAL_MODE'],
+        'synchronous': app.config['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT'],
+    })
+    db.init_app(app)
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not _sqlite_pragmas:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        # 内存数据库不支持 WAL，SQLite 会自动保留 memory 模式
+        for name, value in _sqlite_pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
@@ -0,0 +1,39 @@
+"""
+gunicorn 配置
+worker 数量默认按 CPU 核数计算，可通过环境变量覆盖
+
+SERVER_MODE=asgi 时改用 uvicorn worker 运行 asgi.py：连接由事件循环管理，
+空闲的 keep-alive 连接不再占用 worker；请求从收到请求头起就在每个 worker 的线程池中执行，
+包括接收请求体的时间
+"""
+
+import gc
+import multiprocessing
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+if server_mode == 'asgi':
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # 每个 worker 一个事件循环，取 CPU 核数即可；同时处理的请求数（含上传中的请求）由 ASGI_THREADS 控制
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+else:
+    wsgi_app = 'app:app'
+    # 同步 worker：每个 worker 同时处理一个请求，通常取 2 × CPU 核数 + 1
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# 定期重启 worker，避免长时间运行导致的内存增长
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+accesslog = '-'
+# 在主进程中加载应用（课程内容包、预编译的模板等），worker 通过 fork 共享这部分内存
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes', 'on')
+
+
+def when_ready(server):
+    # 把主进程中已加载的对象移出垃圾回收的跟踪范围，worker 中的回收不会改写这些对象所在的内存页
+    gc.freeze()
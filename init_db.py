@@ -2,6 +2,78 @@ import os
 from models import db, User, Course, Unit, Level, UserProgress
 from init_questions import init_question_data
 
+# 示例课程（三年级语文上册）的单元和关卡结构
+SAMPLE_UNITS = [
+    {
+        "name": "童话世界",
+        "levels": [
+            {"title": "大青树下的小学", "content_ref": "第1课"},
+            {"title": "花的学校", "content_ref": "第2课"},
+            {"title": "不懂就要问", "content_ref": "第3课"},
+            {"title": "单元挑战", "is_boss": True}
+        ]
+    },
+    {
+        "name": "金秋时节", 
+        "levels": [
+            {"title": "古诗三首", "content_ref": "第4课"},
+            {"title": "铺满金色巴掌的水泥道", "content_ref": "第5课"},
+            {"title": "秋天的雨", "content_ref": "第6课"},
+            {"title": "听听，秋的声音", "content_ref": "第7课"},
+            {"title": "单元挑战", "is_boss": True}
+        ]
+    },
+    {
+        "name": "童话王国",
+        "levels": [
+            {"title": "去年的树", "content_ref": "第8课"},
+            {"title": "那一定会很好", "content_ref": "第9课"},
+            {"title": "在牛肚子里旅行", "content_ref": "第10课"},
+            {"title": "单元挑战", "is_boss": True}
+        ]
+    },
+    {
+        "name": "期中综合挑战",
+        "levels": [
+            {"title": "期中大挑战", "is_midterm": True}
+        ]
+    },
+    {
+        "name": "预测与推理",
+        "levels": [
+            {"title": "总也倒不了的老屋", "content_ref": "第12课"},
+            {"title": "胡萝卜先生的长胡子", "content_ref": "第13课"},
+            {"title": "不会叫的狗", "content_ref": "第14课"},
+            {"title": "单元挑战", "is_boss": True}
+        ]
+    },
+    {
+        "name": "观察与发现",
+        "levels": [
+            {"title": "搭船的鸟", "content_ref": "第15课"},
+            {"title": "金色的草地", "content_ref": "第16课"},
+            {"title": "单元挑战", "is_boss": True}
+        ]
+    },
+    {
+        "name": "祖国山河",
+        "levels": [
+            {"title": "古诗三首", "content_ref": "第17课"},
+            {"title": "富饶的西沙群岛", "content_ref": "第18课"},
+            {"title": "海滨小城", "content_ref": "第19课"},
+            {"title": "美丽的小兴安岭", "content_ref": "第20课"},
+            {"title": "单元挑战", "is_boss": True}
+        ]
+    },
+    {
+        "name": "期末综合挑战",
+        "levels": [
+            {"title": "期末大挑战", "is_final": True}
+        ]
+    }
+]
+
+
 def create_tables(app):
     with app.app_context():
         if not os.path.exists('instance'):
@@ -26,77 +98,7 @@ def init_sample_data():
     db.session.add(chinese_course)
     db.session.flush()
 
-    units = [
-        {
-            "name": "童话世界",
-            "levels": [
-                {"title": "大青树下的小学", "content_ref": "第1课"},
-                {"title": "花的学校", "content_ref": "第2课"},
-                {"title": "不懂就要问", "content_ref": "第3课"},
-                {"title": "单元挑战", "is_boss": True}
-            ]
-        },
-        {
-            "name": "金秋时节", 
-            "levels": [
-                {"title": "古诗三首", "content_ref": "第4课"},
-                {"title": "铺满金色巴掌的水泥道", "content_ref": "第5课"},
-                {"title": "秋天的雨", "content_ref": "第6课"},
-                {"title": "听听，秋的声音", "content_ref": "第7课"},
-                {"title": "单元挑战", "is_boss": True}
-            ]
-        },
-        {
-            "name": "童话王国",
-            "levels": [
-                {"title": "去年的树", "content_ref": "第8课"},
-                {"title": "那一定会很好", "content_ref": "第9课"},
-                {"title": "在牛肚子里旅行", "content_ref": "第10课"},
-                {"title": "单元挑战", "is_boss": True}
-            ]
-        },
-        {
-            "name": "期中综合挑战",
-            "levels": [
-                {"title": "期中大挑战", "is_midterm": True}
-            ]
-        },
-        {
-            "name": "预测与推理",
-            "levels": [
-                {"title": "总也倒不了的老屋", "content_ref": "第12课"},
-                {"title": "胡萝卜先生的长胡子", "content_ref": "第13课"},
-                {"title": "不会叫的狗", "content_ref": "第14课"},
-                {"title": "单元挑战", "is_boss": True}
-            ]
-        },
-        {
-            "name": "观察与发现",
-            "levels": [
-                {"title": "搭船的鸟", "content_ref": "第15课"},
-                {"title": "金色的草地", "content_ref": "第16课"},
-                {"title": "单元挑战", "is_boss": True}
-            ]
-        },
-        {
-            "name": "祖国山河",
-            "levels": [
-                {"title": "古诗三首", "content_ref": "第17课"},
-                {"title": "富饶的西沙群岛", "content_ref": "第18课"},
-                {"title": "海滨小城", "content_ref": "第19课"},
-                {"title": "美丽的小兴安岭", "content_ref": "第20课"},
-                {"title": "单元挑战", "is_boss": True}
-            ]
-        },
-        {
-            "name": "期末综合挑战",
-            "levels": [
-                {"title": "期末大挑战", "is_final": True}
-            ]
-        }
-    ]
-
-    for unit_order, unit_data in enumerate(units, 1):
+    for unit_order, unit_data in enumerate(SAMPLE_UNITS, 1):
         unit = Unit(
             course_id=chinese_course.id,
             name=unit_data["name"],
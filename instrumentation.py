@@ -0,0 +1,201 @@
+"""
+请求性能统计模块
+记录每个请求的端点、耗时、SQL语句数、数据库总耗时和最慢的语句，
+以 Prometheus 文本格式通过 /metrics 输出，并可选地添加 Server-Timing 响应头
+
+未开启 METRICS_ENABLED 时不注册任何钩子和事件监听，不产生额外开销
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from models import db
+
+# 请求耗时直方图的分桶上限（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestStats:
+    """单个请求的统计数据，保存在 flask.g 中"""
+
+    __slots__ = ('started', 'statements', 'db_time', 'slowest_time', 'slowest_statement')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def add_statement(self, statement, elapsed):
+        self.statements += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+
+class EndpointStats:
+    """单个端点的累计统计"""
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # (method, status) -> 次数
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.duration_sum = 0.0
+        self.count = 0
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_statement = 0.0
+
+    def observe(self, method, status, duration, stats):
+        self.requests[(method, status)] += 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+        self.duration_sum += duration
+        self.count += 1
+        self.statements += stats.statements
+        self.db_time += stats.db_time
+        self.slowest_statement = max(self.slowest_statement, stats.slowest_time)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """
+    进程内的请求统计
+
+    - 通过 before_request/after_request 计时，通过引擎的 cursor 事件统计SQL
+    - 统计数据只保存在当前进程中，多 worker 部署时每个 worker 分别输出
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.server_timing = False
+        self.log_slow = False
+        self.statement_budget = None
+        self.latency_budget = None
+        self._endpoints = defaultdict(EndpointStats)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """按应用配置注册钩子，未开启时直接返回"""
+        self.enabled = app.config.get('METRICS_ENABLED', False)
+        if not self.enabled:
+            return
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', False)
+        self.log_slow = app.config.get('METRICS_LOG_SLOW_REQUESTS', False)
+        self.statement_budget = app.config.get('METRICS_STATEMENT_BUDGET')
+        budget_ms = app.config.get('METRICS_LATENCY_BUDGET_MS')
+        self.latency_budget = budget_ms / 1000 if budget_ms else None
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(_start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.render)
+
+    def _finish_request(self, response):
+        stats = g.pop('request_stats', None)
+        if stats is None or request.endpoint == 'metrics':
+            return response
+        duration = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'unmatched'
+
+        with self._lock:
+            self._endpoints[endpoint].observe(request.method, response.status_code, duration, stats)
+
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'db;desc="{stats.statements} statements";dur={stats.db_time * 1000:.1f}, '
+                f'app;dur={duration * 1000:.1f}'
+            )
+
+        if self.log_slow and self._over_budget(duration, stats):
+            current_app.logger.warning(
+                '慢请求 %s %s (%s): 耗时 %.1fms, SQL %d 条, 数据库 %.1fms, 最慢语句 %.1fms: %s',
+                request.method, request.path, endpoint, duration * 1000, stats.statements,
+                stats.db_time * 1000, stats.slowest_time * 1000,
+                (stats.slowest_statement or '')[:300]
+            )
+        return response
+
+    def _over_budget(self, duration, stats):
+        if self.latency_budget is not None and duration > self.latency_budget:
+            return True
+        return self.statement_budget is not None and stats.statements > self.statement_budget
+
+    def render(self):
+        """以 Prometheus 文本格式输出统计数据"""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            metric('quiz_http_requests_total', 'counter', '请求数')
+            for endpoint, stats in endpoints:
+                for (method, status), count in sorted(stats.requests.items()):
+                    lines.append(f'quiz_http_requests_total{{endpoint="{_label(endpoint)}",'
+                                 f'method="{method}",status="{status}"}} {count}')
+
+            metric('quiz_http_request_duration_seconds', 'histogram', '请求耗时')
+            for endpoint, stats in endpoints:
+                label = f'endpoint="{_label(endpoint)}"'
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(f'quiz_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'quiz_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f'quiz_http_request_duration_seconds_sum{{{label}}} {stats.duration_sum:.6f}')
+                lines.append(f'quiz_http_request_duration_seconds_count{{{label}}} {stats.count}')
+
+            metric('quiz_db_statements_total', 'counter', 'SQL语句数')
+            for endpoint, stats in endpoints:
+                lines.append(f'quiz_db_statements_total{{endpoint="{_label(endpoint)}"}} {stats.statements}')
+
+            metric('quiz_db_duration_seconds_total', 'counter', '数据库总耗时')
+            for endpoint, stats in endpoints:
+                lines.append(f'quiz_db_duration_seconds_total{{endpoint="{_label(endpoint)}"}} {stats.db_time:.6f}')
+
+            metric('quiz_db_slowest_statement_seconds', 'gauge', '单条SQL的最长耗时')
+            for endpoint, stats in endpoints:
+                lines.append(f'quiz_db_slowest_statement_seconds{{endpoint="{_label(endpoint)}"}} '
+                             f'{stats.slowest_statement:.6f}')
+
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+    def reset(self):
+        """清空累计统计"""
+        with self._lock:
+            self._endpoints.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 请求之外（命令行脚本、启动阶段）执行的SQL不计入统计
+    stats = g.get('request_stats') if has_app_context() else None
+    started = getattr(context, '_metrics_started', None)
+    if stats is not None and started is not None:
+        stats.add_statement(statement, time.perf_counter() - started)
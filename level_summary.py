@@ -0,0 +1,201 @@
+"""
+关卡成绩汇总模块
+提交答案时根据内存中的答题记录更新用户的关卡汇总和知识点汇总，
+关卡结果页只需读取汇总表；也可从 user_answer 全量重建汇总
+
+汇总行记录计算时题目包的摘要（题目、分值和知识点关联），题目包变化后或还没有汇总时，
+关卡结果页从 user_answer 重新计算并保存该用户该关的汇总
+
+用法:
+    python level_summary.py          # 重建所有用户的汇总
+"""
+
+import hashlib
+import json
+
+from models import (db, Question, UserAnswer, UserKnowledgePointSummary,
+                    UserLevelSummary, upsert)
+from question_cache import question_bundle_cache
+
+
+def summary_version(bundle):
+    """汇总所依赖的题目包内容的摘要：题目ID、分值和各题的知识点"""
+    fields = [[q['id'], q['score'] or 0, sorted(q['knowledge_point_ids'])] for q in bundle['questions']]
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()[:16]
+
+
+def summarize_level(user_id, bundle, answers):
+    """
+    根据关卡题目包和用户答题记录计算汇总行
+
+    参数:
+    - bundle: 关卡题目包
+    - answers: {题目ID: (是否正确, 得分)}，可包含其他关卡的题目
+
+    返回:
+    - (关卡汇总行, [知识点汇总行, ...])
+
+    答对的题目按题目包中当前的分值计分，题目分值调整后重新计算的汇总与结果页的总分一致
+    """
+    level_id = bundle['level']['id']
+    level_row = {
+        'user_id': user_id,
+        'level_id': level_id,
+        'answered_count': 0,
+        'correct_count': 0,
+        'score': 0,
+        'question_results': {},
+        'bundle_version': summary_version(bundle),
+    }
+    kp_rows = {}
+    for question in bundle['questions']:
+        for kp_id in question['knowledge_point_ids']:
+            kp_rows.setdefault(kp_id, {
+                'user_id': user_id,
+                'level_id': level_id,
+                'knowledge_point_id': kp_id,
+                'answered_count': 0,
+                'correct_count': 0,
+            })
+        if question['id'] not in answers:
+            continue
+        is_correct, _score = answers[question['id']]
+        level_row['answered_count'] += 1
+        level_row['correct_count'] += 1 if is_correct else 0
+        level_row['score'] += (question['score'] or 0) if is_correct else 0
+        level_row['question_results'][str(question['id'])] = bool(is_correct)
+        for kp_id in question['knowledge_point_ids']:
+            kp_rows[kp_id]['answered_count'] += 1
+            kp_rows[kp_id]['correct_count'] += 1 if is_correct else 0
+    return level_row, list(kp_rows.values())
+
+
+def save_summaries(level_rows, kp_rows):
+    """写入汇总行，已存在的汇总直接覆盖；不提交事务"""
+    upsert(UserLevelSummary, level_rows, ['user_id', 'level_id'],
+           update_columns=['answered_count', 'correct_count', 'score', 'question_results', 'bundle_version'],
+           extra_updates={'updated_at': db.func.now()})
+    upsert(UserKnowledgePointSummary, kp_rows, ['user_id', 'level_id', 'knowledge_point_id'],
+           update_columns=['answered_count', 'correct_count'],
+           extra_updates={'updated_at': db.func.now()})
+
+
+def refresh_level_summary(user_id, bundle, replace=False):
+    """
+    从 user_answer 重新计算用户在该关卡的汇总并保存，返回 (关卡汇总行, [知识点汇总行, ...])
+
+    replace 为True时先删除已有的旧汇总（题目包中已去掉的知识点不再保留汇总行）；
+    没有答题记录时不写入新的汇总
+    """
+    from answer_service import lock_user_answers
+
+    level_id = bundle['level']['id']
+    question_ids = [q['id'] for q in bundle['questions']]
+    # 与提交答案一样先锁定用户，读取答题记录和写入汇总之间不会有新的答案
+    lock_user_answers(user_id)
+    answers = {
+        row.question_id: (row.is_correct, row.score)
+        for row in db.session.query(
+            UserAnswer.question_id, UserAnswer.is_correct, UserAnswer.score
+        ).filter(UserAnswer.user_id == user_id, UserAnswer.question_id.in_(question_ids))
+    } if question_ids else {}
+    level_row, kp_rows = summarize_level(user_id, bundle, answers)
+    if replace:
+        UserKnowledgePointSummary.query.filter_by(user_id=user_id, level_id=level_id).delete(synchronize_session=False)
+        UserLevelSummary.query.filter_by(user_id=user_id, level_id=level_id).delete(synchronize_session=False)
+    if answers:
+        save_summaries([level_row], kp_rows)
+    db.session.commit()
+    return level_row, kp_rows
+
+
+def load_level_result(user_id, bundle):
+    """
+    读取关卡结果页所需的数据
+
+    汇总行和知识点汇总通过一条带索引的联表查询取出，题目和知识点名称来自题目包缓存；
+    还没有汇总或汇总基于旧的题目包时先重新计算
+    """
+    level_id = bundle['level']['id']
+    summary = UserLevelSummary.query.filter_by(user_id=user_id, level_id=level_id).first()
+    questions = bundle['questions']
+
+    if summary is not None and summary.bundle_version == summary_version(bundle):
+        score, correct_count = summary.score, summary.correct_count
+        results = {int(qid): correct for qid, correct in summary.question_results.items()}
+        kp_correct = {kp.knowledge_point_id: kp.correct_count for kp in summary.knowledge_points}
+    else:
+        level_row, kp_rows = refresh_level_summary(user_id, bundle, replace=summary is not None)
+        score, correct_count = level_row['score'], level_row['correct_count']
+        results = {int(qid): correct for qid, correct in level_row['question_results'].items()}
+        kp_correct = {row['knowledge_point_id']: row['correct_count'] for row in kp_rows}
+
+    # 知识点按题目顺序排列，题目总数来自题目包
+    knowledge_points = {}
+    for question in questions:
+        for kp_id in question['knowledge_point_ids']:
+            name = bundle['knowledge_points'][kp_id]
+            entry = knowledge_points.setdefault(name, {'total': 0, 'correct': 0, 'accuracy': 0})
+            entry['total'] += 1
+    for kp_id, correct in kp_correct.items():
+        name = bundle['knowledge_points'].get(kp_id)
+        if name in knowledge_points:
+            knowledge_points[name]['correct'] += correct
+    for entry in knowledge_points.values():
+        entry['accuracy'] = entry['correct'] / entry['total'] * 100 if entry['total'] else 0
+
+    return {
+        'questions': questions,
+        'results': results,
+        'total_score': sum(q['score'] or 0 for q in questions),
+        'user_score': score,
+        'accuracy': correct_count / len(questions) * 100 if questions else 0,
+        'knowledge_points': knowledge_points,
+    }
+
+
+def rebuild_summaries(chunk_size=500):
+    """
+    从 user_answer 全量重建汇总表
+
+    按用户分批读取答题记录，每批删除旧汇总后重新写入并提交
+
+    返回:
+    - 写入的关卡汇总行数
+    """
+    user_ids = [row.user_id for row in db.session.query(UserAnswer.user_id).distinct().order_by(UserAnswer.user_id)]
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        answers = {}
+        for user_id, question_id, level_id, is_correct, score in db.session.query(
+            UserAnswer.user_id, UserAnswer.question_id, Question.level_id,
+            UserAnswer.is_correct, UserAnswer.score
+        ).join(Question, Question.id == UserAnswer.question_id).filter(UserAnswer.user_id.in_(chunk)):
+            answers.setdefault((user_id, level_id), {})[question_id] = (is_correct, score)
+
+        level_rows, kp_rows = [], []
+        for (user_id, level_id), level_answers in answers.items():
+            bundle = question_bundle_cache.get(level_id)
+            if bundle is None:
+                continue
+            level_row, level_kp_rows = summarize_level(user_id, bundle, level_answers)
+            level_rows.append(level_row)
+            kp_rows.extend(level_kp_rows)
+
+        UserKnowledgePointSummary.query.filter(
+            UserKnowledgePointSummary.user_id.in_(chunk)).delete(synchronize_session=False)
+        UserLevelSummary.query.filter(
+            UserLevelSummary.user_id.in_(chunk)).delete(synchronize_session=False)
+        save_summaries(level_rows, kp_rows)
+        db.session.commit()
+        written += len(level_rows)
+        print(f"已处理 {min(start + chunk_size, len(user_ids))}/{len(user_ids)} 个用户")
+    return written
+
+
+if __name__ == '__main__':
+    from app import app
+    with app.app_context():
+        count = rebuild_summaries()
+        print(f"汇总重建完成，共写入 {count} 条关卡汇总")
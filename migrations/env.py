@@ -1,6 +1,8 @@
 import logging
+from contextlib import contextmanager
 from logging.config import fileConfig
 
+import sqlalchemy as sa
 from flask import current_app
 
 from alembic import context
@@ -51,6 +53,28 @@ def get_metadata():
     return target_db.metadata
 
 
+def _emulate_unnamed_enum(column, table):
+    if isinstance(column.type, sa.Enum) and column.type.name is None:
+        column.type.native_enum = False
+
+
+@contextmanager
+def unnamed_enums_as_varchar(dialect_name):
+    """
+    PostgreSQL 的枚举必须是有名称的独立类型，已发布的迁移 6eecc756c6ee 中
+    user_progress.status 使用了未命名的 sa.Enum，在 PostgreSQL 上无法建表。
+    迁移期间把未命名的枚举按 VARCHAR 建出，之后由 9d4f1b7e2c63 转换为 progress_status 类型
+    """
+    if dialect_name != 'postgresql':
+        yield
+        return
+    sa.event.listen(sa.Column, 'before_parent_attach', _emulate_unnamed_enum)
+    try:
+        yield
+    finally:
+        sa.event.remove(sa.Column, 'before_parent_attach', _emulate_unnamed_enum)
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -68,7 +92,7 @@ def run_migrations_offline():
         url=url, target_metadata=get_metadata(), literal_binds=True
     )
 
-    with context.begin_transaction():
+    with context.begin_transaction(), unnamed_enums_as_varchar(sa.engine.make_url(url).get_backend_name()):
         context.run_migrations()
 
 
@@ -103,7 +127,7 @@ def run_migrations_online():
             **conf_args
         )
 
-        with context.begin_transaction():
+        with context.begin_transaction(), unnamed_enums_as_varchar(connection.dialect.name):
             context.run_migrations()
 
 
@@ -0,0 +1,28 @@
+"""Record the question bundle version with each level summary
+
+Revision ID: 2d6f8a4c1e57
+Revises: 7e3b5d1a9c42
+Create Date: 2026-10-18 21:48:03.551297
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d6f8a4c1e57'
+down_revision = '7e3b5d1a9c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已有汇总的 bundle_version 为空，关卡结果页第一次读取时按当前题目包重新计算；
+    # 升级前没有汇总的用户同样在第一次读取时从答题记录补齐，无需手动重建
+    with op.batch_alter_table('user_level_summary', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bundle_version', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_level_summary', schema=None) as batch_op:
+        batch_op.drop_column('bundle_version')
@@ -0,0 +1,26 @@
+"""Prune placeholder locked UserProgress rows
+
+Revision ID: 3f5a9c2e7b14
+Revises: d97e9a341b3c
+Create Date: 2026-10-18 10:12:40.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f5a9c2e7b14'
+down_revision = 'd97e9a341b3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 进度改为稀疏存储：'locked' 记录不携带任何信息，状态由课程结构推导
+    op.execute("DELETE FROM user_progress WHERE status = 'locked' OR status IS NULL")
+
+
+def downgrade():
+    # 被删除的占位记录可由课程结构重新推导，无需恢复
+    pass
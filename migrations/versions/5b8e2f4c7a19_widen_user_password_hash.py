@@ -0,0 +1,33 @@
+"""Widen user.password to fit scrypt hashes
+
+Revision ID: 5b8e2f4c7a19
+Revises: a064a3227634
+Create Date: 2026-10-18 16:21:45.207331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f4c7a19'
+down_revision = 'a064a3227634'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Werkzeug 默认的 scrypt 哈希约162个字符，超出原来的120
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=120),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=120),
+               existing_nullable=False)
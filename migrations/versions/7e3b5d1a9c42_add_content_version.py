@@ -0,0 +1,29 @@
+"""Add the content_version change counter
+
+Revision ID: 7e3b5d1a9c42
+Revises: 9d4f1b7e2c63
+Create Date: 2026-10-18 21:10:44.302118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e3b5d1a9c42'
+down_revision = '9d4f1b7e2c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    content_version = op.create_table('content_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(content_version, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('content_version')
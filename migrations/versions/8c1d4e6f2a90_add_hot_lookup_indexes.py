@@ -0,0 +1,60 @@
+"""Add composite indexes and unique constraints for hot lookups
+
+Revision ID: 8c1d4e6f2a90
+Revises: 3f5a9c2e7b14
+Create Date: 2026-10-18 11:03:27.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d4e6f2a90'
+down_revision = '3f5a9c2e7b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 建唯一约束前先清理重复记录：答题记录保留最新一条，进度优先保留已完成的记录
+    op.execute("""
+        DELETE FROM user_answer WHERE id NOT IN (
+            SELECT MAX(id) FROM user_answer GROUP BY user_id, question_id
+        )
+    """)
+    op.execute("""
+        DELETE FROM user_progress WHERE status != 'completed' AND EXISTS (
+            SELECT 1 FROM user_progress AS p
+            WHERE p.user_id = user_progress.user_id
+              AND p.level_id = user_progress.level_id
+              AND p.status = 'completed'
+        )
+    """)
+    op.execute("""
+        DELETE FROM user_progress WHERE id NOT IN (
+            SELECT MAX(id) FROM user_progress GROUP BY user_id, level_id
+        )
+    """)
+
+    with op.batch_alter_table('user_answer', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_answer_user_question', ['user_id', 'question_id'])
+
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_progress_user_level', ['user_id', 'level_id'])
+
+    op.create_index('ix_question_level_order', 'question', ['level_id', 'order'], unique=False)
+    op.create_index('ix_level_unit_order', 'level', ['unit_id', 'order'], unique=False)
+    op.create_index('ix_unit_course_order', 'unit', ['course_id', 'order'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_unit_course_order', table_name='unit')
+    op.drop_index('ix_level_unit_order', table_name='level')
+    op.drop_index('ix_question_level_order', table_name='question')
+
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_progress_user_level', type_='unique')
+
+    with op.batch_alter_table('user_answer', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_answer_user_question', type_='unique')
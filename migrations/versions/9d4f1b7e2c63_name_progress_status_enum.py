@@ -0,0 +1,44 @@
+"""Name the user_progress.status enum type
+
+Revision ID: 9d4f1b7e2c63
+Revises: c3e8a1f05d27
+Create Date: 2026-10-18 19:02:37.114520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f1b7e2c63'
+down_revision = 'c3e8a1f05d27'
+branch_labels = None
+depends_on = None
+
+progress_status = sa.Enum('locked', 'unlocked', 'completed', name='progress_status')
+
+
+def upgrade():
+    # SQLite 中枚举以 VARCHAR 存储，类型名称不影响表结构；
+    # PostgreSQL 的枚举必须是有名称的独立类型，原先未命名时 status 列只能以文本类型建出，这里改为 progress_status
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    progress_status.create(bind, checkfirst=True)
+    op.alter_column('user_progress', 'status',
+               existing_type=sa.String(length=9),
+               type_=progress_status,
+               existing_nullable=True,
+               postgresql_using='status::text::progress_status')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.alter_column('user_progress', 'status',
+               existing_type=progress_status,
+               type_=sa.String(length=9),
+               existing_nullable=True,
+               postgresql_using='status::text')
+    progress_status.drop(bind, checkfirst=True)
@@ -0,0 +1,58 @@
+"""Add per-level and per-knowledge-point result summaries
+
+Revision ID: a064a3227634
+Revises: e4a7b91c3d58
+Create Date: 2026-10-18 14:32:10.418255
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a064a3227634'
+down_revision = 'e4a7b91c3d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 建表后需运行 python level_summary.py 从已有答题记录回填汇总
+    op.create_table('user_level_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('level_id', sa.Integer(), nullable=False),
+    sa.Column('answered_count', sa.Integer(), nullable=False),
+    sa.Column('correct_count', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('question_results', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['level_id'], ['level.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'level_id', name='uq_user_level_summary_user_level')
+    )
+    op.create_table('user_knowledge_point_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('level_id', sa.Integer(), nullable=False),
+    sa.Column('knowledge_point_id', sa.Integer(), nullable=False),
+    sa.Column('answered_count', sa.Integer(), nullable=False),
+    sa.Column('correct_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['knowledge_point_id'], ['knowledge_point.id'], ),
+    sa.ForeignKeyConstraint(['level_id'], ['level.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'level_id', 'knowledge_point_id', name='uq_user_kp_summary_user_level_kp')
+    )
+    with op.batch_alter_table('user_knowledge_point_summary', schema=None) as batch_op:
+        batch_op.create_index('ix_user_kp_summary_user_kp', ['user_id', 'knowledge_point_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_knowledge_point_summary', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_kp_summary_user_kp')
+
+    op.drop_table('user_knowledge_point_summary')
+    op.drop_table('user_level_summary')
@@ -0,0 +1,60 @@
+"""Store question options, answers and user answers as JSON columns
+
+Revision ID: b27e0d5c9f31
+Revises: 8c1d4e6f2a90
+Create Date: 2026-10-18 11:48:09.551274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b27e0d5c9f31'
+down_revision = '8c1d4e6f2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 原有数据本身就是 json.dumps 生成的文本：SQLite 中 JSON 列仍以文本存储，无需转换；
+    # PostgreSQL 中通过 USING 将文本解析为 json
+    with op.batch_alter_table('multiple_choice_question', schema=None) as batch_op:
+        batch_op.alter_column('options',
+               existing_type=sa.Text(),
+               type_=sa.JSON(),
+               existing_nullable=False,
+               postgresql_using='options::json')
+        batch_op.alter_column('correct_answer',
+               existing_type=sa.Text(),
+               type_=sa.JSON(),
+               existing_nullable=False,
+               postgresql_using='correct_answer::json')
+
+    with op.batch_alter_table('user_answer', schema=None) as batch_op:
+        batch_op.alter_column('answer_content',
+               existing_type=sa.Text(),
+               type_=sa.JSON(),
+               existing_nullable=False,
+               postgresql_using='answer_content::json')
+
+
+def downgrade():
+    with op.batch_alter_table('user_answer', schema=None) as batch_op:
+        batch_op.alter_column('answer_content',
+               existing_type=sa.JSON(),
+               type_=sa.Text(),
+               existing_nullable=False,
+               postgresql_using='answer_content::text')
+
+    with op.batch_alter_table('multiple_choice_question', schema=None) as batch_op:
+        batch_op.alter_column('correct_answer',
+               existing_type=sa.JSON(),
+               type_=sa.Text(),
+               existing_nullable=False,
+               postgresql_using='correct_answer::text')
+        batch_op.alter_column('options',
+               existing_type=sa.JSON(),
+               type_=sa.Text(),
+               existing_nullable=False,
+               postgresql_using='options::text')
@@ -0,0 +1,29 @@
+"""Add question.external_id for idempotent question bank imports
+
+Revision ID: c3e8a1f05d27
+Revises: 5b8e2f4c7a19
+Create Date: 2026-10-18 17:05:12.418263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a1f05d27'
+down_revision = '5b8e2f4c7a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已有题目的 external_id 为空，唯一约束不限制多个空值
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('external_id', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_question_external_id', ['external_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_question_external_id', type_='unique')
+        batch_op.drop_column('external_id')
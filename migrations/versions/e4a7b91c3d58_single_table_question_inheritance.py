@@ -0,0 +1,99 @@
+"""Move question subtypes into a single question table
+
+Revision ID: e4a7b91c3d58
+Revises: b27e0d5c9f31
+Create Date: 2026-10-18 13:20:51.734016
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7b91c3d58'
+down_revision = 'b27e0d5c9f31'
+branch_labels = None
+depends_on = None
+
+
+def _json_bool(dialect, column):
+    """布尔列转为 JSON 的 true/false"""
+    if dialect == 'postgresql':
+        return f"to_json({column})"
+    return f"CASE WHEN {column} THEN 'true' ELSE 'false' END"
+
+
+def upgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('correct_answer', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('explanation', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('options', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('blanks_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('hint', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('left_items', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('right_items', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('correct_matches', sa.JSON(), nullable=True))
+
+    # 把子表中的数据搬到 question 表
+    op.execute("""
+        UPDATE question SET
+            options = (SELECT mc.options FROM multiple_choice_question mc WHERE mc.id = question.id),
+            correct_answer = (SELECT mc.correct_answer FROM multiple_choice_question mc WHERE mc.id = question.id),
+            explanation = (SELECT mc.explanation FROM multiple_choice_question mc WHERE mc.id = question.id)
+        WHERE id IN (SELECT id FROM multiple_choice_question)
+    """)
+    dialect = op.get_bind().dialect.name
+    op.execute(f"""
+        UPDATE question SET
+            correct_answer = (SELECT {_json_bool(dialect, 'tf.correct_answer')}
+                              FROM true_false_question tf WHERE tf.id = question.id),
+            explanation = (SELECT tf.explanation FROM true_false_question tf WHERE tf.id = question.id)
+        WHERE id IN (SELECT id FROM true_false_question)
+    """)
+
+    op.drop_table('multiple_choice_question')
+    op.drop_table('true_false_question')
+
+
+def downgrade():
+    op.create_table('true_false_question',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('correct_answer', sa.Boolean(), nullable=False),
+    sa.Column('explanation', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['id'], ['question.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('multiple_choice_question',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('options', sa.JSON(), nullable=False),
+    sa.Column('correct_answer', sa.JSON(), nullable=False),
+    sa.Column('explanation', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['id'], ['question.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute("""
+        INSERT INTO multiple_choice_question (id, options, correct_answer, explanation)
+        SELECT id, options, correct_answer, explanation FROM question
+        WHERE question_type = 'multiple_choice'
+    """)
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        truthy = "(correct_answer::text = 'true')"
+    else:
+        truthy = "(correct_answer = 'true')"
+    op.execute(f"""
+        INSERT INTO true_false_question (id, correct_answer, explanation)
+        SELECT id, {truthy}, explanation FROM question
+        WHERE question_type = 'true_false'
+    """)
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_column('correct_matches')
+        batch_op.drop_column('right_items')
+        batch_op.drop_column('left_items')
+        batch_op.drop_column('hint')
+        batch_op.drop_column('blanks_count')
+        batch_op.drop_column('options')
+        batch_op.drop_column('explanation')
+        batch_op.drop_column('correct_answer')
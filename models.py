@@ -1,14 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-import json
 
 db = SQLAlchemy()
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
+    # scrypt 哈希约162个字符
+    password = db.Column(db.String(255), nullable=False)
     last_grade = db.Column(db.String(20))
     last_course = db.Column(db.String(40))
 
@@ -34,14 +34,18 @@ class Course(db.Model):
     grade = db.Column(db.String(20), nullable=False)
     subject = db.Column(db.String(20), nullable=False)
     term = db.Column(db.String(20), nullable=False)
-    units = db.relationship('Unit', backref='course', lazy=True)
+    units = db.relationship('Unit', backref='course', lazy=True, order_by='Unit.order')
 
 class Unit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     name = db.Column(db.String(50), nullable=False)
     order = db.Column(db.Integer, nullable=False)
-    levels = db.relationship('Level', backref='unit', lazy=True)
+    levels = db.relationship('Level', backref='unit', lazy=True, order_by='Level.order')
+
+    __table_args__ = (
+        db.Index('ix_unit_course_order', 'course_id', 'order'),
+    )
 
 class Level(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -53,24 +57,44 @@ class Level(db.Model):
     is_final = db.Column(db.Boolean, default=False)
     order = db.Column(db.Integer, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_level_unit_order', 'unit_id', 'order'),
+    )
+
 class UserProgress(db.Model):
+    """用户关卡进度，只保存已解锁和已完成的关卡，锁定状态在读取时推导"""
     __tablename__ = 'user_progress'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     level_id = db.Column(db.Integer, db.ForeignKey('level.id'), nullable=False)
-    status = db.Column(db.Enum('locked', 'unlocked', 'completed'), default='locked')
+    # PostgreSQL 的枚举是独立的数据库类型，必须有名称
+    status = db.Column(db.Enum('locked', 'unlocked', 'completed', name='progress_status'), default='locked')
     updated_at = db.Column(db.DateTime, default=db.func.now())
 
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'level_id', name='uq_user_progress_user_level'),
+    )
+
 # 新增题目相关模型
 class Question(db.Model):
-    """核心题目表"""
+    """
+    核心题目表
+
+    各题型采用单表继承，所有题型的字段都在 question 表中，
+    加载一关的题目只需一条查询，新增题型也无需新建关联表
+    """
     id = db.Column(db.Integer, primary_key=True)
     level_id = db.Column(db.Integer, db.ForeignKey('level.id'), nullable=False)
-    question_type = db.Column(db.String(50), nullable=False)  # 'multiple_choice', 'true_false'
+    # 题库中的题目编号，批量导入时按此更新已有题目；手工创建的题目为空
+    external_id = db.Column(db.String(64))
+    question_type = db.Column(db.String(50), nullable=False)  # 'multiple_choice', 'true_false', 'fill_blank', 'matching'
     content = db.Column(db.Text, nullable=False)  # 题目内容/题干
     difficulty = db.Column(db.Integer, default=1)  # 难度级别 1-5
     score = db.Column(db.Integer, default=1)  # 分值
     order = db.Column(db.Integer, default=0)  # 题目排序
+    # JSON列在加载时解码一次，之后的属性访问不再重复 json.loads
+    correct_answer = db.Column(db.JSON)  # 正确答案，各题型格式不同
+    explanation = db.Column(db.Text)  # 解析
     created_at = db.Column(db.DateTime, default=db.func.now())
     updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
     
@@ -82,50 +106,52 @@ class Question(db.Model):
         'polymorphic_on': question_type,
         'polymorphic_identity': 'question'
     }
+    
+    __table_args__ = (
+        db.Index('ix_question_level_order', 'level_id', 'order'),
+        db.UniqueConstraint('external_id', name='uq_question_external_id'),
+    )
 
 class MultipleChoiceQuestion(Question):
-    """选择题表"""
-    id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
-    _options = db.Column('options', db.Text, nullable=False)  # JSON格式存储选项
-    _correct_answer = db.Column('correct_answer', db.Text, nullable=False)  # 正确答案，可能是单个或多个
-    explanation = db.Column(db.Text)  # 解析
+    """选择题：correct_answer 为选项编号列表，如 ["A"]"""
+    options = db.Column(db.JSON)  # 选项列表
     
     __mapper_args__ = {
         'polymorphic_identity': 'multiple_choice',
     }
-    
-    @property
-    def options(self):
-        return json.loads(self._options)
-    
-    @options.setter
-    def options(self, value):
-        self._options = json.dumps(value)
-    
-    @property
-    def correct_answer(self):
-        return json.loads(self._correct_answer)
-    
-    @correct_answer.setter
-    def correct_answer(self, value):
-        self._correct_answer = json.dumps(value)
 
 class TrueFalseQuestion(Question):
-    """判断题表"""
-    id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
-    correct_answer = db.Column(db.Boolean, nullable=False)  # 正确答案
-    explanation = db.Column(db.Text)  # 解析
+    """判断题：correct_answer 为 true/false"""
     
     __mapper_args__ = {
         'polymorphic_identity': 'true_false',
     }
 
+class FillBlankQuestion(Question):
+    """填空题：correct_answer 为答案（或每个空的答案列表）"""
+    blanks_count = db.Column(db.Integer)  # 填空个数
+    hint = db.Column(db.Text)  # 提示
+    
+    __mapper_args__ = {
+        'polymorphic_identity': 'fill_blank',
+    }
+
+class MatchingQuestion(Question):
+    """连线题"""
+    left_items = db.Column(db.JSON)  # 左侧项目
+    right_items = db.Column(db.JSON)  # 右侧项目
+    correct_matches = db.Column(db.JSON)  # 正确连线 [{"left": .., "right": ..}]
+    
+    __mapper_args__ = {
+        'polymorphic_identity': 'matching',
+    }
+
 class UserAnswer(db.Model):
     """用户答题记录表"""
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
-    _answer_content = db.Column('answer_content', db.Text, nullable=False)  # JSON格式存储用户答案
+    answer_content = db.Column('answer_content', db.JSON, nullable=False)  # 用户答案
     is_correct = db.Column(db.Boolean, nullable=False)
     score = db.Column(db.Integer, nullable=False)
     attempt_time = db.Column(db.DateTime, default=db.func.now())
@@ -135,13 +161,9 @@ class UserAnswer(db.Model):
     user = db.relationship('User', backref=db.backref('answers', lazy=True))
     question = db.relationship('Question', backref=db.backref('user_answers', lazy=True))
     
-    @property
-    def answer_content(self):
-        return json.loads(self._answer_content)
-    
-    @answer_content.setter
-    def answer_content(self, value):
-        self._answer_content = json.dumps(value)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'question_id', name='uq_user_answer_user_question'),
+    )
 
 class KnowledgePoint(db.Model):
     """知识点表"""
@@ -158,4 +180,143 @@ class QuestionKnowledgePoint(db.Model):
     __tablename__ = 'question_knowledge_point'
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
-    knowledge_point_id = db.Column(db.Integer, db.ForeignKey('knowledge_point.id'), nullable=False)
\ No newline at end of file
+    knowledge_point_id = db.Column(db.Integer, db.ForeignKey('knowledge_point.id'), nullable=False)
+
+class ContentVersion(db.Model):
+    """
+    课程内容的修改计数（只有一行）
+
+    课程、单元、关卡、题目和知识点的每次写入都在同一事务中加一，
+    各进程每隔一段时间读取这一行，计数变化后才重新核对各关卡的版本戳
+    """
+    __tablename__ = 'content_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class UserLevelSummary(db.Model):
+    """用户关卡成绩汇总，提交答案时更新，关卡结果页直接读取"""
+    __tablename__ = 'user_level_summary'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    level_id = db.Column(db.Integer, db.ForeignKey('level.id'), nullable=False)
+    answered_count = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    score = db.Column(db.Integer, nullable=False, default=0)
+    question_results = db.Column(db.JSON, nullable=False, default=dict)  # {题目ID: 是否正确}
+    # 计算汇总时题目包的摘要（level_summary.summary_version），与当前题目包不符时重新计算
+    bundle_version = db.Column(db.String(16))
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    knowledge_points = db.relationship(
+        'UserKnowledgePointSummary',
+        primaryjoin='and_(UserLevelSummary.user_id == foreign(UserKnowledgePointSummary.user_id), '
+                    'UserLevelSummary.level_id == foreign(UserKnowledgePointSummary.level_id))',
+        viewonly=True, lazy='joined'
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'level_id', name='uq_user_level_summary_user_level'),
+    )
+
+class UserKnowledgePointSummary(db.Model):
+    """用户在某关卡中各知识点的答题汇总"""
+    __tablename__ = 'user_knowledge_point_summary'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    level_id = db.Column(db.Integer, db.ForeignKey('level.id'), nullable=False)
+    knowledge_point_id = db.Column(db.Integer, db.ForeignKey('knowledge_point.id'), nullable=False)
+    answered_count = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'level_id', 'knowledge_point_id',
+                            name='uq_user_kp_summary_user_level_kp'),
+        # 按用户汇总各知识点掌握情况
+        db.Index('ix_user_kp_summary_user_kp', 'user_id', 'knowledge_point_id'),
+    )
+
+
+def upsert(model, rows, index_elements, update_columns=None, extra_updates=None):
+    """
+    批量 INSERT ... ON CONFLICT 写入，PostgreSQL 和 SQLite 以外的数据库改为先查询再分别更新和插入
+
+    参数:
+    - model: 模型类
+    - rows: [{列名: 值}, ...]，键为数据库列名
+    - index_elements: 冲突判断使用的唯一约束列
+    - update_columns: 冲突时用新值覆盖的列；为空时冲突行保持不变 (DO NOTHING)
+    - extra_updates: 冲突时额外更新的 {列名: SQL表达式}，如 {'updated_at': db.func.now()}
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        _upsert_portable(model.__table__, rows, index_elements, update_columns, extra_updates)
+        return
+
+    stmt = insert(model.__table__)
+    if update_columns:
+        set_ = {column: stmt.excluded[column] for column in update_columns}
+        set_.update(extra_updates or {})
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+    db.session.execute(stmt, rows)
+
+
+def _upsert_portable(table, rows, index_elements, update_columns, extra_updates):
+    """
+    不支持 ON CONFLICT 的数据库：在当前事务中先查出已存在的行，再分别批量 UPDATE 和 INSERT
+
+    与 ON CONFLICT 不同，查询和写入之间其他事务插入了同一行时，INSERT 会因唯一约束失败
+    """
+    # 同一批中唯一键重复时以最后一条为准
+    by_key = {tuple(row[column] for column in index_elements): row for row in rows}
+    key_columns = [table.c[column] for column in index_elements]
+    existing = set()
+    keys = list(by_key)
+    for start in range(0, len(keys), 500):
+        condition = db.or_(*(
+            db.and_(*(column == value for column, value in zip(key_columns, key)))
+            for key in keys[start:start + 500]
+        ))
+        existing.update(tuple(row) for row in db.session.execute(db.select(*key_columns).where(condition)))
+
+    new_rows = [row for key, row in by_key.items() if key not in existing]
+    if new_rows:
+        db.session.execute(table.insert(), new_rows)
+    if existing and update_columns:
+        # 绑定参数不能与 SET 中的列同名，加上前缀区分
+        values = {column: db.bindparam(f'new_{column}') for column in update_columns}
+        values.update(extra_updates or {})
+        stmt = table.update().where(*(
+            column == db.bindparam(f'key_{column.name}') for column in key_columns
+        )).values(values)
+        db.session.execute(stmt, [
+            {**{f'key_{column}': by_key[key][column] for column in index_elements},
+             **{f'new_{column}': by_key[key][column] for column in update_columns}}
+            for key in existing
+        ])
+
+
+def bump_content_version(connection):
+    """
+    在当前事务中把课程内容修改计数加一
+
+    ORM 写入由 content_pack 中的 after_flush 钩子调用；不经过 ORM 的批量写入（如题库导入）需要直接调用
+    """
+    table = ContentVersion.__table__
+    result = connection.execute(table.update().where(table.c.id == 1).values(version=table.c.version + 1))
+    if not result.rowcount:
+        # 用 create_all 建表的数据库还没有这一行
+        connection.execute(table.insert().values(id=1, version=1))
+
+
+def content_version():
+    """当前的课程内容修改计数"""
+    return db.session.scalar(db.select(ContentVersion.version).where(ContentVersion.id == 1)) or 0
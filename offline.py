@@ -0,0 +1,49 @@
+"""
+离线模式路由
+提供根路径下的 Service Worker 脚本（作用域覆盖整个站点）和断网时显示的离线页面
+"""
+
+import hashlib
+
+from flask import make_response, render_template, url_for
+
+from assets import BUNDLE_DIR, static_assets
+
+# 安装 Service Worker 时预缓存的静态资源类型
+PRECACHE_EXTENSIONS = ('.css', '.js', '.json')
+
+
+def register_offline_routes(app):
+    @app.route('/service-worker.js')
+    def service_worker():
+        """
+        渲染 Service Worker 脚本
+
+        预缓存列表使用带内容哈希的地址，静态资源变化时脚本内容和缓存版本随之变化
+        """
+        precache_urls = [
+            url_for('static', filename=filename)
+            for filename in static_assets.filenames()
+            if filename.endswith(PRECACHE_EXTENSIONS)
+            and (static_assets.bundle_js or not filename.startswith(BUNDLE_DIR + '/'))
+        ]
+        offline_url = url_for('offline_page')
+        version = hashlib.md5('|'.join(precache_urls + [offline_url]).encode()).hexdigest()[:12]
+
+        response = make_response(render_template(
+            'service_worker.js',
+            version=version,
+            precache_urls=precache_urls,
+            offline_url=offline_url,
+            replay_url=url_for('submit_answers_batch'),
+            immutable_static=static_assets.enabled,
+        ))
+        response.mimetype = 'application/javascript'
+        # 脚本本身不能长期缓存，否则浏览器发现不了新版本
+        response.cache_control.no_cache = True
+        return response
+
+    @app.route('/offline')
+    def offline_page():
+        """断网且页面未缓存时显示"""
+        return render_template('offline.html')
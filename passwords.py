@@ -0,0 +1,141 @@
+"""
+密码哈希模块
+密码哈希和校验是CPU密集的操作，放到独立的进程池中执行，不阻塞处理请求的 worker
+
+- 同时等待的哈希任务数有上限，超出时抛出 PasswordHasherBusy，由调用方返回“请稍后再试”
+- 登录校验通过后，若已保存的哈希与当前配置的算法参数不同，顺便生成新哈希用于升级
+- PASSWORD_HASH_WORKERS 为 0 时在当前线程中直接计算（同步 worker、开发和测试时使用）
+
+进程池只在一个 worker 同时处理多个请求（ASGI 模式或多线程 worker）时有用：计算哈希期间同一 worker
+的其他请求照常执行，等待哈希的请求数也有上限。同步 worker 每次只处理一个请求，请求线程反正要等哈希结果，
+进程池只会多出进程间通信的开销
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """等待哈希的任务过多"""
+
+
+def _hash_method(stored_hash):
+    """返回哈希字符串中的算法和参数部分，如 scrypt:32768:8:1"""
+    return stored_hash.split('$', 1)[0]
+
+
+def _verify(stored_hash, password, method, method_prefix):
+    """在进程池中执行：校验密码，需要升级时同时返回新哈希"""
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if _hash_method(stored_hash) != method_prefix:
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+class PasswordHasher:
+    """
+    进程池中的密码哈希
+
+    进程池在第一次使用时创建，应用在 gunicorn 主进程中加载时不会把进程池带到 fork 出的 worker 里
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_pending=8, timeout=5):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._method_prefix = None
+        self._executor = None
+        self._executor_pid = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取哈希算法和进程池参数"""
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._method_prefix = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    @property
+    def method_prefix(self):
+        """当前配置生成的哈希前缀，如 method='scrypt' 对应 scrypt:32768:8:1"""
+        if self._method_prefix is None:
+            self._method_prefix = _hash_method(generate_password_hash('', method=self.method))
+        return self._method_prefix
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                # 不能用 fork：worker 是多线程的，fork 时其他线程持有的锁（日志、连接池等）会被原样复制到子进程，
+                # 子进程可能永远等不到释放。forkserver/spawn 的子进程重新导入本模块，只需要 _hash/_verify；
+                # 启动脚本会在子进程中重新导入，自行创建进程池的脚本需要 __main__ 保护
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy()
+        try:
+            try:
+                return self._get_executor().submit(fn, *args).result()
+            except BrokenProcessPool:
+                # 子进程异常退出（如被 OOM killer 杀掉）后进程池不可再用，重建后重试一次
+                self._discard_executor()
+                return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """生成密码哈希"""
+        return self._run(_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """
+        校验密码
+
+        返回:
+        - (是否正确, 新哈希)；已保存的哈希使用旧的算法参数时返回新哈希，否则为None
+        """
+        return self._run(_verify, stored_hash, password, self.method, self.method_prefix)
+
+    def hash_many(self, passwords, chunksize=16):
+        """
+        批量生成密码哈希，按输入顺序返回
+
+        用于批量导入账号，进程池的全部进程并行计算，不受 max_pending 限制
+        """
+        if not self.workers:
+            return [_hash(password, self.method) for password in passwords]
+        executor = self._get_executor()
+        return list(executor.map(_hash, passwords, [self.method] * len(passwords), chunksize=chunksize))
+
+    def _discard_executor(self):
+        with self._lock:
+            self._executor = None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,369 @@
+"""
+题库批量导入
+从 JSON Lines 或 CSV 文件流式读取题目，按题型处理器校验后分批写入；
+题目按 external_id 插入或更新，重复导入同一个文件结果不变
+
+每道题的字段:
+- external_id: 题库中的题目编号（必填，最长64个字符）
+- 所属关卡: level_id，或 grade、subject、term、unit、level（年级、学科、学期、单元名、关卡标题）
+- question_type: multiple_choice、true_false、fill_blank 或 matching
+- content、correct_answer、difficulty、score、order、explanation
+- 题型专有字段: options；blanks_count、hint；left_items、right_items、correct_matches
+- knowledge_points: 知识点名称列表（JSONL 中也可以是 {"name": .., "category": ..}，CSV 中用 | 分隔），
+  不存在的知识点自动创建
+
+CSV 中 options、correct_answer 等结构化字段填写 JSON 文本；填空题的 correct_answer 也可以直接填写答案
+
+用法:
+    python question_bank.py bank.jsonl
+    python question_bank.py bank.csv --chunk-size 2000 --dry-run
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import delete, insert
+
+from models import db, Course, KnowledgePoint, Level, Question, QuestionKnowledgePoint, Unit, bump_content_version, upsert
+from question_cache import question_bundle_cache
+from question_handlers import QuestionHandlerFactory
+
+EXTERNAL_ID_MAX_LENGTH = 64
+KNOWLEDGE_POINT_NAME_MAX_LENGTH = 100
+# 按路径查找关卡时使用的字段
+LEVEL_PATH_FIELDS = ('grade', 'subject', 'term', 'unit', 'level')
+# CSV 中以 JSON 文本填写的列和整数列
+JSON_FIELDS = ('options', 'correct_answer', 'left_items', 'right_items', 'correct_matches')
+INT_FIELDS = ('level_id', 'difficulty', 'score', 'order', 'blanks_count')
+# 各题型专有列的并集，写入时不属于本题型的列置空
+TYPE_FIELDS = tuple(dict.fromkeys(
+    field for handler in QuestionHandlerFactory.handlers.values() for field in handler.definition_fields
+))
+
+
+class QuestionBankError(ValueError):
+    """题库文件格式错误"""
+
+
+def read_jsonl(stream):
+    """
+    逐行读取 JSON Lines 题库
+
+    返回:
+    - 生成 (行号, 题目记录, 错误信息)，解析失败时记录为None
+    """
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f'JSON 格式错误: {e.msg}'
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, '每行应为一个 JSON 对象'
+            continue
+        yield line_no, record, None
+
+
+def read_csv(stream):
+    """
+    逐行读取 CSV 题库，空单元格视为未填写
+
+    返回:
+    - 生成 (行号, 题目记录, 错误信息)，解析失败时记录为None
+    """
+    reader = csv.DictReader(stream)
+    missing = {'external_id', 'question_type', 'content'} - set(reader.fieldnames or [])
+    if missing:
+        raise QuestionBankError(f"缺少列: {', '.join(sorted(missing))}")
+
+    for line_no, row in enumerate(reader, start=2):
+        record = {}
+        error = None
+        for key, value in row.items():
+            # 多出表头的单元格键为None
+            if key is None or value is None:
+                continue
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                if key in JSON_FIELDS:
+                    try:
+                        value = json.loads(value)
+                    except json.JSONDecodeError:
+                        if key != 'correct_answer':
+                            raise
+                elif key in INT_FIELDS:
+                    value = int(value)
+                elif key == 'knowledge_points':
+                    value = [name.strip() for name in value.split('|') if name.strip()]
+            except ValueError:
+                error = f'{key} 列格式错误'
+                break
+            record[key] = value
+        if error:
+            yield line_no, None, error
+        else:
+            yield line_no, record, None
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+class LevelLookup:
+    """
+    关卡查找：按关卡ID或 (年级, 学科, 学期, 单元名, 关卡标题) 查找关卡ID
+
+    第一次使用时用一条查询取出全部关卡，之后不再访问数据库
+    """
+
+    def __init__(self):
+        self._ids = None
+        self._by_path = None
+
+    def _load(self):
+        rows = db.session.query(
+            Level.id, Course.grade, Course.subject, Course.term, Unit.name, Level.title
+        ).outerjoin(Unit, Unit.id == Level.unit_id).outerjoin(Course, Course.id == Unit.course_id)
+        self._ids = set()
+        self._by_path = {}
+        for level_id, *path in rows:
+            self._ids.add(level_id)
+            if path[0] is not None:
+                # 同一单元中标题重复时取第一个关卡
+                self._by_path.setdefault(tuple(path), level_id)
+
+    def resolve(self, record):
+        """返回题目所属的关卡ID，找不到时返回None"""
+        if self._ids is None:
+            self._load()
+        level_id = record.get('level_id')
+        if level_id is not None:
+            return level_id if level_id in self._ids else None
+        return self._by_path.get(tuple(record.get(field) for field in LEVEL_PATH_FIELDS))
+
+
+class KnowledgePointLookup:
+    """
+    知识点查找：按名称查找知识点ID
+
+    第一次使用时取出全部知识点，之后只在遇到新知识点时创建并写入
+    """
+
+    def __init__(self):
+        self._ids = None
+
+    def resolve(self, name, category=None):
+        """返回知识点ID，不存在时创建"""
+        if self._ids is None:
+            self._ids = {}
+            for kp_id, kp_name in db.session.query(KnowledgePoint.id, KnowledgePoint.name).order_by(KnowledgePoint.id):
+                self._ids.setdefault(kp_name, kp_id)
+        kp_id = self._ids.get(name)
+        if kp_id is None:
+            knowledge_point = KnowledgePoint(name=name, category=category)
+            db.session.add(knowledge_point)
+            db.session.flush()
+            kp_id = self._ids[name] = knowledge_point.id
+        return kp_id
+
+
+def _parse_knowledge_points(value):
+    """把 knowledge_points 字段整理为去重的 [(名称, 类别)]，格式错误时返回None"""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        return None
+    result = {}
+    for item in value:
+        if isinstance(item, str):
+            name, category = item.strip(), None
+        elif isinstance(item, dict) and isinstance(item.get('name'), str):
+            name, category = item['name'].strip(), item.get('category')
+        else:
+            return None
+        if not name or len(name) > KNOWLEDGE_POINT_NAME_MAX_LENGTH:
+            return None
+        result.setdefault(name, category)
+    return list(result.items())
+
+
+def prepare_question(record, levels):
+    """
+    校验一条题目记录并转换为 question 表的行
+
+    返回:
+    - (行数据, 知识点列表, 错误信息)，校验失败时行数据和知识点列表为None
+    """
+    external_id = record.get('external_id')
+    if isinstance(external_id, int) and not isinstance(external_id, bool):
+        external_id = str(external_id)
+    if not isinstance(external_id, str) or not external_id.strip():
+        return None, None, '缺少 external_id'
+    external_id = external_id.strip()
+    if len(external_id) > EXTERNAL_ID_MAX_LENGTH:
+        return None, None, f'external_id 最长{EXTERNAL_ID_MAX_LENGTH}个字符'
+
+    question_type = record.get('question_type')
+    if question_type not in QuestionHandlerFactory.handlers:
+        return None, None, f'未知题型: {question_type}'
+    level_id = levels.resolve(record)
+    if level_id is None:
+        return None, None, '找不到所属关卡'
+
+    handler = QuestionHandlerFactory.get_handler(question_type)
+    errors = handler.validate_definition(record)
+    knowledge_points = _parse_knowledge_points(record.get('knowledge_points'))
+    if knowledge_points is None:
+        errors.append('knowledge_points 应为知识点名称列表')
+    if errors:
+        return None, None, '；'.join(errors)
+
+    row = {
+        'external_id': external_id,
+        'level_id': level_id,
+        'question_type': question_type,
+        'content': record['content'],
+        'difficulty': record.get('difficulty', 1),
+        'score': record.get('score', 1),
+        'order': record.get('order', 0),
+        'correct_answer': record.get('correct_answer'),
+        'explanation': record.get('explanation'),
+    }
+    for field in TYPE_FIELDS:
+        row[field] = record.get(field) if field in handler.definition_fields else None
+    return row, knowledge_points, None
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_chunk(chunk, knowledge_points):
+    """
+    写入一批题目：一条 INSERT ... ON CONFLICT (external_id) DO UPDATE，
+    再用新的知识点关联整体替换这些题目原有的关联
+    """
+    rows = [row for row, _kps in chunk]
+    upsert(Question, rows, ['external_id'],
+           update_columns=[column for column in rows[0] if column != 'external_id'],
+           extra_updates={'updated_at': db.func.now()})
+
+    question_ids = dict(db.session.query(Question.external_id, Question.id).filter(
+        Question.external_id.in_([row['external_id'] for row in rows])
+    ))
+    db.session.execute(
+        delete(QuestionKnowledgePoint.__table__)
+        .where(QuestionKnowledgePoint.question_id.in_(list(question_ids.values())))
+    )
+    links = [
+        {'question_id': question_ids[row['external_id']],
+         'knowledge_point_id': knowledge_points.resolve(name, category)}
+        for row, kps in chunk
+        for name, category in kps
+    ]
+    if links:
+        db.session.execute(insert(QuestionKnowledgePoint.__table__), links)
+    # 批量写入不触发 ORM 事件，直接增加课程内容修改计数
+    bump_content_version(db.session.connection())
+
+
+def import_question_bank(stream, fmt, chunk_size=1000, dry_run=False, log=print):
+    """
+    导入题库
+
+    边读取边校验，每凑满 chunk_size 道题写入并提交一次，内存占用与题库大小无关；
+    批量写入不经过 ORM 事件，导入后清空本进程的题目包缓存，其他进程依靠版本戳发现变化
+
+    参数:
+    - stream: 题库文件
+    - fmt: 文件格式，'jsonl' 或 'csv'
+    - dry_run: 只校验，不写入数据库
+
+    返回:
+    - {'created': 新增题数, 'updated': 更新题数, 'invalid': 格式错误数}
+    """
+    if fmt not in READERS:
+        raise QuestionBankError(f'不支持的格式: {fmt}')
+    stats = {'created': 0, 'updated': 0, 'invalid': 0}
+    levels = LevelLookup()
+    knowledge_points = KnowledgePointLookup()
+
+    def valid_questions():
+        for line_no, record, error in READERS[fmt](stream):
+            if error is None:
+                row, kps, error = prepare_question(record, levels)
+            if error:
+                stats['invalid'] += 1
+                external_id = record.get('external_id') if record else None
+                log(f"第 {line_no} 行 {external_id or '(无编号)'}: {error}")
+                continue
+            yield row, kps
+
+    for chunk in _chunks(valid_questions(), chunk_size):
+        # 同一批中题目编号重复时以最后一条为准
+        chunk = list({row['external_id']: (row, kps) for row, kps in chunk}.values())
+        existing = {
+            external_id for (external_id,) in db.session.query(Question.external_id).filter(
+                Question.external_id.in_([row['external_id'] for row, _kps in chunk])
+            )
+        }
+        stats['updated'] += len(existing)
+        stats['created'] += len(chunk) - len(existing)
+        if dry_run:
+            continue
+        _write_chunk(chunk, knowledge_points)
+        db.session.commit()
+        log(f"已导入 {stats['created'] + stats['updated']} 道题")
+
+    if not dry_run:
+        question_bundle_cache.invalidate()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从 JSON Lines 或 CSV 文件批量导入题目')
+    parser.add_argument('bank_file', help='题库文件（.jsonl 或 .csv）')
+    parser.add_argument('--format', choices=sorted(READERS), help='文件格式，默认按扩展名判断')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每批写入的题目数')
+    parser.add_argument('--dry-run', action='store_true', help='只校验题库，不写入数据库')
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.bank_file)[1].lstrip('.').lower()
+    if fmt not in READERS:
+        parser.error(f'无法从扩展名判断格式，请用 --format 指定: {args.bank_file}')
+
+    from app import app
+
+    started = time.perf_counter()
+    with app.app_context(), open(args.bank_file, newline='', encoding='utf-8-sig') as f:
+        try:
+            stats = import_question_bank(f, fmt, chunk_size=args.chunk_size, dry_run=args.dry_run)
+        except QuestionBankError as e:
+            print(f"题库格式错误: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    action = '可导入' if args.dry_run else '导入'
+    print(f"完成，用时 {time.perf_counter() - started:.1f}s：{action}新题 {stats['created']} 道，"
+          f"更新 {stats['updated']} 道，格式错误 {stats['invalid']} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+关卡题目缓存模块
+按 level_id 缓存已排序、已序列化的题目包，避免每次答题页面都重新加载和解码整关题目
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from content_pack import content_packs, level_versions
+from models import db, KnowledgePoint, Level, Question, QuestionKnowledgePoint, Unit
+
+
+def question_to_dict(question):
+    """将Question对象转换为可序列化的字典"""
+    result = {
+        'id': question.id,
+        'content': question.content,
+        'question_type': question.question_type,
+        'score': question.score,
+        'difficulty': getattr(question, 'difficulty', None),
+        'order': question.order,
+        'explanation': getattr(question, 'explanation', '') or ''
+    }
+
+    # 使用属性方法获取选项和正确答案
+    try:
+        if hasattr(question, 'options'):
+            result['options'] = question.options
+        else:
+            result['options'] = []
+
+        if hasattr(question, 'correct_answer'):
+            result['correct_answer'] = question.correct_answer
+        else:
+            result['correct_answer'] = 0
+
+    except Exception as e:
+        # 如果属性访问失败，使用默认值
+        result['options'] = []
+        result['correct_answer'] = 0
+
+    # 填空题、连线题的专有字段
+    for field in ('blanks_count', 'hint', 'left_items', 'right_items', 'correct_matches'):
+        if hasattr(question, field):
+            result[field] = getattr(question, field)
+
+    return result
+
+
+def level_version(level_id):
+    """
+    计算关卡题目包的版本戳，关卡不存在时返回None
+
+    题目数量和最大 updated_at 任一变化都说明该关卡的题目被增删改过；
+    关卡标题、单元名称和知识点名称的变化由版本戳中的摘要发现
+    """
+    return level_versions([level_id]).get(level_id)
+
+
+def build_bundle(level):
+    """
+    从数据库构建关卡题目包
+
+    每道题附带所属知识点ID，题目包的 knowledge_points 为 {知识点ID: 名称}，
+    知识点关联通过一次查询取出，避免逐题懒加载
+    """
+    questions = sorted(level.questions, key=lambda q: q.order or 0)
+    question_kps = {}
+    knowledge_points = {}
+    if questions:
+        rows = db.session.query(
+            QuestionKnowledgePoint.question_id, KnowledgePoint.id, KnowledgePoint.name
+        ).join(
+            KnowledgePoint, KnowledgePoint.id == QuestionKnowledgePoint.knowledge_point_id
+        ).filter(
+            QuestionKnowledgePoint.question_id.in_([q.id for q in questions])
+        ).order_by(QuestionKnowledgePoint.id)
+        for question_id, kp_id, kp_name in rows:
+            question_kps.setdefault(question_id, []).append(kp_id)
+            knowledge_points[kp_id] = kp_name
+
+    return {
+        'level': {
+            'id': level.id,
+            'title': level.title,
+            'content_ref': level.content_ref,
+            'unit_id': level.unit_id,
+            'unit_name': level.unit.name if level.unit else None,
+            'course_id': level.unit.course_id if level.unit else None,
+        },
+        'questions': tuple(
+            dict(question_to_dict(q), knowledge_point_ids=tuple(question_kps.get(q.id, ())))
+            for q in questions
+        ),
+        'knowledge_points': knowledge_points,
+    }
+
+
+class QuestionBundleCache:
+    """
+    进程内的关卡题目包缓存
+
+    - 以 level_id 为键，值为 build_bundle 生成的题目包
+    - 通过版本戳判断缓存是否过期，check_interval 秒内不重复检查版本
+    - 超过 maxsize 时按 LRU 淘汰最久未使用的关卡
+    - 启用内容包时，内容包中的关卡直接返回其中的题目包，不访问数据库
+    """
+
+    def __init__(self, maxsize=128, check_interval=5):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.maxsize = app.config.get('QUESTION_CACHE_SIZE', self.maxsize)
+        self.check_interval = app.config.get('QUESTION_CACHE_CHECK_INTERVAL', self.check_interval)
+
+    def get(self, level_id):
+        """获取关卡题目包，关卡不存在时返回None"""
+        pack = content_packs.get()
+        if pack is not None and level_id in pack.bundles:
+            return pack.bundles[level_id]
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(level_id)
+            if entry is not None and now - entry['checked_at'] < self.check_interval:
+                self._entries.move_to_end(level_id)
+                self.hits += 1
+                return entry['bundle']
+
+        version = level_version(level_id)
+
+        with self._lock:
+            entry = self._entries.get(level_id)
+            if entry is not None and entry['version'] == version:
+                entry['checked_at'] = now
+                self._entries.move_to_end(level_id)
+                self.hits += 1
+                return entry['bundle']
+            self.misses += 1
+
+        level = db.session.get(Level, level_id)
+        if level is None:
+            return None
+        bundle = build_bundle(level)
+
+        with self._lock:
+            self._entries[level_id] = {
+                'version': version,
+                'checked_at': now,
+                'bundle': bundle,
+            }
+            self._entries.move_to_end(level_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return bundle
+
+    def version(self, level_id):
+        """返回缓存中关卡题目包的版本戳，未缓存时返回None"""
+        pack = content_packs.get()
+        if pack is not None and level_id in pack.level_versions:
+            return ('pack', pack.version)
+        with self._lock:
+            entry = self._entries.get(level_id)
+            return entry['version'] if entry is not None else None
+
+    def invalidate(self, level_id=None):
+        """使指定关卡（或全部关卡）的缓存失效"""
+        with self._lock:
+            if level_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(level_id, None)
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+question_bundle_cache = QuestionBundleCache()
+
+
+@event.listens_for(Question, 'after_insert', propagate=True)
+@event.listens_for(Question, 'after_update', propagate=True)
+@event.listens_for(Question, 'after_delete', propagate=True)
+def _invalidate_question_level(mapper, connection, target):
+    # 本进程内的写入立即失效，其他进程依靠版本戳发现变化
+    question_bundle_cache.invalidate(target.level_id)
+    content_packs.discard_levels([target.level_id])
+
+
+@event.listens_for(QuestionKnowledgePoint, 'after_insert')
+@event.listens_for(QuestionKnowledgePoint, 'after_update')
+@event.listens_for(QuestionKnowledgePoint, 'after_delete')
+@event.listens_for(KnowledgePoint, 'after_update')
+@event.listens_for(Unit, 'after_update')
+def _invalidate_knowledge_points(mapper, connection, target):
+    # 知识点关联只记录题目ID，知识点和单元改名影响多个关卡，都很少变动，直接清空全部缓存
+    question_bundle_cache.invalidate()
+    content_packs.discard_levels()
+
+
+@event.listens_for(Level, 'after_update')
+@event.listens_for(Level, 'after_delete')
+def _invalidate_level(mapper, connection, target):
+    question_bundle_cache.invalidate(target.id)
+    content_packs.discard_levels([target.id])
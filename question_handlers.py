@@ -4,17 +4,22 @@
 """
 
 from flask import render_template
+from werkzeug.datastructures import MultiDict
 import json
 
 class QuestionHandler:
     """题型处理器基类"""
     
+    # 题型专有的题目字段（单表继承中其他题型为空的列），批量导入时按此取值
+    definition_fields = ()
+    
     def get_template(self):
         """获取题型模板"""
         raise NotImplementedError("子类必须实现此方法")
     
     def render_question(self, question, **kwargs):
         """渲染题目"""
+        kwargs.setdefault('js_files', self.get_js_files())
         return render_template(self.get_template(), current_question=question, **kwargs)
     
     def validate_answer(self, question, form_data):
@@ -22,24 +27,71 @@ class QuestionHandler:
         raise NotImplementedError("子类必须实现此方法")
     
     def get_js_files(self):
-        """获取题型特定的JS文件"""
-        return ['/static/js/quiz/core.js']
+        """获取题型特定的JS文件（相对 static/ 目录，按引入顺序排列）"""
+        return ['js/quiz/core.js']
+    
+    def answer_to_form_data(self, answer):
+        """将JSON接口提交的答案转换为validate_answer使用的表单数据"""
+        if isinstance(answer, list):
+            return MultiDict([('answer', value) for value in answer])
+        return MultiDict({'answer': answer})
+    
+    def validate_definition(self, data):
+        """
+        校验导入的题目定义
+        
+        参数:
+        - data: 题目字段字典，JSON列已解码
+        
+        返回:
+        - 错误信息列表，为空表示通过
+        """
+        errors = []
+        if not isinstance(data.get('content'), str) or not data['content'].strip():
+            errors.append('题干不能为空')
+        difficulty = data.get('difficulty')
+        if difficulty is not None and (not isinstance(difficulty, int) or not 1 <= difficulty <= 5):
+            errors.append('难度应为1~5的整数')
+        score = data.get('score')
+        if score is not None and (not isinstance(score, int) or score < 0):
+            errors.append('分值应为非负整数')
+        return errors
 
 
 class MultipleChoiceHandler(QuestionHandler):
     """选择题处理器"""
     
+    definition_fields = ('options',)
+    
     def get_template(self):
         return "quiz/types/multiple_choice.html"
     
     def validate_answer(self, question, form_data):
-        selected = form_data.get('answer')
-        if selected is None:
+        selected = form_data.getlist('answer')
+        if not selected:
             return False
-        return int(selected) == question.correct_answer
+        correct_answer = question.correct_answer
+        # 正确答案为选项编号列表时（如 ["A"]），按集合比较，支持多选
+        if isinstance(correct_answer, list):
+            return set(str(s) for s in selected) == set(str(c) for c in correct_answer)
+        return int(selected[0]) == correct_answer
     
     def get_js_files(self):
-        return super().get_js_files() + ['/static/js/quiz/types/multiple_choice.js']
+        return super().get_js_files() + ['js/quiz/types/multiple_choice.js']
+    
+    def validate_definition(self, data):
+        errors = super().validate_definition(data)
+        options = data.get('options')
+        if not isinstance(options, list) or not options or not all(
+                isinstance(o, dict) and o.get('id') and 'content' in o for o in options):
+            errors.append('options 应为 [{"id": .., "content": ..}] 且不能为空')
+            return errors
+        option_ids = {str(o['id']) for o in options}
+        correct_answer = data.get('correct_answer')
+        if (not isinstance(correct_answer, list) or not correct_answer
+                or not {str(c) for c in correct_answer} <= option_ids):
+            errors.append('correct_answer 应为选项编号列表，如 ["A"]')
+        return errors
 
 
 class TrueFalseHandler(QuestionHandler):
@@ -52,24 +104,39 @@ class TrueFalseHandler(QuestionHandler):
         selected = form_data.get('answer')
         if selected is None:
             return False
-        return selected == question.correct_answer
+        return self._to_bool(selected) == self._to_bool(question.correct_answer)
+    
+    def _to_bool(self, value):
+        """表单提交的是 'true'/'false' 字符串，数据库中是布尔值"""
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() == 'true'
     
     def get_js_files(self):
-        return super().get_js_files() + ['/static/js/quiz/types/true_false.js']
+        return super().get_js_files() + ['js/quiz/types/true_false.js']
+    
+    def validate_definition(self, data):
+        errors = super().validate_definition(data)
+        if not isinstance(data.get('correct_answer'), bool):
+            errors.append('correct_answer 应为 true 或 false')
+        return errors
 
 
 class FillBlankHandler(QuestionHandler):
     """填空题处理器"""
     
+    definition_fields = ('blanks_count', 'hint')
+    
     def get_template(self):
         return "quiz/types/fill_blank.html"
     
     def validate_answer(self, question, form_data):
         # 获取用户答案
-        if question.blanks_count and question.blanks_count > 1:
+        blanks_count = getattr(question, 'blanks_count', None)
+        if blanks_count and blanks_count > 1:
             # 多个填空
             user_answers = []
-            for i in range(question.blanks_count):
+            for i in range(blanks_count):
                 user_answers.append(form_data.get(f'answer-{i}', '').strip().lower())
             
             # 获取正确答案
@@ -117,7 +184,27 @@ class FillBlankHandler(QuestionHandler):
         return user_answer_no_punct == correct_answer_no_punct
     
     def get_js_files(self):
-        return super().get_js_files() + ['/static/js/quiz/types/fill_blank.js']
+        return super().get_js_files() + ['js/quiz/types/fill_blank.js']
+    
+    def validate_definition(self, data):
+        errors = super().validate_definition(data)
+        correct_answer = data.get('correct_answer')
+        blanks_count = data.get('blanks_count')
+        if blanks_count is not None and (not isinstance(blanks_count, int) or blanks_count < 1):
+            errors.append('blanks_count 应为正整数')
+        elif blanks_count and blanks_count > 1:
+            # 多个填空：每个空一个答案，或一组可接受的答案
+            if not isinstance(correct_answer, list) or len(correct_answer) != blanks_count:
+                errors.append(f'correct_answer 应为{blanks_count}个空的答案列表')
+        elif correct_answer in (None, '', []):
+            errors.append('缺少 correct_answer')
+        return errors
+    
+    def answer_to_form_data(self, answer):
+        """多个填空的答案按 answer-0、answer-1 ... 提交"""
+        if isinstance(answer, list):
+            return MultiDict({f'answer-{i}': str(value) for i, value in enumerate(answer)})
+        return MultiDict({'answer': str(answer)})
     
     def render_question(self, question, **kwargs):
         """渲染题目，添加正确答案数据"""
@@ -132,6 +219,8 @@ class FillBlankHandler(QuestionHandler):
 class MatchingHandler(QuestionHandler):
     """连线题处理器"""
     
+    definition_fields = ('left_items', 'right_items', 'correct_matches')
+    
     def get_template(self):
         return "quiz/types/matching.html"
     
@@ -166,7 +255,31 @@ class MatchingHandler(QuestionHandler):
         return True
     
     def get_js_files(self):
-        return super().get_js_files() + ['/static/js/quiz/types/matching.js']
+        return super().get_js_files() + ['js/quiz/types/matching.js']
+    
+    def validate_definition(self, data):
+        errors = super().validate_definition(data)
+        left_items = data.get('left_items')
+        right_items = data.get('right_items')
+        if not isinstance(left_items, list) or not left_items:
+            errors.append('left_items 应为非空列表')
+        if not isinstance(right_items, list) or not right_items:
+            errors.append('right_items 应为非空列表')
+        if errors:
+            return errors
+        # 连线以左右两侧项目的下标表示，与页面上的 data-id 一致
+        correct_matches = data.get('correct_matches')
+        if not isinstance(correct_matches, list) or not correct_matches or not all(
+                isinstance(m, dict)
+                and isinstance(m.get('left'), int) and 0 <= m['left'] < len(left_items)
+                and isinstance(m.get('right'), int) and 0 <= m['right'] < len(right_items)
+                for m in correct_matches):
+            errors.append('correct_matches 应为 [{"left": 下标, "right": 下标}]')
+        return errors
+    
+    def answer_to_form_data(self, answer):
+        """连线结果以JSON字符串提交"""
+        return MultiDict({'matching_result': json.dumps(answer or [])})
     
     def render_question(self, question, **kwargs):
         """渲染题目，添加正确匹配数据"""
@@ -181,17 +294,17 @@ class MatchingHandler(QuestionHandler):
 class QuestionHandlerFactory:
     """题型处理器工厂"""
     
+    handlers = {
+        'multiple_choice': MultipleChoiceHandler,
+        'true_false': TrueFalseHandler,
+        'fill_blank': FillBlankHandler,
+        'matching': MatchingHandler
+    }
+    
     @staticmethod
     def get_handler(question_type):
         """根据题型获取处理器"""
-        handlers = {
-            'multiple_choice': MultipleChoiceHandler,
-            'true_false': TrueFalseHandler,
-            'fill_blank': FillBlankHandler,
-            'matching': MatchingHandler
-        }
-        
-        handler_class = handlers.get(question_type)
+        handler_class = QuestionHandlerFactory.handlers.get(question_type)
         if handler_class:
             return handler_class()
         else:
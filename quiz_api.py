@@ -0,0 +1,203 @@
+"""
+单页答题接口
+一次返回整关题目，答题结束（或每答几题）后批量提交答案
+"""
+
+from flask import render_template, request, jsonify, abort, url_for
+from flask_login import login_required, current_user
+
+from answer_service import grade_answer, submit_answers, AnswerSubmissionError
+from assets import static_assets
+from question_cache import question_bundle_cache
+from question_handlers import QuestionHandlerFactory
+
+# 每关初始生命值
+MAX_HEARTS = 3
+
+
+def level_payload(bundle):
+    """
+    组装整关的答题数据，附带每道题的题型处理器信息
+
+    题目去掉答案和解析（public_question），每道题的对错由 check_answer 接口判断
+    """
+    js_files = {}
+    questions = []
+    for question in bundle['questions']:
+        question_type = question['question_type']
+        if question_type not in js_files:
+            js_files[question_type] = static_assets.script_urls(
+                QuestionHandlerFactory.get_handler(question_type).get_js_files())
+        payload = dict(public_question(question), handler={
+            'type': question_type,
+            'js_files': js_files[question_type],
+        })
+        if question_type == 'multiple_choice':
+            # 只告诉页面用单选还是多选，不透露答案
+            correct_answer = question.get('correct_answer')
+            payload['multiple_answers'] = isinstance(correct_answer, list) and len(correct_answer) > 1
+        questions.append(payload)
+
+    level = bundle['level']
+    return {
+        'level': level,
+        'questions': questions,
+        'total_questions': len(questions),
+        'hearts': MAX_HEARTS,
+        'check_url': url_for('check_answer', level_id=level['id']),
+        'submit_url': url_for('submit_level_answers', level_id=level['id']),
+    }
+
+
+# 不下发到答题页面的字段（答案和解析只在判分后返回）
+ANSWER_KEY_FIELDS = ('correct_answer', 'correct_matches', 'explanation')
+
+
+def public_question(question):
+    """去掉答案相关字段，只保留渲染题目所需的数据"""
+    return {k: v for k, v in question.items() if k not in ANSWER_KEY_FIELDS}
+
+
+def correct_answer_text(question):
+    """生成正确答案的展示文本"""
+    correct = question.get('correct_answer')
+    if question['question_type'] == 'multiple_choice':
+        ids = {str(c) for c in correct} if isinstance(correct, list) else set()
+        texts = [
+            option.get('content', '') if isinstance(option, dict) else str(option)
+            for index, option in enumerate(question.get('options') or [])
+            if (option.get('id') if isinstance(option, dict) else None) in ids or index == correct
+        ]
+        return '、'.join(texts)
+    if question['question_type'] == 'true_false':
+        return '正确' if correct in (True, 'true') else '错误'
+    if isinstance(correct, list):
+        return '、'.join(str(c) for c in correct)
+    return '' if correct is None else str(correct)
+
+
+def register_quiz_api(app):
+    # 每种题型的 core.js + 题型脚本注册为一个合并文件（ASSET_BUNDLE_JS 开启时使用）
+    for handler_class in QuestionHandlerFactory.handlers.values():
+        static_assets.register_bundle(handler_class().get_js_files())
+
+    @app.route('/quiz/<int:level_id>/play')
+    @login_required
+    def quiz_session(level_id):
+        """单页答题页面，题目由前端通过接口一次性加载"""
+        bundle = question_bundle_cache.get(level_id)
+        if bundle is None:
+            abort(404)
+        return render_template('quiz_session.html', level=bundle['level'])
+
+    @app.route('/api/level/<int:level_id>/quiz')
+    @login_required
+    def level_quiz_data(level_id):
+        """返回整关的题目、选项和题型处理器信息"""
+        bundle = question_bundle_cache.get(level_id)
+        if bundle is None:
+            abort(404)
+        return jsonify(level_payload(bundle))
+
+    @app.route('/api/level/<int:level_id>/check', methods=['POST'])
+    @login_required
+    def check_answer(level_id):
+        """
+        判断单道题的答案，不保存答题记录
+
+        请求体: {"question_id": 1, "answer": ["A"]}
+        返回: {"is_correct": true, "score": 5, "correct_answer": "大青树上", "explanation": "..."}
+        """
+        bundle = question_bundle_cache.get(level_id)
+        if bundle is None:
+            abort(404)
+
+        data = request.get_json(silent=True) or {}
+        question = next((q for q in bundle['questions'] if q['id'] == data.get('question_id')), None)
+        if question is None:
+            return jsonify({'error': '题目不存在或不属于该关卡'}), 400
+        if data.get('answer') is None:
+            return jsonify({'error': '缺少答案'}), 400
+
+        is_correct, score = grade_answer(question, data.get('answer'))
+        return jsonify({
+            'is_correct': is_correct,
+            'score': score,
+            'correct_answer': correct_answer_text(question),
+            'explanation': question.get('explanation', ''),
+        })
+
+    @app.route('/api/level/<int:level_id>/answers', methods=['POST'])
+    @login_required
+    def submit_level_answers(level_id):
+        """
+        批量提交答案
+
+        请求体: {"answers": [{"question_id": 1, "answer": ["A"], "time_spent": 12}, ...]}
+        """
+        bundle = question_bundle_cache.get(level_id)
+        if bundle is None:
+            abort(404)
+
+        data = request.get_json(silent=True) or {}
+        answers = data.get('answers')
+        if not isinstance(answers, list):
+            return jsonify({'error': '缺少答案数据'}), 400
+
+        try:
+            outcome = submit_answers(current_user.id, answers, level_id=level_id)
+        except AnswerSubmissionError as e:
+            return jsonify({'error': str(e)}), 400
+
+        results = [
+            {'question_id': r['question_id'], 'is_correct': r['is_correct'], 'score': r['score']}
+            for r in outcome['results']
+        ]
+        return jsonify({
+            'results': results,
+            'score': sum(r['score'] for r in results),
+            'correct_count': sum(1 for r in results if r['is_correct']),
+            'level_completed': level_id in outcome['completed_levels'],
+        })
+
+    @app.route('/api/answers', methods=['POST'])
+    @login_required
+    def submit_answers_batch():
+        """
+        跨关卡批量提交答案
+
+        请求体: {"answers": [{"question_id": 1, "answer": ["A"], "time_spent": 12}, ...]}
+
+        Service Worker 重放离线答案时附带:
+        - user_id: 答案所属用户，与当前登录用户不同时返回 409，答案留在离线队列中
+        - skip_unknown: 跳过已被删除的题目，不影响同批的其他答案
+        - sent_at 和每道题的 queued_at: 发出请求和离线保存答案的时间（客户端毫秒时间戳），
+          比已保存答案更早作答的离线答案不会覆盖已保存的答案
+        """
+        data = request.get_json(silent=True) or {}
+        answers = data.get('answers')
+        if not isinstance(answers, list):
+            return jsonify({'error': '缺少答案数据'}), 400
+        if data.get('user_id') is not None and data['user_id'] != current_user.id:
+            return jsonify({'error': '答案不属于当前登录用户'}), 409
+
+        try:
+            outcome = submit_answers(current_user.id, answers, skip_unknown=bool(data.get('skip_unknown')),
+                                     sent_at=data.get('sent_at'))
+        except AnswerSubmissionError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'results': [
+                {
+                    'question_id': r['question_id'],
+                    'level_id': r['level_id'],
+                    'is_correct': r['is_correct'],
+                    'score': r['score'],
+                }
+                for r in outcome['results']
+            ],
+            'completed_levels': outcome['completed_levels'],
+            'skipped': outcome['skipped'],
+            'stale': outcome['stale'],
+        })
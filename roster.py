@@ -0,0 +1,152 @@
+"""
+班级名单批量导入
+从CSV文件批量创建学生账号，密码哈希由进程池并行计算，账号按批写入
+
+CSV 需包含 username、password 两列，可选 grade、course 列（写入 last_grade/last_course，
+学生登录后直接进入对应课程）；已存在的用户名跳过
+
+用法:
+    python roster.py students.csv
+    python roster.py students.csv --batch-size 500 --workers 8 --dry-run
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+from models import db, User, upsert
+from passwords import password_hasher
+
+# 与注册表单的校验规则一致
+USERNAME_LENGTH = (4, 20)
+PASSWORD_MIN_LENGTH = 6
+
+
+class RosterError(ValueError):
+    """名单格式错误"""
+
+
+def read_roster(stream):
+    """
+    逐行读取并校验名单
+
+    返回:
+    - 生成 (行号, 行数据, 错误信息) ，校验通过的行错误信息为None
+    """
+    reader = csv.DictReader(stream)
+    missing = {'username', 'password'} - set(reader.fieldnames or [])
+    if missing:
+        raise RosterError(f"缺少列: {', '.join(sorted(missing))}")
+
+    seen = set()
+    for line_no, record in enumerate(reader, start=2):
+        username = (record.get('username') or '').strip()
+        password = record.get('password') or ''
+        row = {
+            'username': username,
+            'password': password,
+            'last_grade': (record.get('grade') or '').strip() or None,
+            'last_course': (record.get('course') or '').replace(' ', '').strip() or None,
+        }
+        if not USERNAME_LENGTH[0] <= len(username) <= USERNAME_LENGTH[1]:
+            yield line_no, row, f'用户名长度应为{USERNAME_LENGTH[0]}~{USERNAME_LENGTH[1]}个字符'
+        elif len(password) < PASSWORD_MIN_LENGTH:
+            yield line_no, row, f'密码至少{PASSWORD_MIN_LENGTH}位'
+        elif username in seen:
+            yield line_no, row, '用户名在名单中重复'
+        else:
+            seen.add(username)
+            yield line_no, row, None
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_roster(stream, batch_size=500, dry_run=False, log=print):
+    """
+    导入名单
+
+    每批先查出已存在的用户名，只为新用户计算哈希，再用一条 INSERT ... ON CONFLICT DO NOTHING 写入并提交；
+    并发注册了同名用户时该行被跳过，不会中断导入
+
+    返回:
+    - {'created': 新建数, 'existing': 已存在跳过数, 'invalid': 格式错误数}
+    """
+    stats = {'created': 0, 'existing': 0, 'invalid': 0}
+
+    def valid_rows():
+        for line_no, row, error in read_roster(stream):
+            if error:
+                stats['invalid'] += 1
+                log(f"第 {line_no} 行 {row['username'] or '(空)'}: {error}")
+                continue
+            yield row
+
+    for batch in _batches(valid_rows(), batch_size):
+        usernames = [row['username'] for row in batch]
+        existing = {
+            name for (name,) in db.session.query(User.username).filter(User.username.in_(usernames))
+        }
+        new_rows = [row for row in batch if row['username'] not in existing]
+        stats['existing'] += len(batch) - len(new_rows)
+        if not new_rows:
+            continue
+        if dry_run:
+            stats['created'] += len(new_rows)
+            continue
+
+        hashes = password_hasher.hash_many([row['password'] for row in new_rows])
+        for row, password_hash in zip(new_rows, hashes):
+            row['password'] = password_hash
+
+        upsert(User, new_rows, ['username'])
+        db.session.commit()
+        # 每个哈希的盐值都不同，按哈希查回的行数即本批实际新建的账号数
+        created = db.session.query(db.func.count(User.id)).filter(
+            User.username.in_([row['username'] for row in new_rows]),
+            User.password.in_(hashes)
+        ).scalar()
+        stats['created'] += created
+        stats['existing'] += len(new_rows) - created
+        log(f"已导入 {stats['created']} 个账号")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从CSV批量创建学生账号')
+    parser.add_argument('csv_file', help='名单文件，包含 username,password 列，可选 grade,course 列')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批写入的账号数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='计算密码哈希的进程数')
+    parser.add_argument('--dry-run', action='store_true', help='只校验名单，不写入数据库')
+    args = parser.parse_args()
+
+    from app import app
+    password_hasher.workers = args.workers
+
+    started = time.perf_counter()
+    with app.app_context(), open(args.csv_file, newline='', encoding='utf-8-sig') as f:
+        try:
+            stats = import_roster(f, batch_size=args.batch_size, dry_run=args.dry_run)
+        except RosterError as e:
+            print(f"名单格式错误: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            password_hasher.shutdown()
+
+    action = '可导入' if args.dry_run else '新建'
+    print(f"完成，用时 {time.perf_counter() - started:.1f}s：{action} {stats['created']} 个账号，"
+          f"已存在 {stats['existing']} 个，格式错误 {stats['invalid']} 行")
+
+
+if __name__ == '__main__':
+    main()
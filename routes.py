@@ -1,38 +1,13 @@
-from flask import render_template, redirect, url_for, request, flash, session
+from flask import render_template, redirect, url_for, request, flash, session, abort
 from models import db, User, Level, Question, Course, Unit, UserProgress
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, login_required, logout_user, current_user
 from forms import LoginForm, RegistrationForm
-
-def question_to_dict(question):
-    """将Question对象转换为可序列化的字典"""
-    result = {
-        'id': question.id,
-        'content': question.content,
-        'question_type': question.question_type,
-        'score': question.score,
-        'order': question.order,
-        'explanation': getattr(question, 'explanation', '') or ''
-    }
-    
-    # 使用属性方法获取选项和正确答案
-    try:
-        if hasattr(question, 'options'):
-            result['options'] = question.options
-        else:
-            result['options'] = []
-            
-        if hasattr(question, 'correct_answer'):
-            result['correct_answer'] = question.correct_answer
-        else:
-            result['correct_answer'] = 0
-            
-    except Exception as e:
-        # 如果属性访问失败，使用默认值
-        result['options'] = []
-        result['correct_answer'] = 0
-    
-    return result
+from passwords import PasswordHasherBusy, password_hasher
+from question_cache import question_bundle_cache
+from conditional import conditional_pages, progress_stamp
+from course_tree import course_graph_cache, find_course, load_course_tree
+from quiz_api import public_question
+from user_cache import user_identity_cache
 
 def init_routes(app):
     @app.route('/')
@@ -52,8 +27,18 @@ def init_routes(app):
                 user = User.query.filter_by(username=username).first()
                 if user:
                     print(f"Found user: {user.username}")
-                    if user.check_password(password):
+                    # 密码校验在进程池中执行，同时登录的人太多时请用户稍后再试
+                    try:
+                        valid, new_hash = password_hasher.verify(user.password, password)
+                    except PasswordHasherBusy:
+                        flash('登录人数较多，请稍后再试')
+                        return render_template('login.html', form=form), 503, {'Retry-After': '2'}
+                    if valid:
                         print("Password check passed")
+                        # 哈希算法参数已调整时，用本次输入的密码生成新哈希
+                        if new_hash:
+                            user.password = new_hash
+                            db.session.commit()
                         login_user(user)
                         print("User logged in successfully")
                         return redirect(url_for('select_course'))
@@ -68,10 +53,15 @@ def init_routes(app):
     def register():
         form = RegistrationForm()
         if form.validate_on_submit():
-            hashed_password = generate_password_hash(form.password.data)
+            try:
+                hashed_password = password_hasher.hash(form.password.data)
+            except PasswordHasherBusy:
+                flash('注册人数较多，请稍后再试')
+                return render_template('register.html', form=form), 503, {'Retry-After': '2'}
             new_user = User(username=form.username.data, password=hashed_password)
             db.session.add(new_user)
             db.session.commit()
+            user_identity_cache.invalidate(new_user.id)
             return redirect(url_for('login'))
         return render_template('register.html', form=form)
 
@@ -125,45 +115,53 @@ def init_routes(app):
     @app.route('/selected-course/<grade>/<course>')
     @login_required
     def selected_course(grade, course):
-        # 获取课程数据 (按年级和完整课程名称查询)
-        course_obj = Course.query.filter(
-            Course.grade == grade,
-            db.or_(
-                db.func.concat(Course.subject, Course.term) == course,
-                db.func.concat(Course.subject, ' ', Course.term) == course
-            )
-        ).first_or_404()
-        
-        # 加载关联的单元和关卡数据
-        units = Unit.query.filter_by(course_id=course_obj.id).order_by(Unit.order).all()
-        
-        # 为每个单元加载关卡
-        for unit in units:
-            unit.levels = Level.query.filter_by(unit_id=unit.id).order_by(Level.order).all()
-        
-        # 将单元数据附加到课程对象
-        course_obj.units = units
-        
-        # 记录用户选择的课程
-        current_user.last_grade = grade
-        current_user.last_course = f"{course_obj.subject}{course_obj.term}"
-        db.session.commit()
+        # 页面只取决于课程结构，结构未变化时直接返回304，不再加载课程
+        etag = conditional_pages.etag('selected_course', current_user.id, grade, course,
+                                      course_graph_cache.get().version)
+
+        def render():
+            # 获取课程数据 (按年级和完整课程名称查询)，单元和关卡一并预加载
+            course_obj = find_course(grade, course)
+            if course_obj is None:
+                abort(404)
+            # 渲染课程信息页面（有开始答题和切换课程按钮）
+            # 先渲染再提交，避免提交后预加载的单元和关卡过期被逐个重新查询
+            return render_template('selected_course.html',
+                                 course=course_obj)
+
+        response = conditional_pages.respond(etag, render)
+
+        # 记录用户选择的课程，仅在发生变化时写入
+        # 课程名称按"科目+学期"保存，地址中的"语文 上册"与"语文上册"是同一门课程
+        course_name = course.replace(' ', '')
+        if current_user.last_grade != grade or current_user.last_course != course_name:
+            # current_user 是不可变的身份记录，直接更新数据库并使缓存失效
+            User.query.filter_by(id=current_user.id).update(
+                {'last_grade': grade, 'last_course': course_name}, synchronize_session=False)
+            db.session.commit()
+            user_identity_cache.invalidate(current_user.id)
         
-        # 渲染课程信息页面（有开始答题和切换课程按钮）
-        return render_template('selected_course.html',
-                             course=course_obj)
+        return response
 
     @app.route('/quiz/<int:level_id>')
     @login_required
     def quiz(level_id):
-        level = Level.query.get_or_404(level_id)
-        return redirect(url_for('quiz_question', level_id=level_id, question_index=0))
+        # 关卡是否存在由题目包判断，启用内容包时不查询数据库
+        if question_bundle_cache.get(level_id) is None:
+            abort(404)
+        # 默认进入单页答题模式，整关题目一次加载
+        return redirect(url_for('quiz_session', level_id=level_id))
 
     @app.route('/quiz/<int:level_id>/<int:question_index>')
     @login_required
     def quiz_question(level_id, question_index):
-        level = Level.query.get_or_404(level_id)
-        questions = sorted(level.questions, key=lambda q: q.order or 0)
+        # 从缓存获取已排序、已序列化的题目包
+        bundle = question_bundle_cache.get(level_id)
+        if bundle is None:
+            abort(404)
+        questions = bundle['questions']
+        if question_index >= len(questions):
+            abort(404)
         current_question = questions[question_index]
         
         # 获取生命值（从session或查询参数）
@@ -181,10 +179,10 @@ def init_routes(app):
             "别灰心，继续努力", "再试一次吧", "加油，你可以的"
         ]
         
+        # 只下发当前题目（不含答案），判分由 check_answer 接口完成
         return render_template('quiz.html',
-                           current_question=question_to_dict(current_question),
-                           questions=[question_to_dict(q) for q in questions],
-                           level=level,
+                           current_question=public_question(current_question),
+                           level=bundle['level'],
                            question_index=question_index,
                            total_questions=len(questions),
                            hearts=hearts,
@@ -194,40 +192,22 @@ def init_routes(app):
     @app.route('/game/<int:course_id>')
     @login_required
     def game(course_id):
-        course = Course.query.get_or_404(course_id)
-        units = Unit.query.filter_by(course_id=course.id).order_by(Unit.order).all()
-        
-        # 获取所有关卡的ID
-        level_ids = []
-        for unit in units:
-            for level in unit.levels:
-                level_ids.append(level.id)
-
-        # 获取当前用户的进度数据
-        user_id = current_user.id
-        progress = {
-            p.level_id: p.status
-            for p in UserProgress.query.filter_by(user_id=user_id).filter(
-                UserProgress.level_id.in_(level_ids)
-            ).all()
-        }
-
-        # 为没有进度记录的关卡创建默认的'locked'状态
-        for level_id in level_ids:
-            if level_id not in progress:
-                progress[level_id] = 'locked'
-                new_progress = UserProgress(
-                    user_id=user_id,
-                    level_id=level_id,
-                    status='locked'
-                )
-                db.session.add(new_progress)
-
-        db.session.commit()
-
-        return render_template('game.html',
-            course=course,
-            units=units,
-            progress=progress
-        )
+        # 课程结构和用户进度都没有变化时直接返回304
+        etag = conditional_pages.etag('game', current_user.id, course_id,
+                                      course_graph_cache.get().version,
+                                      progress_stamp(current_user.id))
+
+        def render():
+            # 一次性加载课程、单元、关卡和当前用户的进度数据
+            # 未解锁的关卡不再写入数据库，状态在读取时根据课程结构推导
+            course, progress = load_course_tree(course_id, current_user.id)
+            if course is None:
+                abort(404)
+
+            return render_template('game.html',
+                course=course,
+                units=course.units,
+                progress=progress
+            )
 
+        return conditional_pages.respond(etag, render)
\ No newline at end of file
@@ -0,0 +1,370 @@
+"""
+签名密钥与服务端会话
+- SECRET_KEY 来自环境变量或实例目录中的密钥文件，所有 worker 和重启前后使用同一个密钥；
+  SECRET_KEY_FALLBACKS 中的旧密钥仍可验证已签发的 Cookie，用于轮换密钥
+- 会话数据保存在服务端（SQLite 或文件），Cookie 中只有签名后的会话ID；
+  各 worker 共享同一份会话数据，默认每个请求都从存储读取，修改和退出登录对所有 worker 立即生效
+"""
+
+import os
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from flask_login import user_logged_in
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+# 会话ID：secrets.token_urlsafe(32) 生成的43个字符
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+serializer = TaggedJSONSerializer()
+
+
+def configure_secret_key(app):
+    """
+    设置持久的签名密钥
+
+    未通过环境变量提供 SECRET_KEY 时，读取 SECRET_KEY_FILE（默认 instance/secret_key），
+    文件不存在则生成一个新密钥并写入；多个 worker 同时启动时只有一个能创建文件，其余读取该文件
+    """
+    if app.config.get('SECRET_KEY'):
+        return
+    path = app.config.get('SECRET_KEY_FILE') or os.path.join(app.instance_path, 'secret_key')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # 另一个进程可能刚创建文件还未写入，稍等后再读
+        for _ in range(50):
+            with open(path) as f:
+                key = f.read().strip()
+            if key:
+                break
+            time.sleep(0.1)
+        else:
+            raise RuntimeError(f'密钥文件 {path} 为空')
+    else:
+        key = secrets.token_hex(32)
+        with os.fdopen(fd, 'w') as f:
+            f.write(key)
+    app.config['SECRET_KEY'] = key
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """保存在服务端的会话，sid 为会话ID"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        # Cookie 使用旧密钥签名，需要用当前密钥重新签发
+        self.resign = False
+        # 需要删除的旧会话ID（登录后更换会话ID时设置）
+        self.previous_sid = None
+
+    def regenerate(self):
+        """更换会话ID，防止登录前的会话ID被他人利用（会话固定攻击）"""
+        if not self.new:
+            self.previous_sid = self.sid
+        self.sid = new_session_id()
+        self.new = True
+        self.modified = True
+
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+
+class SQLiteSessionStore:
+    """
+    单文件 SQLite 会话存储
+
+    每个线程使用各自的连接，开启 WAL 模式，多个 worker 可以同时读写
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 建表使用临时连接：应用可能在 gunicorn 主进程中加载，连接不能带到 fork 出的 worker 里
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('CREATE TABLE IF NOT EXISTS session ('
+                         'id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_session_expires_at ON session (expires_at)')
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid):
+        row = self._connect().execute(
+            'SELECT data FROM session WHERE id = ? AND expires_at > ?', (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid, data, expires_at):
+        self._connect().execute(
+            'INSERT INTO session (id, data, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at',
+            (sid, data, expires_at)
+        )
+
+    def delete(self, sid):
+        self._connect().execute('DELETE FROM session WHERE id = ?', (sid,))
+
+    def purge(self):
+        """删除过期的会话，返回删除数量"""
+        return self._connect().execute('DELETE FROM session WHERE expires_at <= ?', (time.time(),)).rowcount
+
+
+class FileSessionStore:
+    """
+    每个会话一个文件，第一行为过期时间，其余为会话数据
+
+    写入先写临时文件再替换，读取时不会读到写了一半的文件
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, sid)
+
+    def load(self, sid):
+        try:
+            with open(self._path(sid), encoding='utf-8') as f:
+                expires_at = float(f.readline())
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        return data if expires_at > time.time() else None
+
+    def save(self, sid, data, expires_at):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(f'{expires_at}\n{data}')
+        os.replace(tmp_path, self._path(sid))
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def purge(self):
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not SESSION_ID_PATTERN.match(name):
+                continue
+            try:
+                with open(self._path(name), encoding='utf-8') as f:
+                    expired = float(f.readline()) <= now
+            except (OSError, ValueError):
+                continue
+            if expired:
+                self.delete(name)
+                removed += 1
+        return removed
+
+
+class CachedSessionStore:
+    """
+    在存储前加一层进程内 LRU 缓存（需通过 SESSION_CACHE_TTL 显式开启）
+
+    本进程的写入和删除同时更新缓存；其他 worker 的修改（包括退出登录）最迟 ttl 秒后才可见，
+    在这段时间内已退出的会话在其他 worker 上仍然有效
+    """
+
+    def __init__(self, store, maxsize=1024, ttl=0):
+        self.store = store
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(sid)
+                return entry[0]
+        data = self.store.load(sid)
+        self._remember(sid, data, now)
+        return data
+
+    def save(self, sid, data, expires_at):
+        self.store.save(sid, data, expires_at)
+        self._remember(sid, data, time.monotonic())
+
+    def delete(self, sid):
+        self.store.delete(sid)
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def purge(self):
+        return self.store.purge()
+
+    def _remember(self, sid, data, now):
+        if not self.ttl:
+            return
+        with self._lock:
+            if data is None:
+                self._entries.pop(sid, None)
+                return
+            self._entries[sid] = (data, now)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+SESSION_BACKENDS = {
+    'sqlite': (SQLiteSessionStore, 'sessions.db'),
+    'file': (FileSessionStore, 'sessions'),
+}
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    服务端会话
+
+    - Cookie 中保存用 SECRET_KEY 签名的会话ID，SECRET_KEY_FALLBACKS 中的旧密钥也能通过验证
+    - 只在会话被修改、新建或即将过期时写入存储
+    - 静态文件请求不读取会话
+    """
+
+    salt = 'server-side-session'
+    # 每写入这么多次会话清理一次过期会话
+    purge_every = 1000
+
+    def __init__(self, store):
+        self.store = store
+        self._writes = 0
+
+    def get_signer(self, app):
+        if not app.secret_key:
+            return None
+        # 验证时依次尝试所有密钥，签名时使用最后一个（当前密钥）
+        keys = list(app.config.get('SECRET_KEY_FALLBACKS') or []) + [app.secret_key]
+        return Signer(keys, salt=self.salt, key_derivation='hmac')
+
+    def open_session(self, app, request):
+        signer = self.get_signer(app)
+        if signer is None:
+            return None
+        if app.static_url_path and request.path.startswith(app.static_url_path + '/'):
+            return ServerSideSession(sid=new_session_id(), new=True)
+
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = signer.unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid and SESSION_ID_PATTERN.match(sid):
+                data = self.store.load(sid)
+                if data is not None:
+                    session = ServerSideSession(serializer.loads(data), sid=sid)
+                    session.resign = cookie != signer.sign(sid).decode()
+                    return session
+        return ServerSideSession(sid=new_session_id(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+
+        if not session:
+            # 会话被清空（如退出登录）时删除存储中的数据和 Cookie
+            if not session.new and session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        if not (session.modified or session.new or session.resign
+                or self.should_set_cookie(app, session)):
+            return
+
+        expires_at = time.time() + app.permanent_session_lifetime.total_seconds()
+        self.store.save(session.sid, serializer.dumps(dict(session)), expires_at)
+        self._maybe_purge()
+
+        response.set_cookie(
+            name,
+            self.get_signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def _maybe_purge(self):
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.store.purge()
+
+
+def init_sessions(app):
+    """
+    配置签名密钥和会话存储
+
+    SESSION_BACKEND 为 cookie 时保留 Flask 默认的 Cookie 会话；
+    也可以把实现了 load/save/delete/purge 的存储对象直接赋给 SESSION_BACKEND
+    """
+    configure_secret_key(app)
+
+    backend = app.config.get('SESSION_BACKEND', 'sqlite')
+    if backend == 'cookie':
+        return
+    if isinstance(backend, str):
+        if backend not in SESSION_BACKENDS:
+            raise ValueError(f'未知的会话存储: {backend}')
+        store_class, default_path = SESSION_BACKENDS[backend]
+        store = store_class(app.config.get('SESSION_PATH') or os.path.join(app.instance_path, default_path))
+    else:
+        store = backend
+
+    ttl = app.config.get('SESSION_CACHE_TTL', 0)
+    if ttl > 0:
+        store = CachedSessionStore(store, maxsize=app.config.get('SESSION_CACHE_SIZE', 1024), ttl=ttl)
+    app.session_interface = ServerSideSessionInterface(store)
+    user_logged_in.connect(_regenerate_session_id, app)
+
+
+def _regenerate_session_id(sender, user):
+    if isinstance(session._get_current_object(), ServerSideSession):
+        session.regenerate()
@@ -0,0 +1,49 @@
+/**
+ * 离线模式
+ * 注册 Service Worker，通知其预取已解锁关卡，恢复联网后提交离线时保存的答案
+ *
+ * 每个页面把当前登录用户（<body data-user-id>）告诉 Service Worker，
+ * 离线答案按用户保存，只重放给同一用户
+ */
+
+(function() {
+    if (!('serviceWorker' in navigator)) {
+        return;
+    }
+
+    function post(message) {
+        navigator.serviceWorker.ready.then(registration => {
+            if (registration.active) {
+                registration.active.postMessage(message);
+            }
+        });
+    }
+
+    navigator.serviceWorker.register('/service-worker.js').catch(error => {
+        console.error('Service Worker 注册失败:', error);
+    });
+
+    function currentUser() {
+        const userId = document.body && document.body.dataset.userId;
+        return userId ? Number(userId) : null;
+    }
+
+    window.addEventListener('online', () => post({ type: 'replay', userId: currentUser() }));
+
+    document.addEventListener('DOMContentLoaded', () => {
+        // 游戏页面：预取已解锁关卡的答题页面和题目数据
+        const urls = [];
+        document.querySelectorAll('.level-card.unlocked').forEach(card => {
+            ['playUrl', 'quizDataUrl'].forEach(key => {
+                if (card.dataset[key]) {
+                    urls.push(card.dataset[key]);
+                }
+            });
+        });
+        if (urls.length) {
+            post({ type: 'prefetch', urls: urls });
+        }
+        // 登录页等未登录页面发送 null，Service Worker 随之停止重放
+        post({ type: navigator.onLine ? 'replay' : 'session', userId: currentUser() });
+    });
+})();
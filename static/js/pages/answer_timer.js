@@ -0,0 +1,11 @@
+// 如果是未答题状态，记录答题时间
+document.addEventListener('DOMContentLoaded', function() {
+    const startTime = Date.now();
+    const timeSpentInput = document.getElementById('time-spent');
+
+    document.getElementById('answer-form').addEventListener('submit', function() {
+        const endTime = Date.now();
+        const timeSpent = Math.floor((endTime - startTime) / 1000); // 转换为秒
+        timeSpentInput.value = timeSpent;
+    });
+});
@@ -0,0 +1,15 @@
+// 修复JavaScript错误
+document.addEventListener('DOMContentLoaded', function() {
+    // 确保元素存在再操作
+    const levelCards = document.querySelectorAll('.level-card');
+    if (levelCards) {
+        levelCards.forEach(card => {
+            card.addEventListener('click', function() {
+                // 直接进入答题页面，与离线预取的地址一致
+                if (this.classList.contains('unlocked') || this.classList.contains('completed')) {
+                    window.location.href = this.dataset.playUrl;
+                }
+            });
+        });
+    }
+});
@@ -0,0 +1,142 @@
+// 调试功能
+document.getElementById('debug-toggle').addEventListener('click', function() {
+    const panel = document.querySelector('.debug-panel');
+    panel.style.display = panel.style.display === 'none' ? 'block' : 'none';
+    this.textContent = panel.style.display === 'none' ? '显示调试信息' : '隐藏调试信息';
+});
+
+function debugLog(message) {
+    const logElement = document.getElementById('debug-log');
+    logElement.innerHTML += `[${new Date().toLocaleTimeString()}] ${message}<br>`;
+    logElement.scrollTop = logElement.scrollHeight;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const quizContainer = document.querySelector('.quiz-container');
+    const correctMessages = JSON.parse(quizContainer.dataset.correctMessages);
+    const wrongMessages = JSON.parse(quizContainer.dataset.wrongMessages);
+
+    // 从data属性获取数据（页面不包含答案，判分由服务端完成）
+    const levelId = quizContainer.dataset.levelId;
+    const questionId = parseInt(quizContainer.dataset.questionId);
+    const currentIndex = parseInt(quizContainer.dataset.questionIndex);
+    const totalQuestions = parseInt(quizContainer.dataset.totalQuestions);
+    let remainingHearts = parseInt(quizContainer.dataset.hearts);
+    const questionType = quizContainer.dataset.questionType;
+    const checkUrl = quizContainer.dataset.checkUrl;
+
+    debugLog(`游戏数据加载完成: 生命值=${remainingHearts}, 题目类型=${questionType}`);
+
+    // 初始化红心显示
+    document.querySelectorAll('.heart').forEach((heart, index) => {
+        heart.classList.toggle('lost', index >= remainingHearts);
+    });
+
+    // 获取DOM元素
+    const answerInputs = document.querySelectorAll('input[name="answer"]');
+    const submitBtn = document.getElementById('submit-btn');
+    const feedback = document.getElementById('feedback');
+    const feedbackCard = document.getElementById('feedback-card');
+    const feedbackTitle = document.getElementById('feedback-title');
+    const feedbackMessage = document.getElementById('feedback-message');
+    const nextBtn = document.getElementById('next-btn');
+
+    // 选项变更事件
+    answerInputs.forEach((input) => {
+        input.addEventListener('change', function() {
+            submitBtn.disabled = false;
+            debugLog(`选项变更: 值: ${this.value}`);
+        });
+    });
+
+    // 提交按钮事件
+    submitBtn.addEventListener('click', async function(e) {
+        e.preventDefault();
+
+        const selected = document.querySelector('input[name="answer"]:checked');
+        if (!selected) {
+            debugLog('请先选择答案');
+            return;
+        }
+
+        // 选择题提交选项ID列表，判断题提交布尔值
+        const answer = questionType === 'multiple_choice'
+            ? [selected.value]
+            : selected.value === 'true';
+
+        submitBtn.disabled = true;
+        let result;
+        try {
+            const response = await fetch(checkUrl, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({question_id: questionId, answer: answer})
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            result = await response.json();
+        } catch (error) {
+            debugLog(`判分失败: ${error.message}`);
+            submitBtn.disabled = false;
+            return;
+        }
+        const isCorrect = result.is_correct;
+
+        debugLog(`答案验证: 选择=${selected.value}, 结果=${isCorrect}`);
+
+        // 随机选择提示语
+        const randomMessage = isCorrect
+            ? correctMessages[Math.floor(Math.random() * correctMessages.length)]
+            : wrongMessages[Math.floor(Math.random() * wrongMessages.length)];
+
+        // 更新UI状态
+        feedbackCard.className = 'feedback-card ' + (isCorrect ? 'feedback-correct' : 'feedback-wrong');
+        feedbackTitle.textContent = isCorrect ? '太棒了！' : '答错了';
+        feedbackMessage.textContent = isCorrect
+            ? randomMessage
+            : `${randomMessage}\n正确答案: ${result.correct_answer}`;
+
+        // 更新生命值
+        if (!isCorrect && remainingHearts > 0) {
+            remainingHearts--;
+            debugLog(`剩余生命值: ${remainingHearts}`);
+
+            // 更新红心显示
+            document.querySelectorAll('.heart').forEach((heart, index) => {
+                heart.classList.toggle('lost', index >= remainingHearts);
+            });
+
+            if (remainingHearts <= 0) {
+                feedbackMessage.textContent += '\n生命值用尽，闯关失败';
+                nextBtn.textContent = '返回关卡';
+            }
+        }
+
+        // 显示反馈
+        feedback.classList.add('show');
+
+        // 自动跳转（仅在生命值未耗尽时）
+        if (remainingHearts > 0) {
+            setTimeout(() => {
+                handleNextQuestion();
+            }, 1500);
+        }
+    });
+
+    // 下一题按钮事件
+    nextBtn.addEventListener('click', handleNextQuestion);
+
+    function handleNextQuestion() {
+        feedback.classList.remove('show');
+
+        if (remainingHearts <= 0) {
+            window.location.href = quizContainer.dataset.exitUrl;
+        } else if (currentIndex < totalQuestions - 1) {
+            const nextUrl = `/quiz/${levelId}/${currentIndex + 1}?hearts=${remainingHearts}`;
+            window.location.href = nextUrl;
+        } else {
+            window.location.href = quizContainer.dataset.resultUrl;
+        }
+    }
+});
@@ -170,8 +170,302 @@ class QuizCore {
     }
 }
 
+/**
+ * 单页答题会话
+ * 一次加载整关题目，在前端完成答题流程，答案按批次提交到服务器
+ */
+class QuizSession {
+    /**
+     * @param {HTMLElement} container - 带有 data-quiz-url 的答题容器
+     * @param {number} batchSize - 每攒够多少道题提交一次
+     */
+    constructor(container, batchSize = 5) {
+        this.container = container;
+        this.batchSize = batchSize;
+        this.index = 0;
+        this.pending = [];
+        this.score = 0;
+        this.correctCount = 0;
+        this.questionStart = Date.now();
+        this.finished = false;
+
+        this.heartsEl = container.querySelector('.hearts');
+        this.progressBar = container.querySelector('.progress');
+        this.numberEl = document.getElementById('question-number');
+        this.scoreEl = document.getElementById('question-score');
+        this.contentEl = document.getElementById('question-content');
+        this.bodyEl = document.getElementById('question-body');
+        this.submitBtn = document.getElementById('submit-btn');
+        this.feedbackOverlay = document.getElementById('feedback');
+        this.feedbackCard = document.getElementById('feedback-card');
+        this.feedbackTitle = document.getElementById('feedback-title');
+        this.feedbackMessage = document.getElementById('feedback-message');
+        this.nextBtn = document.getElementById('next-btn');
+
+        this.submitBtn.addEventListener('click', this.handleSubmit.bind(this));
+        this.nextBtn.addEventListener('click', this.handleNext.bind(this));
+    }
+
+    /**
+     * 加载整关题目
+     */
+    async start() {
+        const response = await fetch(this.container.dataset.quizUrl, { credentials: 'same-origin' });
+        this.data = await response.json();
+        this.questions = this.data.questions;
+        this.hearts = this.data.hearts;
+
+        if (!this.questions.length) {
+            this.contentEl.textContent = '本关暂无题目';
+            return;
+        }
+        this.renderHearts();
+        this.showQuestion(0);
+    }
+
+    renderHearts() {
+        this.heartsEl.innerHTML = '';
+        for (let i = 0; i < this.data.hearts; i++) {
+            const heart = document.createElement('div');
+            heart.className = 'heart' + (i >= this.hearts ? ' lost' : '');
+            this.heartsEl.appendChild(heart);
+        }
+    }
+
+    /**
+     * 显示指定序号的题目
+     * @param {number} index - 题目序号
+     */
+    showQuestion(index) {
+        const question = this.questions[index];
+        this.index = index;
+        this.questionStart = Date.now();
+
+        this.numberEl.textContent = `第 ${index + 1} 题`;
+        this.scoreEl.textContent = `${question.score}分`;
+        this.contentEl.textContent = question.content;
+        this.progressBar.style.width = `${(index + 1) / this.questions.length * 100}%`;
+        this.submitBtn.disabled = true;
+
+        this.bodyEl.innerHTML = '';
+        this.bodyEl.appendChild(this.renderAnswerArea(question));
+    }
+
+    /**
+     * 根据题型生成作答区域
+     * @param {Object} question - 题目数据
+     * @returns {HTMLElement}
+     */
+    renderAnswerArea(question) {
+        const area = document.createElement('div');
+        area.className = 'options';
+
+        let choices = null;
+        let inputType = 'radio';
+        if (question.question_type === 'multiple_choice') {
+            choices = question.options.map((option, i) => ({
+                value: (option && typeof option === 'object') ? option.id : String(i),
+                label: (option && typeof option === 'object') ? option.content : option
+            }));
+            if (question.multiple_answers) {
+                inputType = 'checkbox';
+            }
+        } else if (question.question_type === 'true_false') {
+            choices = [{ value: 'true', label: '正确' }, { value: 'false', label: '错误' }];
+        }
+
+        if (choices) {
+            choices.forEach(choice => {
+                const label = document.createElement('label');
+                const input = document.createElement('input');
+                input.type = inputType;
+                input.name = 'answer';
+                input.value = choice.value;
+                input.addEventListener('change', () => {
+                    area.querySelectorAll('label').forEach(l => {
+                        l.classList.toggle('selected', l.querySelector('input').checked);
+                    });
+                    this.submitBtn.disabled = !area.querySelector('input:checked');
+                });
+                label.appendChild(input);
+                label.appendChild(document.createTextNode(choice.label));
+                area.appendChild(label);
+            });
+        } else {
+            const input = document.createElement('input');
+            input.type = 'text';
+            input.name = 'answer';
+            input.className = 'blank-input';
+            input.addEventListener('input', () => {
+                this.submitBtn.disabled = !input.value.trim();
+            });
+            area.appendChild(input);
+        }
+        return area;
+    }
+
+    /**
+     * 读取当前题目的作答
+     */
+    collectAnswer(question) {
+        const inputs = this.bodyEl.querySelectorAll('input[name="answer"]');
+        if (question.question_type === 'multiple_choice') {
+            return Array.from(inputs).filter(i => i.checked).map(i => i.value);
+        }
+        if (question.question_type === 'true_false') {
+            const checked = this.bodyEl.querySelector('input[name="answer"]:checked');
+            return checked ? checked.value === 'true' : null;
+        }
+        return inputs.length ? inputs[0].value.trim() : '';
+    }
+
+    /**
+     * 由服务器判断当前题目的答案（题目数据中不含答案）
+     * @returns {Promise<Object|null>} 判分结果，断网或请求失败时为null
+     */
+    async check(question, answer) {
+        try {
+            const response = await fetch(this.data.check_url, {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ question_id: question.id, answer: answer })
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return await response.json();
+        } catch (error) {
+            console.error('判分失败:', error);
+            return null;
+        }
+    }
+
+    async handleSubmit(event) {
+        event.preventDefault();
+        if (this.submitBtn.disabled) {
+            return;
+        }
+        this.submitBtn.disabled = true;
+
+        const question = this.questions[this.index];
+        const answer = this.collectAnswer(question);
+        this.pending.push({
+            question_id: question.id,
+            answer: answer,
+            time_spent: Math.round((Date.now() - this.questionStart) / 1000)
+        });
+
+        const result = await this.check(question, answer);
+        const isLast = this.index === this.questions.length - 1;
+        // 无法判分时立即提交，断网时由 Service Worker 保存到离线队列
+        this.queued = false;
+        if (result === null || isLast || this.pending.length >= this.batchSize) {
+            const submitted = await this.flush();
+            this.queued = !!(submitted && submitted.queued);
+        }
+
+        if (result && result.is_correct) {
+            this.score += result.score;
+            this.correctCount++;
+        } else if (result) {
+            this.hearts--;
+            this.renderHearts();
+        }
+        this.showFeedback(result);
+    }
+
+    /**
+     * 提交尚未发送的答案
+     * @returns {Promise<Object|null>} 服务器判分结果
+     */
+    async flush() {
+        if (!this.pending.length) {
+            return null;
+        }
+        const batch = this.pending;
+        this.pending = [];
+        try {
+            const response = await fetch(this.data.submit_url, {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ answers: batch })
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return await response.json();
+        } catch (error) {
+            console.error('提交答案失败:', error);
+            // 放回队列，下次提交时重试
+            this.pending = batch.concat(this.pending);
+            return null;
+        }
+    }
+
+    /**
+     * 显示判分结果
+     * @param {Object|null} result - check 接口的返回值，无法判分时为null
+     */
+    showFeedback(result) {
+        const isLast = this.index === this.questions.length - 1;
+        this.finished = isLast || this.hearts <= 0;
+
+        let message;
+        if (!result) {
+            this.feedbackCard.className = 'feedback-card';
+            this.feedbackTitle.textContent = '答案已保存';
+            message = this.queued ? '网络已断开，联网后自动提交并判分' : '暂时无法判分，答案已提交';
+        } else if (result.is_correct) {
+            this.feedbackCard.className = 'feedback-card feedback-correct';
+            this.feedbackTitle.textContent = '太棒了！';
+            message = '答对了！继续加油！';
+        } else {
+            this.feedbackCard.className = 'feedback-card feedback-wrong';
+            this.feedbackTitle.textContent = '答错了';
+            message = '再仔细想想～';
+            if (result.correct_answer) {
+                message += `\n正确答案: ${result.correct_answer}`;
+            }
+            if (result.explanation) {
+                message += `\n${result.explanation}`;
+            }
+        }
+        if (result && this.queued) {
+            message += '\n网络已断开，答案已保存，联网后自动提交';
+        }
+        if (this.hearts <= 0) {
+            message += '\n生命值用尽，闯关失败';
+        } else if (isLast) {
+            message += `\n本关得分: ${this.score}，答对 ${this.correctCount}/${this.questions.length} 题`;
+        }
+        this.feedbackMessage.textContent = message;
+        this.nextBtn.textContent = this.finished ? '返回关卡' : '下一题';
+        this.feedbackOverlay.classList.add('show');
+    }
+
+    async handleNext() {
+        this.feedbackOverlay.classList.remove('show');
+        if (this.finished) {
+            await this.flush();
+            window.location.href = this.container.dataset.finishUrl;
+        } else {
+            this.showQuestion(this.index + 1);
+        }
+    }
+}
+
 // 当DOM加载完成后初始化
 document.addEventListener('DOMContentLoaded', () => {
+    // 单页答题模式：整关题目由接口一次性加载
+    const sessionContainer = document.getElementById('quiz-session');
+    if (sessionContainer) {
+        window.quizSession = new QuizSession(sessionContainer);
+        window.quizSession.start();
+        return;
+    }
+
     // 创建核心实例
     window.quizCore = new QuizCore();
     
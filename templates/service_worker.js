@@ -0,0 +1,353 @@
+/**
+ * 离线模式 Service Worker
+ * - 安装时缓存应用外壳（静态资源和离线页面）
+ * - 页面请求优先走网络，断网时返回缓存的页面
+ * - 关卡题目接口先返回缓存再后台更新；游戏页面通知预取已解锁关卡
+ * - 断网时提交的答案按用户保存在 IndexedDB 中，恢复联网后合并为一次批量提交，只提交当前登录用户的答案
+ *
+ * 由 /service-worker.js 渲染，资源列表变化时脚本内容随之变化，浏览器会安装新版本
+ */
+
+const CACHE_VERSION = {{ version|tojson }};
+const SHELL_CACHE = `shell-${CACHE_VERSION}`;
+const PAGE_CACHE = `pages-${CACHE_VERSION}`;
+const API_CACHE = `api-${CACHE_VERSION}`;
+
+const PRECACHE_URLS = {{ precache_urls|tojson }};
+const OFFLINE_URL = {{ offline_url|tojson }};
+const REPLAY_URL = {{ replay_url|tojson }};
+// 静态资源地址带内容哈希时可以直接使用缓存，不必再请求服务器
+const IMMUTABLE_STATIC = {{ immutable_static|tojson }};
+
+const STATIC_PREFIX = '/static/';
+const QUIZ_DATA_PATTERN = /^\/api\/level\/\d+\/quiz$/;
+const ANSWER_PATTERNS = [/^\/api\/level\/\d+\/answers$/, /^\/api\/answers$/];
+// 这些页面与登录状态有关，不缓存
+const UNCACHED_PAGES = ['/login', '/register', '/logout'];
+
+const DB_NAME = 'quiz-offline';
+const ANSWER_STORE = 'answers';
+const SESSION_STORE = 'session';
+const SYNC_TAG = 'replay-answers';
+
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS.concat([OFFLINE_URL])))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    const current = [SHELL_CACHE, PAGE_CACHE, API_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => !current.includes(key)).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+            .then(() => replayAnswers())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (request.method === 'POST' && ANSWER_PATTERNS.some(p => p.test(url.pathname))) {
+        event.respondWith(submitOrQueue(request));
+    } else if (request.method !== 'GET') {
+        return;
+    } else if (url.pathname === '/logout') {
+        event.respondWith(logout(request));
+    } else if (url.pathname.startsWith(STATIC_PREFIX)) {
+        event.respondWith(IMMUTABLE_STATIC ? cacheFirst(request, SHELL_CACHE) : staleWhileRevalidate(request, SHELL_CACHE));
+    } else if (QUIZ_DATA_PATTERN.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(request, API_CACHE));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(networkFirstPage(request, url));
+    }
+});
+
+self.addEventListener('message', event => {
+    const data = event.data || {};
+    if (data.type === 'prefetch') {
+        event.waitUntil(prefetch(data.urls || []));
+    } else if (data.type === 'session') {
+        event.waitUntil(setSessionUser(data.userId));
+    } else if (data.type === 'replay') {
+        event.waitUntil(setSessionUser(data.userId).then(() => replayAnswers()));
+    }
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replayAnswers());
+    }
+});
+
+
+/* ---------- 缓存策略 ---------- */
+
+function isCacheable(response) {
+    return response && response.ok && !response.redirected && response.type === 'basic';
+}
+
+async function cacheFirst(request, cacheName) {
+    const cached = await caches.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (isCacheable(response)) {
+        const cache = await caches.open(cacheName);
+        await cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(request, cacheName) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    const update = fetch(request).then(response => {
+        if (isCacheable(response)) {
+            return cache.put(request, response.clone()).then(() => response);
+        }
+        return response;
+    });
+    if (cached) {
+        update.catch(() => null);
+        return cached;
+    }
+    return update;
+}
+
+async function networkFirstPage(request, url) {
+    try {
+        const response = await fetch(request);
+        if (isCacheable(response) && !UNCACHED_PAGES.includes(url.pathname)) {
+            const cache = await caches.open(PAGE_CACHE);
+            await cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await caches.match(request, { ignoreVary: true });
+        return cached || caches.match(OFFLINE_URL);
+    }
+}
+
+/**
+ * 预取页面和接口数据，已缓存的地址跳过，避免每次打开游戏页面都重复请求
+ */
+async function prefetch(urls) {
+    await Promise.all(urls.map(async url => {
+        const cacheName = QUIZ_DATA_PATTERN.test(new URL(url, self.location.origin).pathname) ? API_CACHE : PAGE_CACHE;
+        const cache = await caches.open(cacheName);
+        if (await cache.match(url)) {
+            return;
+        }
+        try {
+            const response = await fetch(url, { credentials: 'same-origin' });
+            if (isCacheable(response)) {
+                await cache.put(url, response);
+            }
+        } catch (error) {
+            // 断网时跳过，下次打开游戏页面再预取
+        }
+    }));
+}
+
+/**
+ * 退出登录前先尝试提交离线答案，并清除与当前用户有关的页面和接口缓存
+ *
+ * 断网时同样清除缓存并返回离线页面，未提交的答案留在队列中，该用户下次登录后再提交
+ */
+async function logout(request) {
+    await replayAnswers().catch(() => null);
+    try {
+        return await fetch(request);
+    } catch (error) {
+        return caches.match(OFFLINE_URL);
+    } finally {
+        await Promise.all([caches.delete(PAGE_CACHE), caches.delete(API_CACHE), setSessionUser(null)]);
+    }
+}
+
+
+/* ---------- 离线答案队列 ---------- */
+
+function openDatabase() {
+    return new Promise((resolve, reject) => {
+        const open = indexedDB.open(DB_NAME, 2);
+        open.onupgradeneeded = () => {
+            const db = open.result;
+            if (!db.objectStoreNames.contains(ANSWER_STORE)) {
+                db.createObjectStore(ANSWER_STORE, { autoIncrement: true });
+            }
+            if (!db.objectStoreNames.contains(SESSION_STORE)) {
+                db.createObjectStore(SESSION_STORE);
+            }
+        };
+        open.onsuccess = () => resolve(open.result);
+        open.onerror = () => reject(open.error);
+    });
+}
+
+function transaction(db, mode, callback, storeName = ANSWER_STORE) {
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(storeName, mode);
+        const result = callback(tx.objectStore(storeName));
+        tx.oncomplete = () => resolve(result && 'result' in result ? result.result : undefined);
+        tx.onerror = () => reject(tx.error);
+    });
+}
+
+// 当前登录用户，由页面通过消息告知；Service Worker 重启后从 IndexedDB 读取
+let sessionUser;
+
+async function getSessionUser() {
+    if (sessionUser === undefined) {
+        const db = await openDatabase();
+        const stored = await transaction(db, 'readonly', store => store.get('user_id'), SESSION_STORE);
+        sessionUser = stored === undefined ? null : stored;
+    }
+    return sessionUser;
+}
+
+async function setSessionUser(userId) {
+    userId = userId === undefined ? null : userId;
+    if (userId === sessionUser) {
+        return;
+    }
+    sessionUser = userId;
+    const db = await openDatabase();
+    await transaction(db, 'readwrite', store => store.put(userId, 'user_id'), SESSION_STORE);
+}
+
+async function queueAnswers(answers) {
+    const userId = await getSessionUser();
+    if (userId === null) {
+        // 不知道答案属于哪个用户时不保存，页面会保留答案稍后重试
+        throw new Error('未登录，无法保存离线答案');
+    }
+    const db = await openDatabase();
+    await transaction(db, 'readwrite', store => store.add({ user_id: userId, answers: answers, queued_at: Date.now() }));
+    if (self.registration.sync) {
+        await self.registration.sync.register(SYNC_TAG).catch(() => null);
+    }
+}
+
+/**
+ * 提交答案，断网时写入队列并返回 202，页面提示答案已保存并继续答题
+ */
+async function submitOrQueue(request) {
+    const body = await request.clone().json().catch(() => null);
+    try {
+        const response = await fetch(request);
+        replayAnswers();
+        return response;
+    } catch (error) {
+        if (!body || !Array.isArray(body.answers)) {
+            throw error;
+        }
+        await queueAnswers(body.answers);
+        return new Response(JSON.stringify({ queued: true, results: [] }), {
+            status: 202,
+            headers: { 'Content-Type': 'application/json' }
+        });
+    }
+}
+
+let replaying = null;
+
+/**
+ * 将当前用户在队列中的答案合并为一次请求提交到跨关卡批量接口
+ *
+ * 服务器按 (用户, 题目) 写入答案，重复提交不会产生重复记录，已删除的题目直接跳过，
+ * 比已保存答案更早作答的离线答案（如之后又在线答过同一题）不会覆盖已保存的答案；
+ * 请求附带用户ID，服务器发现登录用户不同时返回 409。
+ * 提交失败、登录失效或用户不符时保留队列；合并的请求有误（400）时逐条重新提交，只丢弃本身有误的那一批
+ */
+function replayAnswers() {
+    if (!replaying) {
+        replaying = doReplay().finally(() => { replaying = null; });
+    }
+    return replaying;
+}
+
+function deleteEntries(db, keys) {
+    return transaction(db, 'readwrite', store => keys.forEach(key => store.delete(key)));
+}
+
+/**
+ * 队列条目中的答案，附带离线保存的时间，服务器据此跳过比已保存答案更早的离线答案
+ */
+function entryAnswers(entry) {
+    return entry.answers.map(answer => Object.assign({}, answer, { queued_at: entry.queued_at }));
+}
+
+/**
+ * 提交一组答案
+ * @returns {Promise<string>} 'done' 已保存；'invalid' 数据有误；'retry' 需要稍后重试
+ */
+async function postAnswers(userId, answers) {
+    let response;
+    try {
+        response = await fetch(REPLAY_URL, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ user_id: userId, answers: answers, skip_unknown: true, sent_at: Date.now() })
+        });
+    } catch (error) {
+        return 'retry';
+    }
+    if (response.ok && !response.redirected) {
+        return 'done';
+    }
+    return response.status === 400 ? 'invalid' : 'retry';
+}
+
+async function doReplay() {
+    const userId = await getSessionUser();
+    if (userId === null) {
+        return;
+    }
+    const db = await openDatabase();
+    const [keys, entries] = await Promise.all([
+        transaction(db, 'readonly', store => store.getAllKeys()),
+        transaction(db, 'readonly', store => store.getAll())
+    ]);
+    if (!entries || !entries.length) {
+        return;
+    }
+
+    // 旧版本保存的答案没有记录用户，无法确定归属，直接丢弃
+    const untagged = keys.filter((key, i) => entries[i].user_id === undefined);
+    if (untagged.length) {
+        await deleteEntries(db, untagged);
+    }
+    const mine = keys.map((key, i) => ({ key: key, entry: entries[i] }))
+        .filter(item => item.entry.user_id === userId);
+    if (!mine.length) {
+        return;
+    }
+
+    const answers = mine.reduce((all, item) => all.concat(entryAnswers(item.entry)), []);
+    const status = await postAnswers(userId, answers);
+    if (status === 'retry') {
+        return;
+    }
+    if (status === 'invalid' && mine.length > 1) {
+        for (const item of mine) {
+            if (await postAnswers(userId, entryAnswers(item.entry)) === 'retry') {
+                return;
+            }
+            await deleteEntries(db, [item.key]);
+        }
+        return;
+    }
+    await deleteEntries(db, mine.map(item => item.key));
+}
@@ -0,0 +1,36 @@
+"""
+模板编译缓存
+- Jinja 字节码缓存保存在实例目录中，worker 重启后不必重新编译模板
+- 可选的启动预热：预先编译 templates/ 下的全部模板
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_templates(app):
+    """
+    配置 Jinja 字节码缓存，必须在首次访问 app.jinja_env 之前调用
+
+    TEMPLATE_BYTECODE_CACHE_DIR 为空时使用实例目录下的 jinja_cache
+    """
+    if not app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        return
+    cache_dir = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(cache_dir))
+
+
+def warm_templates(app):
+    """
+    预编译全部模板，编译结果进入 jinja_env 的模板缓存（并写入字节码缓存）
+
+    返回:
+    - 编译的模板数量
+    """
+    env = app.jinja_env
+    names = env.list_templates(extensions=['html'])
+    for name in names:
+        env.get_template(name)
+    return len(names)
@@ -0,0 +1,108 @@
+"""
+测试公共配置
+
+导入应用之前把数据库、会话和签名密钥都指向临时目录，测试不会读写 instance/ 中的数据
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix='quiz-test-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp, 'quiz.db')
+os.environ['SESSION_PATH'] = os.path.join(_tmp, 'sessions.db')
+os.environ['SECRET_KEY'] = 'test-secret-key'
+os.environ['CONTENT_PACK'] = ''
+
+
+def _reset_caches():
+    # 缓存是进程级的，每个测试从空缓存开始
+    from course_tree import course_graph_cache
+    from question_cache import question_bundle_cache
+    from user_cache import user_identity_cache
+
+    course_graph_cache.invalidate()
+    question_bundle_cache.invalidate()
+    user_identity_cache.invalidate()
+
+
+@pytest.fixture
+def app():
+    """
+    应用和空的临时 SQLite 数据库，测试结束后删除全部表
+
+    fixture 本身不保持应用上下文：与生产环境一样，测试客户端的每个请求使用独立的上下文和数据库会话，
+    测试中直接读写数据库时用 with app.app_context() 包裹
+    """
+    from app import app as flask_app
+    from models import db
+
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        db.create_all()
+    _reset_caches()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+    _reset_caches()
+
+
+@pytest.fixture
+def user_id(app):
+    """已注册的用户，返回用户ID"""
+    from models import db, User
+
+    with app.app_context():
+        user = User(username='kid', password=generate_password_hash('secret1'))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user_id):
+    """已登录的测试客户端"""
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'kid', 'password': 'secret1'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def count_statements(app):
+    """
+    统计代码块中执行的 SQL 语句
+
+        with count_statements() as statements:
+            ...
+        assert len(statements) == 2
+    """
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', on_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', on_execute)
+
+    return counter
@@ -0,0 +1,122 @@
+"""
+答案提交：请求数据校验和逐题提交页面
+"""
+
+import pytest
+
+from answer_service import AnswerSubmissionError, submit_answers
+from models import (db, Course, KnowledgePoint, Level, MultipleChoiceQuestion, QuestionKnowledgePoint, Unit,
+                    UserAnswer, UserLevelSummary)
+
+
+@pytest.fixture
+def question(app):
+    """一门课程、一个关卡和一道带知识点的选择题，返回 (题目ID, 关卡ID, 课程ID)"""
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        level = Level(unit=unit, title='大青树下的小学', order=1)
+        question = MultipleChoiceQuestion(
+            level=level, content='小鸟们的学校在哪里？', score=5, order=1, difficulty=2,
+            options=[{'id': 'A', 'content': '大青树上'}, {'id': 'B', 'content': '森林里'}],
+            correct_answer=['A'], explanation='学校在大青树上。')
+        knowledge_point = KnowledgePoint(name='课文内容理解')
+        db.session.add_all([course, unit, level, question, knowledge_point])
+        db.session.flush()
+        db.session.add(QuestionKnowledgePoint(question_id=question.id, knowledge_point_id=knowledge_point.id))
+        db.session.commit()
+        return question.id, level.id, course.id
+
+
+@pytest.mark.parametrize('question_id', [[1], {'id': 1}, '1', True, None])
+def test_submit_answers_rejects_non_integer_question_id(app, user_id, question, question_id):
+    with app.app_context(), pytest.raises(AnswerSubmissionError):
+        submit_answers(user_id, [{'question_id': question_id, 'answer': ['A']}])
+
+
+@pytest.mark.parametrize('item', [{}, {'answer': None}])
+def test_submit_answers_rejects_missing_answer(app, user_id, question, item):
+    question_id, _, _ = question
+    with app.app_context(), pytest.raises(AnswerSubmissionError):
+        submit_answers(user_id, [dict(item, question_id=question_id)])
+
+
+def test_answer_apis_return_400_for_missing_answer(app, client, question):
+    question_id, level_id, _ = question
+    response = client.post(f'/api/level/{level_id}/answers', json={'answers': [{'question_id': question_id}]})
+    assert response.status_code == 400
+    response = client.post('/api/answers', json={'answers': [{'question_id': question_id, 'answer': None}]})
+    assert response.status_code == 400
+    response = client.post(f'/api/level/{level_id}/check', json={'question_id': question_id})
+    assert response.status_code == 400
+    assert client.post(f'/question/{question_id}/answer', data={}).status_code == 400
+    with app.app_context():
+        assert UserAnswer.query.count() == 0 and UserLevelSummary.query.count() == 0
+
+
+def test_answer_apis_return_400_for_unhashable_question_id(client, question):
+    question_id, level_id, _ = question
+    response = client.post('/api/answers', json={'answers': [{'question_id': [question_id], 'answer': ['A']}]})
+    assert response.status_code == 400
+    response = client.post(f'/api/level/{level_id}/answers',
+                           json={'answers': [{'question_id': {'id': question_id}, 'answer': ['A']}]})
+    assert response.status_code == 400
+
+
+def test_answer_question_renders_from_cached_bundle(client, question, count_statements):
+    question_id, level_id, course_id = question
+    # 先加载题目包和课程结构
+    client.get(f'/game/{course_id}')
+    client.get(f'/quiz/{level_id}/0')
+
+    with count_statements() as statements:
+        response = client.post(f'/question/{question_id}/answer', data={'option': 'B'})
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert '回答错误' in page and '学校在大青树上。' in page and '课文内容理解' in page
+    assert f'/game/{course_id}' in page
+
+    # 所属关卡 + 答案、答题记录、关卡汇总、知识点汇总、关卡进度；渲染页面不再重新加载题目
+    assert len(statements) == 6
+    assert not [s for s in statements if 'FROM knowledge_point' in s or 'FROM level' in s or 'FROM unit' in s]
+
+
+def test_replayed_offline_answer_does_not_overwrite_newer_answer(app, client, user_id, question):
+    question_id, _, _ = question
+    # 在线答对
+    assert client.post('/api/answers', json={'answers': [{'question_id': question_id, 'answer': ['A']}]}).status_code == 200
+
+    # 一分钟前离线保存的错误答案稍后重放，不覆盖在线答案
+    sent_at = 1_700_000_000_000
+    response = client.post('/api/answers', json={
+        'user_id': user_id, 'skip_unknown': True, 'sent_at': sent_at,
+        'answers': [{'question_id': question_id, 'answer': ['B'], 'queued_at': sent_at - 60_000}],
+    })
+    assert response.status_code == 200
+    assert response.get_json()['stale'] == [question_id]
+    with app.app_context():
+        answer = UserAnswer.query.filter_by(user_id=user_id, question_id=question_id).one()
+        assert answer.answer_content == ['A']
+        summary = UserLevelSummary.query.filter_by(user_id=user_id).one()
+        assert summary.correct_count == 1
+
+
+def test_replayed_offline_answer_overwrites_older_answer(app, client, user_id, question):
+    question_id, _, _ = question
+    assert client.post('/api/answers', json={'answers': [{'question_id': question_id, 'answer': ['A']}]}).status_code == 200
+    with app.app_context():
+        db.session.execute(db.update(UserAnswer).values(attempt_time=db.func.datetime('now', '-1 hour')))
+        db.session.commit()
+
+    # 离线答案在已保存答案之后作答，照常写入，attempt_time 记为作答时间
+    sent_at = 1_700_000_000_000
+    response = client.post('/api/answers', json={
+        'user_id': user_id, 'sent_at': sent_at,
+        'answers': [{'question_id': question_id, 'answer': ['B'], 'queued_at': sent_at - 600_000}],
+    })
+    assert response.get_json()['stale'] == []
+    with app.app_context():
+        answer = UserAnswer.query.filter_by(user_id=user_id, question_id=question_id).one()
+        assert answer.answer_content == ['B'] and not answer.is_correct
+        now = db.session.scalar(db.select(db.func.now()))
+        assert abs((now - answer.attempt_time).total_seconds() - 600) < 5
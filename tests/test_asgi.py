@@ -0,0 +1,75 @@
+"""
+ASGI 入口
+
+通过 ASGI 协议（scope/receive/send）直接调用 asgi:app，确认请求头、分块发送的请求体和响应都能经过 a2wsgi 传递
+"""
+
+import asyncio
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+import pytest
+
+pytest.importorskip('a2wsgi')
+
+
+def _request(app, method, path, body=b'', headers=(), chunk_size=16):
+    """发送一个 HTTP 请求，请求体按 chunk_size 分块交给应用，返回 (状态码, 响应头, 响应体)"""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b'']
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')] + [(k.lower().encode(), v.encode()) for k, v in headers],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    messages = []
+
+    async def run():
+        queue = asyncio.Queue()
+        for i, chunk in enumerate(chunks):
+            queue.put_nowait({'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1})
+
+        async def receive():
+            if queue.empty():
+                # 请求体已发完，之后只可能收到断开连接
+                await asyncio.Event().wait()
+            return queue.get_nowait()
+
+        async def send(message):
+            messages.append(message)
+
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+    start = messages[0]
+    assert start['type'] == 'http.response.start'
+    headers = [(k.decode(), v.decode()) for k, v in start['headers']]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], headers, body
+
+
+def test_get_and_post_through_asgi(app, user_id, monkeypatch):
+    monkeypatch.setenv('SERVER_MODE', 'asgi')
+    from asgi import app as asgi_app
+
+    status, _, body = _request(asgi_app, 'GET', '/login')
+    assert status == 200
+    assert b'name="username"' in body
+
+    form = urlencode({'username': 'kid', 'password': 'secret1'}).encode()
+    status, headers, _ = _request(asgi_app, 'POST', '/login', body=form, headers=[
+        ('Content-Type', 'application/x-www-form-urlencoded'),
+        ('Content-Length', str(len(form))),
+    ])
+    assert status == 302
+    cookie = SimpleCookie()
+    for name, value in headers:
+        if name.lower() == 'set-cookie':
+            cookie.load(value)
+    assert app.config['SESSION_COOKIE_NAME'] in cookie
+
+    # 登录成功说明分块发送的表单被完整读取，会话 Cookie 在后续请求中有效
+    session_cookie = '; '.join(f'{key}={morsel.value}' for key, morsel in cookie.items())
+    status, _, _ = _request(asgi_app, 'GET', '/grade-selection', headers=[('Cookie', session_cookie)])
+    assert status == 200
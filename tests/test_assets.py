@@ -0,0 +1,71 @@
+"""
+静态资源清单
+
+页面中的静态资源地址带内容指纹，带指纹的地址按 Accept-Encoding 返回预压缩内容，并带有 immutable 的长期缓存头
+"""
+
+import gzip
+import hashlib
+import os
+import re
+
+from assets import FINGERPRINT_MAX_AGE, static_assets
+
+
+def _read_static(app, filename):
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        return f.read()
+
+
+def _style_url(app):
+    digest = hashlib.md5(_read_static(app, 'css/style.css')).hexdigest()[:12]
+    return f'/static/css/style.{digest}.css'
+
+
+def test_pages_link_fingerprinted_assets(app):
+    page = app.test_client().get('/login').get_data(as_text=True)
+    assert _style_url(app) in page
+    assert re.search(r'/static/js/main\.\w{12}\.js', page)
+    assert '/static/css/style.css' not in page
+
+
+def test_fingerprinted_asset_is_immutable(app):
+    response = app.test_client().get(_style_url(app))
+    assert response.status_code == 200
+    assert response.data == _read_static(app, 'css/style.css')
+    assert response.cache_control.public
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == FINGERPRINT_MAX_AGE
+    assert 'Content-Encoding' not in response.headers
+
+    response = app.test_client().get(_style_url(app), headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_gzip_negotiation(app):
+    response = app.test_client().get(_style_url(app), headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.data) == _read_static(app, 'css/style.css')
+
+
+def test_brotli_preferred_when_available(app, monkeypatch):
+    # brotli 是可选依赖，这里直接给清单条目加上 br 内容，只检查编码协商
+    with app.app_context():
+        asset = static_assets.get('css/style.css')
+    monkeypatch.setitem(asset.variants, 'br', b'brotli-bytes')
+    client = app.test_client()
+
+    response = client.get(_style_url(app), headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.data == b'brotli-bytes'
+
+    response = client.get(_style_url(app), headers={'Accept-Encoding': 'br;q=0.5, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_unfingerprinted_url_is_not_immutable(app):
+    response = app.test_client().get('/static/css/style.css')
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    response.close()
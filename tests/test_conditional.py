@@ -0,0 +1,105 @@
+"""
+页面条件请求
+
+课程地图、选课页和关卡结果页带 ETag，If-None-Match 匹配时返回 304 且不执行页面查询；
+进度、答题记录或课程结构变化后 ETag 随之变化
+"""
+
+from urllib.parse import quote
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from models import db, Course, Level, TrueFalseQuestion, Unit, User
+from user_cache import user_identity_cache
+
+
+@pytest.fixture
+def course(app):
+    """一门课程、两个关卡（各一道判断题），返回 (课程ID, 第一关ID, 第一关的题目ID)"""
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        first = Level(unit=unit, title='大青树下的小学', order=1)
+        second = Level(unit=unit, title='花的学校', order=2)
+        question = TrueFalseQuestion(level=first, content='小鸟们在学校里学习唱歌。', score=5, order=1,
+                                     correct_answer=True)
+        db.session.add_all([course, unit, first, second, question,
+                            TrueFalseQuestion(level=second, content='花孩子在地下上学。', score=5, order=1,
+                                              correct_answer=True)])
+        db.session.commit()
+        return course.id, first.id, question.id
+
+
+def _answer(client, question_id, answer):
+    response = client.post('/api/answers', json={'answers': [{'question_id': question_id, 'answer': answer}]})
+    assert response.status_code == 200
+
+
+def _revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+
+def test_game_page_revalidates_until_progress_changes(client, course, count_statements):
+    course_id, _, question_id = course
+    url = f'/game/{course_id}'
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.cache_control.private and response.cache_control.no_cache
+    assert 'Cookie' in response.vary
+
+    with count_statements() as statements:
+        response = _revalidate(client, url, etag)
+    assert response.status_code == 304
+    assert response.data == b''
+    # 只查询进度版本戳，不加载课程和进度
+    assert len(statements) == 1
+
+    # 完成第一关后第二关解锁，课程地图需要重新渲染
+    _answer(client, question_id, True)
+    response = _revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_level_result_revalidates_until_answers_change(client, course):
+    _, level_id, question_id = course
+    url = f'/level/{level_id}/result'
+    _answer(client, question_id, False)
+    etag = client.get(url).headers['ETag']
+    assert _revalidate(client, url, etag).status_code == 304
+
+    # 同一秒内改答：记录数和作答时间可能不变，得分变化也要使 ETag 失效
+    _answer(client, question_id, True)
+    response = _revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_selected_course_revalidates_and_still_records_choice(app, client, user_id, course):
+    url = '/selected-course/' + quote('三年级') + '/' + quote('语文上册')
+    etag = client.get(url).headers['ETag']
+    with app.app_context():
+        User.query.filter_by(id=user_id).update({'last_grade': None, 'last_course': None})
+        db.session.commit()
+    user_identity_cache.invalidate(user_id)
+
+    assert _revalidate(client, url, etag).status_code == 304
+    # 304 时也记录用户选择的课程
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert (user.last_grade, user.last_course) == ('三年级', '语文上册')
+
+
+def test_etag_is_per_user(app, client, user_id, course):
+    course_id, _, _ = course
+    url = f'/game/{course_id}'
+    etag = client.get(url).headers['ETag']
+
+    with app.app_context():
+        db.session.add(User(username='other', password=generate_password_hash('secret2')))
+        db.session.commit()
+    other = app.test_client()
+    assert other.post('/login', data={'username': 'other', 'password': 'secret2'}).status_code == 302
+    assert _revalidate(other, url, etag).status_code == 200
@@ -0,0 +1,117 @@
+"""
+课程内容包与数据库的一致性
+
+其他进程的修改先增加 content_version 中的修改计数，各进程定期读取计数，变化后再核对版本戳
+（测试中用 SQL 直接修改数据库并增加计数来模拟）；本进程的修改立即生效
+"""
+
+import pytest
+from sqlalchemy import text
+
+from content_pack import compile_content_pack, content_packs
+from models import db, content_version, Course, Level, TrueFalseQuestion, Unit
+from question_cache import question_bundle_cache
+
+
+@pytest.fixture
+def pack(app, tmp_path, monkeypatch):
+    """两个关卡的课程编译为内容包并启用，返回 (第一关ID, 第二关ID)"""
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        levels = [Level(unit=unit, title=f'第{order}关', order=order) for order in (1, 2)]
+        db.session.add_all([course, unit] + levels + [
+            TrueFalseQuestion(level=level, content='判断题', score=5, order=1, correct_answer=True)
+            for level in levels
+        ])
+        db.session.commit()
+        level_ids = tuple(level.id for level in levels)
+
+        path = tmp_path / 'content.pack'
+        compile_content_pack(str(path))
+        monkeypatch.setattr(content_packs, 'path', str(path))
+        monkeypatch.setattr(content_packs, 'check_interval', 3600)
+        content_packs._reload()
+        assert content_packs.get().bundles.keys() == set(level_ids)
+    yield level_ids
+    content_packs._pack = None
+    content_packs._stamp = None
+
+
+def _write_elsewhere(*statements):
+    """模拟其他进程修改课程内容：执行 SQL 并在同一事务中增加修改计数"""
+    for statement, params in statements:
+        db.session.execute(text(statement), params)
+    db.session.execute(text('UPDATE content_version SET version = version + 1'))
+    db.session.commit()
+
+
+def _check_now():
+    """让下一次 get() 立即与数据库核对"""
+    content_packs._checked_at = 0.0
+    return content_packs.get()
+
+
+def test_question_changed_elsewhere_drops_level_from_pack(app, pack):
+    first, second = pack
+    with app.app_context():
+        _write_elsewhere((
+            "UPDATE question SET content = '已修改', updated_at = '2099-01-01 00:00:00' WHERE level_id = :level_id",
+            {'level_id': first}))
+        # 核对间隔内继续使用内容包
+        assert first in content_packs.get().bundles
+
+        current = _check_now()
+        assert first not in current.bundles and second in current.bundles
+        assert question_bundle_cache.get(first)['questions'][0]['content'] == '已修改'
+
+
+def test_knowledge_point_changed_elsewhere_drops_level(app, pack):
+    first, second = pack
+    with app.app_context():
+        # 题目本身没有变化，题目包中的知识点名称来自 knowledge_point 表
+        _write_elsewhere(
+            ("INSERT INTO knowledge_point (id, name) VALUES (1, '课文内容理解')", {}),
+            ('INSERT INTO question_knowledge_point (question_id, knowledge_point_id) '
+             'SELECT id, 1 FROM question WHERE level_id = :level_id', {'level_id': second}))
+        current = _check_now()
+        assert second not in current.bundles and first in current.bundles
+
+        _write_elsewhere(("UPDATE knowledge_point SET name = '词语理解' WHERE id = 1", {}))
+        assert question_bundle_cache.get(second)['knowledge_points'] == {1: '词语理解'}
+
+
+def test_structure_changed_elsewhere_disables_pack(app, pack):
+    first, _ = pack
+    with app.app_context():
+        _write_elsewhere(("UPDATE level SET title = '改名' WHERE id = :level_id", {'level_id': first}))
+        assert _check_now() is None
+        assert question_bundle_cache.get(first)['level']['title'] == '改名'
+
+
+def test_local_question_edit_drops_level_immediately(app, pack):
+    first, second = pack
+    with app.app_context():
+        question = TrueFalseQuestion.query.filter_by(level_id=first).one()
+        question.content = '本进程修改'
+        db.session.commit()
+        current = content_packs.get()
+        assert first not in current.bundles and second in current.bundles
+        assert question_bundle_cache.get(first)['questions'][0]['content'] == '本进程修改'
+
+
+def test_periodic_check_reads_only_the_change_counter(app, pack, count_statements):
+    first, second = pack
+    with app.app_context(), count_statements() as statements:
+        current = _check_now()
+    assert current.bundles.keys() == {first, second}
+    assert len(statements) == 1 and 'content_version' in statements[0]
+
+
+def test_orm_writes_bump_change_counter(app, pack):
+    first, _ = pack
+    with app.app_context():
+        before = content_version()
+        db.session.get(Level, first).content_ref = '新课文'
+        db.session.commit()
+        assert content_version() == before + 1
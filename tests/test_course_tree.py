@@ -0,0 +1,78 @@
+"""
+课程结构加载和热点页面的 SQL 语句数
+
+课程结构按层预加载，语句数不随单元和关卡数量增长；答题页完全来自缓存，关卡结果页只读汇总表
+"""
+
+from answer_service import submit_answers
+from course_tree import load_course_tree
+from models import db, Course, Level, TrueFalseQuestion, Unit
+
+
+def seed_course(app, units, levels_per_unit=3, questions_per_level=2, subject='语文'):
+    """生成一门课程，返回 (课程ID, 第一关ID)"""
+    with app.app_context():
+        course = Course(grade='三年级', subject=subject, term='上册')
+        db.session.add(course)
+        for unit_order in range(1, units + 1):
+            unit = Unit(course=course, name=f'第{unit_order}单元', order=unit_order)
+            for level_order in range(1, levels_per_unit + 1):
+                level = Level(unit=unit, title=f'第{unit_order}-{level_order}关', order=level_order)
+                for question_order in range(1, questions_per_level + 1):
+                    db.session.add(TrueFalseQuestion(level=level, content=f'判断题{question_order}',
+                                                     score=5, order=question_order, correct_answer=True))
+        db.session.commit()
+        return course.id, course.units[0].levels[0].id
+
+
+def test_load_course_tree_statements_do_not_grow_with_units(app, user_id, count_statements):
+    small, _ = seed_course(app, units=2)
+    large, _ = seed_course(app, units=8, subject='数学')
+
+    with app.app_context(), count_statements() as small_statements:
+        course, progress = load_course_tree(small, user_id)
+        assert len(course.units) == 2 and len(progress) == 6
+
+    with app.app_context(), count_statements() as large_statements:
+        course, progress = load_course_tree(large, user_id)
+        assert len(course.units) == 8 and len(progress) == 24
+
+    assert len(small_statements) == len(large_statements)
+
+
+def test_game_page_statements_do_not_grow_with_units(app, client, count_statements):
+    small, _ = seed_course(app, units=2)
+    large, _ = seed_course(app, units=8, subject='数学')
+    # 先各访问一次，填充课程结构缓存
+    client.get(f'/game/{small}')
+    client.get(f'/game/{large}')
+
+    with count_statements() as small_statements:
+        assert client.get(f'/game/{small}').status_code == 200
+    with count_statements() as large_statements:
+        assert client.get(f'/game/{large}').status_code == 200
+
+    assert len(small_statements) == len(large_statements)
+
+
+def test_quiz_page_runs_no_statements(app, client, count_statements):
+    _, level_id = seed_course(app, units=1)
+    # 第一次访问加载题目包和用户身份，之后都来自缓存
+    assert client.get(f'/quiz/{level_id}/0').status_code == 200
+
+    with count_statements() as statements:
+        assert client.get(f'/quiz/{level_id}/1').status_code == 200
+    assert statements == []
+
+
+def test_level_result_page_runs_two_statements(app, client, user_id, count_statements):
+    _, level_id = seed_course(app, units=1)
+    with app.app_context():
+        question_ids = [q.id for q in db.session.get(Level, level_id).questions]
+        submit_answers(user_id, [{'question_id': qid, 'answer': 'true'} for qid in question_ids])
+    assert client.get(f'/level/{level_id}/result').status_code == 200
+
+    # 答题记录版本戳 + 汇总表（知识点汇总联表取出）
+    with count_statements() as statements:
+        assert client.get(f'/level/{level_id}/result').status_code == 200
+    assert len(statements) == 2
@@ -0,0 +1,83 @@
+"""
+关卡成绩汇总与题目包的一致性
+
+汇总记录计算时的题目包摘要，题目、分值或知识点关联变化后，以及还没有汇总时，关卡结果页从答题记录重新计算
+"""
+
+import pytest
+
+from answer_service import submit_answers
+from level_summary import load_level_result
+from models import (db, Course, KnowledgePoint, Level, QuestionKnowledgePoint, TrueFalseQuestion, Unit,
+                    UserKnowledgePointSummary, UserLevelSummary)
+from question_cache import question_bundle_cache
+
+
+@pytest.fixture
+def answered_level(app, user_id):
+    """两道判断题（各关联一个知识点），第一题答对、第二题答错，返回 (关卡ID, [题目ID], [知识点ID])"""
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        level = Level(unit=unit, title='大青树下的小学', order=1)
+        questions = [TrueFalseQuestion(level=level, content=f'判断题{order}', score=5, order=order,
+                                       correct_answer=True) for order in (1, 2)]
+        kps = [KnowledgePoint(name='课文内容理解'), KnowledgePoint(name='词语理解')]
+        db.session.add_all([course, unit, level, *questions, *kps])
+        db.session.flush()
+        db.session.add_all([QuestionKnowledgePoint(question_id=q.id, knowledge_point_id=kp.id)
+                            for q, kp in zip(questions, kps)])
+        db.session.commit()
+        level_id, question_ids, kp_ids = level.id, [q.id for q in questions], [kp.id for kp in kps]
+        submit_answers(user_id, [{'question_id': question_ids[0], 'answer': 'true'},
+                                 {'question_id': question_ids[1], 'answer': 'false'}])
+    return level_id, question_ids, kp_ids
+
+
+def _result(user_id, level_id):
+    return load_level_result(user_id, question_bundle_cache.get(level_id))
+
+
+def test_score_change_recomputes_summary(app, user_id, answered_level):
+    level_id, question_ids, _ = answered_level
+    with app.app_context():
+        assert _result(user_id, level_id)['user_score'] == 5
+
+        db.session.get(TrueFalseQuestion, question_ids[0]).score = 8
+        db.session.commit()
+        result = _result(user_id, level_id)
+        assert (result['user_score'], result['total_score']) == (8, 13)
+        assert UserLevelSummary.query.one().score == 8
+
+
+def test_knowledge_point_link_change_recomputes_summary(app, user_id, answered_level):
+    level_id, question_ids, kp_ids = answered_level
+    with app.app_context():
+        # 第二题改为关联第一个知识点，第二个知识点不再出现在关卡中
+        link = QuestionKnowledgePoint.query.filter_by(question_id=question_ids[1]).one()
+        link.knowledge_point_id = kp_ids[0]
+        db.session.commit()
+
+        result = _result(user_id, level_id)
+        assert result['knowledge_points'] == {'课文内容理解': {'total': 2, 'correct': 1, 'accuracy': 50.0}}
+        assert [(kp.knowledge_point_id, kp.answered_count) for kp in UserKnowledgePointSummary.query] == [
+            (kp_ids[0], 2)]
+
+
+def test_missing_summary_is_backfilled_on_first_read(app, user_id, answered_level, count_statements):
+    level_id, question_ids, _ = answered_level
+    with app.app_context():
+        # 升级前的答题记录没有汇总
+        UserKnowledgePointSummary.query.delete()
+        UserLevelSummary.query.delete()
+        db.session.commit()
+
+        result = _result(user_id, level_id)
+        assert result['user_score'] == 5 and result['results'] == {question_ids[0]: True, question_ids[1]: False}
+        assert UserLevelSummary.query.one().correct_count == 1
+
+        # 之后直接读取汇总
+        bundle = question_bundle_cache.get(level_id)
+        with count_statements() as statements:
+            load_level_result(user_id, bundle)
+        assert len(statements) == 1
@@ -0,0 +1,56 @@
+"""
+密码哈希进程池
+
+- 进程池的子进程不能从多线程的 worker 中 fork，哈希和校验函数需要能在 forkserver/spawn 子进程中导入
+- 登录成功时，用旧算法参数保存的哈希改为按当前配置重新生成
+"""
+
+from werkzeug.security import generate_password_hash
+
+from models import db, User
+from passwords import PasswordHasher, password_hasher
+
+
+def test_process_pool_does_not_fork():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+    try:
+        stored_hash = hasher.hash('secret1')
+        assert hasher.verify(stored_hash, 'secret1') == (True, None)
+        assert hasher.verify(stored_hash, 'wrong') == (False, None)
+        assert hasher._executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        hasher.shutdown()
+
+
+def test_verify_upgrades_hash_in_process_pool():
+    hasher = PasswordHasher(method='pbkdf2:sha256:2000', workers=1)
+    try:
+        old = PasswordHasher(method='pbkdf2:sha256:1000', workers=0).hash('secret1')
+        valid, new_hash = hasher.verify(old, 'secret1')
+        assert valid and new_hash.startswith('pbkdf2:sha256:2000$')
+    finally:
+        hasher.shutdown()
+
+
+def _stored_hash(app, username):
+    with app.app_context():
+        return User.query.filter_by(username=username).one().password
+
+
+def test_login_upgrades_outdated_hash(app):
+    with app.app_context():
+        db.session.add(User(username='kid', password=generate_password_hash('secret1', method='pbkdf2:sha256:1000')))
+        db.session.commit()
+    client = app.test_client()
+
+    # 密码错误时不改写哈希
+    assert client.post('/login', data={'username': 'kid', 'password': 'wrong'}).status_code == 200
+    assert _stored_hash(app, 'kid').startswith('pbkdf2:sha256:1000$')
+
+    assert client.post('/login', data={'username': 'kid', 'password': 'secret1'}).status_code == 302
+    upgraded = _stored_hash(app, 'kid')
+    assert upgraded.startswith(password_hasher.method_prefix + '$')
+
+    # 升级后的哈希可以正常登录，且不再重复升级
+    assert app.test_client().post('/login', data={'username': 'kid', 'password': 'secret1'}).status_code == 302
+    assert _stored_hash(app, 'kid') == upgraded
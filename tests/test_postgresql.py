@@ -0,0 +1,250 @@
+"""
+PostgreSQL 兼容性测试
+
+覆盖 create_all、upsert()、迁移中的 USING 类型转换和一次完整的答案提交。
+
+数据库来源（都没有时跳过）:
+- TEST_DATABASE_URL: 专用的测试数据库，测试会清空其中的 public schema
+- PATH 中的 initdb 和 pg_ctl: 在临时目录中启动一个实例，测试结束后停止（initdb 不能以 root 运行）
+"""
+
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+pytest.importorskip('psycopg2')
+pytest.importorskip('alembic')
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from answer_service import submit_answers
+from course_tree import course_graph_cache
+from models import (db, Course, Level, MultipleChoiceQuestion, TrueFalseQuestion, Unit, User,
+                    UserAnswer, UserLevelSummary, UserProgress, upsert)
+from question_cache import question_bundle_cache
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'versions')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def postgres_url(tmp_path_factory):
+    url = os.environ.get('TEST_DATABASE_URL')
+    if url:
+        yield url
+        return
+
+    initdb, pg_ctl = shutil.which('initdb'), shutil.which('pg_ctl')
+    if not (initdb and pg_ctl):
+        pytest.skip('需要设置 TEST_DATABASE_URL，或在 PATH 中提供 initdb 和 pg_ctl')
+    if os.geteuid() == 0:
+        pytest.skip('initdb 不能以 root 运行，请设置 TEST_DATABASE_URL')
+
+    datadir = tmp_path_factory.mktemp('pgdata')
+    port = _free_port()
+    subprocess.run([initdb, '-D', str(datadir), '-U', 'postgres', '-A', 'trust', '-E', 'UTF8', '--locale=C', '--no-sync'],
+                   check=True, capture_output=True)
+    subprocess.run([pg_ctl, '-D', str(datadir), '-l', str(datadir / 'server.log'), '-w', 'start',
+                    '-o', f'-p {port} -k {datadir} -c listen_addresses='],
+                   check=True, capture_output=True)
+    try:
+        yield f'postgresql+psycopg2://postgres@/postgres?host={datadir}&port={port}'
+    finally:
+        subprocess.run([pg_ctl, '-D', str(datadir), '-m', 'fast', 'stop'], capture_output=True)
+
+
+@pytest.fixture
+def pg_app(postgres_url):
+    """连接 PostgreSQL 的应用，每个测试从空的 public schema 开始"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = postgres_url
+    db.init_app(app)
+    with app.app_context():
+        db.session.execute(text('DROP SCHEMA public CASCADE'))
+        db.session.execute(text('CREATE SCHEMA public'))
+        db.session.commit()
+        # 缓存是进程级的，不能沿用其他测试数据库中的题目和课程结构
+        question_bundle_cache.invalidate()
+        course_graph_cache.invalidate()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    question_bundle_cache.invalidate()
+    course_graph_cache.invalidate()
+
+
+def _run_migration(filename):
+    """在当前连接上执行一个迁移文件的 upgrade()"""
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(MIGRATIONS, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    connection = db.session.connection()
+    with Operations.context(MigrationContext.configure(connection)):
+        module.upgrade()
+    db.session.commit()
+
+
+def _column_type(table, column):
+    return db.session.execute(text(
+        'SELECT udt_name FROM information_schema.columns WHERE table_name = :table AND column_name = :column'
+    ), {'table': table, 'column': column}).scalar()
+
+
+def _seed_level():
+    """一个用户、两个关卡（各一道题）"""
+    user = User(username='kid', password='x')
+    course = Course(grade='三年级', subject='语文', term='上册')
+    unit = Unit(course=course, name='童话世界', order=1)
+    first = Level(unit=unit, title='大青树下的小学', order=1)
+    second = Level(unit=unit, title='花的学校', order=2)
+    db.session.add_all([
+        user, course, unit, first, second,
+        MultipleChoiceQuestion(level=first, content='小鸟们的学校在哪里？', score=5, order=1,
+                               options=[{'id': 'A', 'content': '大青树上'}, {'id': 'B', 'content': '森林里'}],
+                               correct_answer=['A']),
+        TrueFalseQuestion(level=first, content='小鸟们在学校里学习唱歌。', score=5, order=2,
+                          correct_answer=True),
+        TrueFalseQuestion(level=second, content='花孩子在地下上学。', score=5, order=1,
+                          correct_answer=True),
+    ])
+    db.session.commit()
+    return user, first, second
+
+
+def test_create_all_uses_named_enum(pg_app):
+    db.create_all()
+    assert _column_type('user_progress', 'status') == 'progress_status'
+
+    user, first, _ = _seed_level()
+    db.session.add(UserProgress(user_id=user.id, level_id=first.id, status='completed'))
+    db.session.commit()
+    assert UserProgress.query.one().status == 'completed'
+
+
+def test_upsert(pg_app):
+    db.create_all()
+    user, first, _ = _seed_level()
+    question_id = first.questions[0].id
+    row = {'user_id': user.id, 'question_id': question_id, 'answer_content': ['B'],
+           'is_correct': False, 'score': 0, 'time_spent': 10}
+
+    upsert(UserAnswer, [row], ['user_id', 'question_id'], update_columns=['answer_content', 'is_correct', 'score'])
+    upsert(UserAnswer, [dict(row, answer_content=['A'], is_correct=True, score=5, time_spent=3)],
+           ['user_id', 'question_id'], update_columns=['answer_content', 'is_correct', 'score'],
+           extra_updates={'attempt_time': db.func.now()})
+    db.session.commit()
+    answer = UserAnswer.query.one()
+    assert (answer.answer_content, answer.is_correct, answer.score, answer.time_spent) == (['A'], True, 5, 10)
+
+    # 没有 update_columns 时冲突行保持不变
+    upsert(UserAnswer, [dict(row, score=99)], ['user_id', 'question_id'])
+    db.session.commit()
+    assert UserAnswer.query.one().score == 5
+
+
+def test_json_columns_migration_parses_text(pg_app):
+    # 迁移前的结构：JSON 数据以 json.dumps 生成的文本保存
+    db.session.execute(text(
+        'CREATE TABLE multiple_choice_question (id SERIAL PRIMARY KEY, options TEXT NOT NULL, correct_answer TEXT NOT NULL)'
+    ))
+    db.session.execute(text('CREATE TABLE user_answer (id SERIAL PRIMARY KEY, answer_content TEXT NOT NULL)'))
+    db.session.execute(text(
+        """INSERT INTO multiple_choice_question (options, correct_answer) VALUES ('[{"id": "A", "content": "树上"}]', '["A"]')"""
+    ))
+    db.session.execute(text("""INSERT INTO user_answer (answer_content) VALUES ('["A"]')"""))
+    db.session.commit()
+
+    _run_migration('b27e0d5c9f31_use_json_columns.py')
+
+    assert _column_type('multiple_choice_question', 'options') == 'json'
+    assert _column_type('user_answer', 'answer_content') == 'json'
+    assert db.session.execute(text("SELECT options->0->>'content' FROM multiple_choice_question")).scalar() == '树上'
+    assert db.session.execute(text('SELECT answer_content->>0 FROM user_answer')).scalar() == 'A'
+
+
+def test_progress_status_migration_converts_text_column(pg_app):
+    db.session.execute(text('CREATE TABLE user_progress (id SERIAL PRIMARY KEY, status VARCHAR(9))'))
+    db.session.execute(text("INSERT INTO user_progress (status) VALUES ('completed'), ('unlocked')"))
+    db.session.commit()
+
+    _run_migration('9d4f1b7e2c63_name_progress_status_enum.py')
+
+    assert _column_type('user_progress', 'status') == 'progress_status'
+    statuses = db.session.execute(text('SELECT status FROM user_progress ORDER BY id')).scalars().all()
+    assert statuses == ['completed', 'unlocked']
+
+
+def test_submit_answers_round_trip(pg_app):
+    db.create_all()
+    user, first, second = _seed_level()
+    choice, true_false = sorted(first.questions, key=lambda q: q.order)
+
+    outcome = submit_answers(user.id, [
+        {'question_id': choice.id, 'answer': ['A'], 'time_spent': 8},
+        {'question_id': true_false.id, 'answer': 'false', 'time_spent': 4},
+    ])
+
+    assert [(r['question_id'], r['is_correct'], r['score']) for r in outcome['results']] == [
+        (choice.id, True, 5), (true_false.id, False, 0)]
+    assert outcome['completed_levels'] == [first.id]
+
+    db.session.expire_all()
+    answers = {a.question_id: a for a in UserAnswer.query.all()}
+    assert answers[choice.id].answer_content == ['A']
+    assert answers[true_false.id].answer_content == 'false'
+    summary = UserLevelSummary.query.filter_by(user_id=user.id, level_id=first.id).one()
+    assert (summary.answered_count, summary.correct_count, summary.score) == (2, 1, 5)
+    progress = {p.level_id: p.status for p in UserProgress.query.filter_by(user_id=user.id)}
+    assert progress == {first.id: 'completed', second.id: 'unlocked'}
+
+
+def test_concurrent_submissions_keep_summary_complete(pg_app):
+    db.create_all()
+    user, first, _ = _seed_level()
+    user_id, level_id = user.id, first.id
+    question_ids = [q.id for q in first.questions]
+    db.session.remove()
+
+    # 同一用户同时提交同一关的不同题目，汇总必须包含两次提交的答案
+    for _ in range(10):
+        barrier = threading.Barrier(len(question_ids))
+        errors = []
+
+        def submit(question_id):
+            with pg_app.app_context():
+                try:
+                    barrier.wait()
+                    submit_answers(user_id, [{'question_id': question_id, 'answer': 'true'}])
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=submit, args=(qid,)) for qid in question_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+        summary = UserLevelSummary.query.filter_by(user_id=user_id, level_id=level_id).one()
+        assert summary.answered_count == len(question_ids)
+        assert UserProgress.query.filter_by(user_id=user_id, level_id=level_id).one().status == 'completed'
+
+        UserLevelSummary.query.delete()
+        UserAnswer.query.delete()
+        UserProgress.query.delete()
+        db.session.commit()
@@ -0,0 +1,117 @@
+"""
+题库批量导入
+
+题目按 external_id 插入或更新，重复导入结果不变；格式错误的行记录后跳过，不影响其他题目
+"""
+
+import io
+import json
+
+import pytest
+
+from models import db, Course, KnowledgePoint, Level, Question, QuestionKnowledgePoint, Unit
+from question_bank import QuestionBankError, import_question_bank
+
+LEVEL_PATH = {'grade': '三年级', 'subject': '语文', 'term': '上册', 'unit': '童话世界', 'level': '大青树下的小学'}
+
+
+@pytest.fixture
+def level_id(app):
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        level = Level(unit=unit, title='大青树下的小学', order=1)
+        db.session.add_all([course, unit, level])
+        db.session.commit()
+        return level.id
+
+
+def _jsonl(*records):
+    return io.StringIO(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+
+
+def _choice(external_id, content, knowledge_points=('课文内容理解',), **fields):
+    return {'external_id': external_id, **LEVEL_PATH, 'question_type': 'multiple_choice', 'content': content,
+            'options': [{'id': 'A', 'content': '大青树上'}, {'id': 'B', 'content': '森林里'}],
+            'correct_answer': ['A'], 'score': 5, 'knowledge_points': list(knowledge_points), **fields}
+
+
+def _import(stream, fmt='jsonl', **kwargs):
+    log = []
+    stats = import_question_bank(stream, fmt, log=log.append, **kwargs)
+    return stats, log
+
+
+def _links(external_id):
+    return sorted(name for (name,) in db.session.query(KnowledgePoint.name)
+                  .join(QuestionKnowledgePoint, QuestionKnowledgePoint.knowledge_point_id == KnowledgePoint.id)
+                  .join(Question, Question.id == QuestionKnowledgePoint.question_id)
+                  .filter(Question.external_id == external_id))
+
+
+def test_reimport_updates_in_place(app, level_id):
+    with app.app_context():
+        stats, _ = _import(_jsonl(_choice('q1', '第一题'), _choice('q2', '第二题')), chunk_size=1)
+        assert stats == {'created': 2, 'updated': 0, 'invalid': 0}
+        first_ids = dict(db.session.query(Question.external_id, Question.id))
+
+        stats, _ = _import(_jsonl(_choice('q1', '第一题（修订）', knowledge_points=['词语理解', '字词辨析']),
+                                  _choice('q2', '第二题')))
+        assert stats == {'created': 0, 'updated': 2, 'invalid': 0}
+        assert dict(db.session.query(Question.external_id, Question.id)) == first_ids
+        question = Question.query.filter_by(external_id='q1').one()
+        assert question.content == '第一题（修订）' and question.level_id == level_id
+        # 知识点关联整体替换，已有的知识点不重复创建
+        assert _links('q1') == ['字词辨析', '词语理解']
+        assert _links('q2') == ['课文内容理解']
+        assert KnowledgePoint.query.count() == 3
+
+
+def test_duplicate_external_id_in_one_chunk_keeps_last(app, level_id):
+    with app.app_context():
+        stats, _ = _import(_jsonl(_choice('q1', '旧内容'), _choice('q1', '新内容')))
+        assert stats['created'] == 1
+        assert Question.query.filter_by(external_id='q1').one().content == '新内容'
+
+
+def test_invalid_rows_are_logged_and_skipped(app, level_id):
+    stream = io.StringIO('\n'.join([
+        json.dumps(_choice('q1', '正常的题'), ensure_ascii=False),
+        '{not json',
+        json.dumps(_choice('q2', '找不到关卡', level='不存在的关卡'), ensure_ascii=False),
+        json.dumps({**_choice('q3', '未知题型'), 'question_type': 'essay'}, ensure_ascii=False),
+        json.dumps(_choice('', '缺少编号'), ensure_ascii=False),
+    ]))
+    with app.app_context():
+        stats, log = _import(stream)
+        assert stats == {'created': 1, 'updated': 0, 'invalid': 4}
+        assert [line.split(' ', 2)[1] for line in log if line.startswith('第')] == ['2', '3', '4', '5']
+        assert [external_id for (external_id,) in db.session.query(Question.external_id)] == ['q1']
+
+
+def test_csv_import(app, level_id):
+    stream = io.StringIO(
+        'external_id,grade,subject,term,unit,level,question_type,content,correct_answer,score,knowledge_points\n'
+        'tf1,三年级,语文,上册,童话世界,大青树下的小学,true_false,小鸟们在学校里学习唱歌。,true,5,课文内容理解|阅读理解\n'
+        'tf2,三年级,语文,上册,童话世界,大青树下的小学,true_false,分数不是整数,true,五分,\n'
+    )
+    with app.app_context():
+        stats, log = _import(stream, fmt='csv')
+        assert stats == {'created': 1, 'updated': 0, 'invalid': 1}
+        assert 'score 列格式错误' in log[0]
+        question = Question.query.filter_by(external_id='tf1').one()
+        assert question.correct_answer is True and question.score == 5
+        assert _links('tf1') == ['课文内容理解', '阅读理解']
+
+
+def test_csv_requires_columns(app, level_id):
+    with app.app_context(), pytest.raises(QuestionBankError):
+        _import(io.StringIO('external_id,content\nq1,题目\n'), fmt='csv')
+
+
+def test_dry_run_writes_nothing(app, level_id):
+    with app.app_context():
+        stats, _ = _import(_jsonl(_choice('q1', '第一题')), dry_run=True)
+        assert stats['created'] == 1
+        assert Question.query.count() == 0
+        assert KnowledgePoint.query.count() == 0
@@ -0,0 +1,66 @@
+"""
+答题页面的样式和脚本
+
+页面只引用带指纹的静态文件，不内联 <style>/<script>，提示语通过 data-* 属性传给脚本
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+
+import pytest
+
+from models import db, Course, Level, TrueFalseQuestion, Unit
+
+
+class _PageParser(HTMLParser):
+    """收集 quiz-container 的属性和没有 src 的 <script>"""
+
+    def __init__(self):
+        super().__init__()
+        self.container = None
+        self.inline_scripts = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'div' and 'quiz-container' in (attrs.get('class') or '').split():
+            self.container = attrs
+        if tag == 'script' and 'src' not in attrs:
+            self.inline_scripts += 1
+
+
+@pytest.fixture
+def level_id(app):
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        level = Level(unit=unit, title='大青树下的小学', order=1)
+        db.session.add_all([course, unit, level,
+                            TrueFalseQuestion(level=level, content='判断题', score=5, order=1, correct_answer=True)])
+        db.session.commit()
+        return level.id
+
+
+def _parse(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert '<style' not in page
+    parser = _PageParser()
+    parser.feed(page)
+    assert parser.inline_scripts == 0
+    return page, parser.container
+
+
+def test_quiz_page_passes_messages_as_data_attributes(client, level_id):
+    page, container = _parse(client, f'/quiz/{level_id}/0')
+    assert '太棒了！答对了！' in json.loads(container['data-correct-messages'])
+    assert '再试一次吧' in json.loads(container['data-wrong-messages'])
+    assert re.search(r'/static/css/pages/quiz\.\w+\.css', page)
+    assert re.search(r'/static/js/pages/quiz\.\w+\.js', page)
+
+
+def test_quiz_session_page_links_page_styles(client, level_id):
+    page, _ = _parse(client, f'/quiz/{level_id}/play')
+    assert re.search(r'/static/css/quiz_base\.\w+\.css', page)
+    assert re.search(r'/static/css/pages/quiz_session\.\w+\.css', page)
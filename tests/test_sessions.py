@@ -0,0 +1,102 @@
+"""
+服务端会话
+
+- 多个 worker 共享同一份会话存储，一个 worker 的修改（包括退出登录）在其他 worker 上立即生效
+- 轮换密钥时旧密钥放入 SECRET_KEY_FALLBACKS，旧 Cookie 仍然有效并用新密钥重新签发
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from models import db, Course, Level, TrueFalseQuestion, Unit
+from sessions import init_sessions
+
+
+def _worker(app):
+    """按应用配置新建一个会话接口，相当于另一个 worker 进程中的会话"""
+    saved = app.session_interface
+    init_sessions(app)
+    worker, app.session_interface = app.session_interface, saved
+    return worker
+
+
+@contextmanager
+def _on(app, worker):
+    saved = app.session_interface
+    app.session_interface = worker
+    try:
+        yield
+    finally:
+        app.session_interface = saved
+
+
+@pytest.fixture
+def level_id(app):
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        level = Level(unit=unit, title='大青树下的小学', order=1)
+        db.session.add_all([course, unit, level,
+                            TrueFalseQuestion(level=level, content='判断题', score=5, order=1, correct_answer=True)])
+        db.session.commit()
+        return level.id
+
+
+def _login(client):
+    assert client.post('/login', data={'username': 'kid', 'password': 'secret1'}).status_code == 302
+
+
+def test_read_after_write_across_workers(app, user_id, level_id):
+    first, second = _worker(app), _worker(app)
+    client = app.test_client()
+    with _on(app, first):
+        _login(client)
+        assert client.get(f'/quiz/{level_id}/0?hearts=3').status_code == 200
+    with _on(app, second):
+        assert client.get(f'/quiz/{level_id}/0?hearts=1').status_code == 200
+    with _on(app, first), client.session_transaction() as session:
+        assert session['hearts'] == 1
+
+
+def test_logout_applies_to_other_workers(app, user_id):
+    first, second = _worker(app), _worker(app)
+    client = app.test_client()
+    name = app.config['SESSION_COOKIE_NAME']
+    with _on(app, first):
+        _login(client)
+        assert client.get('/grade-selection').status_code == 200
+    cookie = client.get_cookie(name).value
+    with _on(app, second):
+        assert client.get('/grade-selection').status_code == 200
+        assert client.get('/logout').status_code == 302
+    # 退出前复制出去的 Cookie（如另一个标签页）在其他 worker 上也不能再使用
+    client.set_cookie(name, cookie)
+    with _on(app, first):
+        response = client.get('/grade-selection')
+        assert response.status_code == 302
+        assert '/login' in response.headers['Location']
+
+
+def test_rotated_key_accepts_and_resigns_old_cookie(app, user_id, monkeypatch):
+    client = app.test_client()
+    name = app.config['SESSION_COOKIE_NAME']
+    _login(client)
+    old_cookie = client.get_cookie(name).value
+
+    monkeypatch.setitem(app.config, 'SECRET_KEY_FALLBACKS', [app.config['SECRET_KEY']])
+    monkeypatch.setitem(app.config, 'SECRET_KEY', 'rotated-secret-key')
+    response = client.get('/grade-selection')
+    assert response.status_code == 200
+    # 会话ID不变，Cookie 改用新密钥签名
+    new_cookie = client.get_cookie(name).value
+    assert new_cookie != old_cookie
+    assert new_cookie.split('.')[0] == old_cookie.split('.')[0]
+
+    # 移除旧密钥后，重新签发的 Cookie 仍然有效，旧 Cookie 不再有效
+    monkeypatch.setitem(app.config, 'SECRET_KEY_FALLBACKS', [])
+    assert client.get('/grade-selection').status_code == 200
+    client.set_cookie(name, old_cookie)
+    response = client.get('/grade-selection')
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
@@ -0,0 +1,76 @@
+"""
+批量 upsert
+
+PostgreSQL 和 SQLite 使用 INSERT ... ON CONFLICT；其他数据库先查询已存在的行，再分别批量更新和插入。
+这里把 SQLite 的方言名称改掉，走通用的写法
+"""
+
+import pytest
+
+from models import db, Course, Level, TrueFalseQuestion, Unit, User, UserAnswer, upsert
+
+
+@pytest.fixture(params=['sqlite', 'other'])
+def dialect(request, app, monkeypatch):
+    with app.app_context():
+        if request.param == 'other':
+            monkeypatch.setattr(db.engine.dialect, 'name', 'mssql')
+        yield request.param
+
+
+@pytest.fixture
+def question_ids(app, user_id):
+    with app.app_context():
+        course = Course(grade='三年级', subject='语文', term='上册')
+        unit = Unit(course=course, name='童话世界', order=1)
+        level = Level(unit=unit, title='大青树下的小学', order=1)
+        questions = [TrueFalseQuestion(level=level, content=f'判断题{i}', score=5, order=i, correct_answer=True)
+                     for i in range(1, 4)]
+        db.session.add_all([course, unit, level, *questions])
+        db.session.commit()
+        return [question.id for question in questions]
+
+
+def _answer(user_id, question_id, **values):
+    return {'user_id': user_id, 'question_id': question_id, 'answer_content': [False],
+            'is_correct': False, 'score': 0, 'time_spent': 10, **values}
+
+
+def _answers():
+    return {answer.question_id: (answer.answer_content, answer.is_correct, answer.score, answer.time_spent)
+            for answer in UserAnswer.query}
+
+
+def test_upsert_updates_existing_and_inserts_new_rows(dialect, user_id, question_ids):
+    first, second, third = question_ids
+    upsert(UserAnswer, [_answer(user_id, first), _answer(user_id, second)], ['user_id', 'question_id'],
+           update_columns=['answer_content', 'is_correct', 'score'])
+    db.session.commit()
+
+    upsert(UserAnswer, [_answer(user_id, second, answer_content=[True], is_correct=True, score=5, time_spent=3),
+                        _answer(user_id, third, answer_content=[True], is_correct=True, score=5, time_spent=3)],
+           ['user_id', 'question_id'], update_columns=['answer_content', 'is_correct', 'score'],
+           extra_updates={'attempt_time': db.func.now()})
+    db.session.commit()
+    assert _answers() == {
+        first: ([False], False, 0, 10),
+        # 冲突时只覆盖 update_columns
+        second: ([True], True, 5, 10),
+        third: ([True], True, 5, 3),
+    }
+
+
+def test_upsert_without_update_columns_keeps_existing_rows(dialect, user_id, question_ids):
+    first, second, _ = question_ids
+    upsert(UserAnswer, [_answer(user_id, first)], ['user_id', 'question_id'])
+    upsert(UserAnswer, [_answer(user_id, first, score=99), _answer(user_id, second, score=5)],
+           ['user_id', 'question_id'])
+    db.session.commit()
+    assert {question_id: values[2] for question_id, values in _answers().items()} == {first: 0, second: 5}
+
+
+def test_upsert_single_column_key(dialect, user_id):
+    upsert(User, [{'username': 'kid', 'password': 'new'}, {'username': 'kid2', 'password': 'x'}],
+           ['username'], update_columns=['password'])
+    db.session.commit()
+    assert dict(db.session.query(User.username, User.password)) == {'kid2': 'x', 'kid': 'new'}
@@ -0,0 +1,37 @@
+"""
+用户身份缓存
+
+已登录的请求从进程内缓存取当前用户，不查询 user 表；通过 ORM 修改或删除用户时缓存立即失效
+"""
+
+from models import db, User
+from user_cache import UserIdentity, user_identity_cache
+
+
+def test_authenticated_request_does_not_query_user(client, count_statements):
+    assert client.get('/grade-selection').status_code == 200
+    with count_statements() as statements:
+        assert client.get('/grade-selection').status_code == 200
+    assert statements == []
+
+
+def test_orm_update_invalidates_identity(app, user_id):
+    with app.app_context():
+        identity = user_identity_cache.get(user_id)
+        assert isinstance(identity, UserIdentity)
+        assert identity.username == 'kid' and identity.get_id() == str(user_id)
+
+        db.session.get(User, user_id).last_grade = '三年级'
+        db.session.commit()
+        assert user_identity_cache.get(user_id).last_grade == '三年级'
+
+
+def test_deleted_user_is_logged_out(app, client, user_id):
+    assert client.get('/grade-selection').status_code == 200
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+    response = client.get('/grade-selection')
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
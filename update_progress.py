@@ -1,6 +1,18 @@
-from models import db, User, Course, Unit, Level, UserProgress
+"""
+进度更新模块
+- update_level_progress: 答题完成后更新单个关卡进度并解锁下一关
+- recompute_progress: 批量重算所有用户的进度记录（python update_progress.py）
+"""
 
-def update_level_progress(user_id, level_id, status):
+import argparse
+import sys
+import time
+
+from models import db, User, UserProgress, upsert
+from course_tree import course_graph_cache
+
+
+def update_level_progress(user_id, level_id, status, commit=True):
     """
     更新用户特定关卡的进度
     
@@ -8,225 +20,194 @@ def update_level_progress(user_id, level_id, status):
     - user_id: 用户ID
     - level_id: 关卡ID
     - status: 新状态 ('locked', 'unlocked', 'completed')
+    - commit: 是否立即提交；为False时由调用方在同一事务中提交，出错时异常直接抛出
     
     返回:
     - 更新是否成功
     """
     try:
-        # 更新当前关卡状态
-        progress = UserProgress.query.filter_by(
-            user_id=user_id,
-            level_id=level_id
-        ).first()
-        
-        if progress:
-            progress.status = status
-        else:
-            progress = UserProgress(
+        # 锁定状态不落库，由课程结构推导，删除已有记录即可
+        if status == 'locked':
+            UserProgress.query.filter_by(
                 user_id=user_id,
-                level_id=level_id,
-                status=status
-            )
-            db.session.add(progress)
+                level_id=level_id
+            ).delete(synchronize_session=False)
+        else:
+            # 更新当前关卡状态
+            upsert(UserProgress, [{
+                'user_id': user_id,
+                'level_id': level_id,
+                'status': status
+            }], ['user_id', 'level_id'],
+                update_columns=['status'],
+                extra_updates={'updated_at': db.func.now()})
         
-        # 如果当前关卡已完成，解锁下一关
+        # 如果当前关卡已完成，解锁下一关（下一关来自缓存的课程结构）
+        # 下一关已有记录（已解锁或已完成）时保持不变
         if status == 'completed':
-            current_level = Level.query.get(level_id)
-            if current_level:
-                # 获取同一单元中的下一关
-                next_level = Level.query.filter_by(
-                    unit_id=current_level.unit_id,
-                    order=current_level.order + 1
-                ).first()
-                
-                if next_level:
-                    next_progress = UserProgress.query.filter_by(
-                        user_id=user_id,
-                        level_id=next_level.id
-                    ).first()
-                    
-                    if next_progress:
-                        next_progress.status = 'unlocked'
-                    else:
-                        next_progress = UserProgress(
-                            user_id=user_id,
-                            level_id=next_level.id,
-                            status='unlocked'
-                        )
-                        db.session.add(next_progress)
-                
-                # 如果是单元最后一关，并且有下一个单元，解锁下一单元的第一关
-                else:
-                    current_unit = Unit.query.get(current_level.unit_id)
-                    next_unit = Unit.query.filter_by(
-                        course_id=current_unit.course_id,
-                        order=current_unit.order + 1
-                    ).first()
-                    
-                    if next_unit:
-                        first_level_of_next_unit = Level.query.filter_by(
-                            unit_id=next_unit.id,
-                            order=1
-                        ).first()
-                        
-                        if first_level_of_next_unit:
-                            next_progress = UserProgress.query.filter_by(
-                                user_id=user_id,
-                                level_id=first_level_of_next_unit.id
-                            ).first()
-                            
-                            if next_progress:
-                                next_progress.status = 'unlocked'
-                            else:
-                                next_progress = UserProgress(
-                                    user_id=user_id,
-                                    level_id=first_level_of_next_unit.id,
-                                    status='unlocked'
-                                )
-                                db.session.add(next_progress)
+            next_level_id = course_graph_cache.get().next_level_id(level_id)
+            if next_level_id is not None:
+                upsert(UserProgress, [{
+                    'user_id': user_id,
+                    'level_id': next_level_id,
+                    'status': 'unlocked'
+                }], ['user_id', 'level_id'])
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return True
     except Exception as e:
+        if not commit:
+            raise
         print(f"更新进度失败: {str(e)}")
         db.session.rollback()
         return False
 
-def update_progress():
-    # 创建应用上下文
-    with app.app_context():
-        # 获取所有用户
-        users = User.query.all()
-        
-        for user in users:
-            print(f"\n=== 正在更新用户: {user.username} ===")
-            
-            # 获取三年级语文上册课程
-            chinese_course = Course.query.filter_by(grade="三年级", subject="语文", term="上册").first()
-            if not chinese_course:
-                print("未找到三年级语文上册课程")
-                continue
-            
-            # 获取该课程的所有单元和关卡
-            units = Unit.query.filter_by(course_id=chinese_course.id).order_by(Unit.order).all()
-            
-            print("=== 更新语文进度 ===")
-            for unit in units:
-                levels = Level.query.filter_by(unit_id=unit.id).order_by(Level.order).all()
-                
-                for i, level in enumerate(levels):
-                    # 特殊关卡处理（期中/期末）
-                    if level.is_midterm or level.is_final:
-                        status = 'unlocked'
-                    # 单元第一关默认解锁
-                    elif i == 0:
-                        status = 'unlocked'
-                    # 其他关卡基于前一关状态
-                    else:
-                        prev_level = Level.query.filter_by(
-                            unit_id=unit.id,
-                            order=level.order-1
-                        ).first()
-                        prev_progress = UserProgress.query.filter_by(
-                            user_id=user.id,
-                            level_id=prev_level.id
-                        ).first() if prev_level else None
-                        
-                        # 如果前一关已完成则解锁当前关
-                        status = 'unlocked' if (prev_progress and prev_progress.status == 'completed') else 'locked'
-                    
-                    # 测试用户特殊处理：第一单元前两关completed
-                    if user.username == 'test' and unit.order == 1 and i < 2:
-                        status = 'completed'
-                    
-                    # 更新或创建进度记录
-                    progress = UserProgress.query.filter_by(
-                        user_id=user.id,
-                        level_id=level.id
-                    ).first()
-                    
-                    if progress:
-                        progress.status = status
-                    else:
-                        progress = UserProgress(
-                            user_id=user.id,
-                            level_id=level.id,
-                            status=status
-                        )
-                        db.session.add(progress)
-                    
-                    print(f"关卡: {level.title}, 状态: {status}")
-            
-            # 提交更改
+class ProgressBar:
+    """在终端输出简单的进度条"""
+
+    def __init__(self, total, width=40, stream=sys.stderr):
+        self.total = total
+        self.width = width
+        self.stream = stream
+        self.started = time.perf_counter()
+
+    def update(self, done):
+        ratio = done / self.total if self.total else 1
+        filled = int(self.width * ratio)
+        elapsed = time.perf_counter() - self.started
+        self.stream.write(f"\r[{'#' * filled}{'-' * (self.width - filled)}] "
+                          f"{ratio:6.1%} {done}/{self.total} 用户 {elapsed:.1f}s")
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write('\n')
+        self.stream.flush()
+
+
+def plan_user_progress(stored, successors):
+    """
+    在内存中计算一个用户应有的进度记录
+
+    - 已完成和已解锁的记录保持不变（重算不会重新锁定关卡）
+    - 已完成关卡的下一关应有解锁记录
+    - 其他状态（旧数据中的 locked 或空值）的记录应删除
+
+    参数:
+    - stored: {level_id: status}，用户当前的进度记录
+    - successors: {level_id: next_level_id}
+
+    返回:
+    - (需要写入的 {level_id: 'unlocked'}, 需要删除的 [level_id, ...])
+    """
+    valid = {lid for lid, status in stored.items() if status in ('unlocked', 'completed')}
+    to_unlock = {}
+    for lid in valid:
+        next_level_id = successors.get(lid)
+        if stored[lid] == 'completed' and next_level_id is not None and next_level_id not in valid:
+            to_unlock[next_level_id] = 'unlocked'
+    to_delete = [lid for lid in stored if lid not in valid and lid not in to_unlock]
+    return to_unlock, to_delete
+
+
+def recompute_progress(chunk_size=1000, dry_run=False, max_diff_lines=100, show_progress=True):
+    """
+    批量重算所有用户的进度记录
+
+    课程结构来自 course_graph_cache；用户按ID分批读取，每批的进度记录用一条查询取出，
+    在内存中计算差异后用一条批量 upsert 和一条删除语句写回，每批提交一次
+
+    参数:
+    - chunk_size: 每批处理的用户数
+    - dry_run: 只输出差异，不写入数据库
+    - max_diff_lines: dry_run 时最多输出的差异行数
+
+    返回:
+    - {'users': 处理用户数, 'unlocked': 新增解锁数, 'deleted': 删除记录数}
+    """
+    successors = course_graph_cache.get().next_level_ids
+    total = User.query.count()
+    bar = ProgressBar(total) if show_progress else None
+    stats = {'users': 0, 'unlocked': 0, 'deleted': 0}
+    # dry_run 时只保留前 max_diff_lines 行差异，其余只计数
+    diff_lines = []
+    hidden_diffs = 0
+
+    last_id = 0
+    while True:
+        user_ids = [row.id for row in db.session.query(User.id).filter(
+            User.id > last_id).order_by(User.id).limit(chunk_size)]
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+
+        stored = {}
+        for user_id, level_id, status in db.session.query(
+            UserProgress.user_id, UserProgress.level_id, UserProgress.status
+        ).filter(UserProgress.user_id.in_(user_ids)):
+            stored.setdefault(user_id, {})[level_id] = status
+
+        unlock_rows = []
+        delete_pairs = []
+        for user_id, user_stored in stored.items():
+            to_unlock, to_delete = plan_user_progress(user_stored, successors)
+            for level_id in to_unlock:
+                unlock_rows.append({'user_id': user_id, 'level_id': level_id, 'status': 'unlocked'})
+                if dry_run and len(diff_lines) < max_diff_lines:
+                    diff_lines.append(f"用户 {user_id} 关卡 {level_id}: "
+                                      f"{user_stored.get(level_id) or '无记录'} -> unlocked")
+                elif dry_run:
+                    hidden_diffs += 1
+            for level_id in to_delete:
+                delete_pairs.append((user_id, level_id))
+                if dry_run and len(diff_lines) < max_diff_lines:
+                    diff_lines.append(f"用户 {user_id} 关卡 {level_id}: "
+                                      f"{user_stored[level_id] or '空'} -> 删除")
+                elif dry_run:
+                    hidden_diffs += 1
+
+        if not dry_run:
+            # 先删除无效状态的记录，同一关卡需要解锁时再由 upsert 写入
+            if delete_pairs:
+                UserProgress.query.filter(
+                    db.tuple_(UserProgress.user_id, UserProgress.level_id).in_(delete_pairs)
+                ).delete(synchronize_session=False)
+            upsert(UserProgress, unlock_rows, ['user_id', 'level_id'],
+                   update_columns=['status'], extra_updates={'updated_at': db.func.now()})
             db.session.commit()
-            print(f"用户 {user.username} 进度更新完成！")
-    
-        # 获取课程信息
-        print("=== 课程信息 ===")
-        courses = Course.query.all()
-        for c in courses:
-            print(f"ID: {c.id}, 年级: {c.grade}, 科目: {c.subject}, 学期: {c.term}")
-    
-        # 获取三年级语文上册课程
-        chinese_course = Course.query.filter_by(grade="三年级", subject="语文", term="上册").first()
-        if not chinese_course:
-            print("未找到三年级语文上册课程")
-            return
-        
-        # 获取该课程的所有单元和关卡
-        units = Unit.query.filter_by(course_id=chinese_course.id).order_by(Unit.order).all()
-    
-        # 更新进度 - 第一单元全部完成，第二单元部分完成
-        print("\n=== 更新语文进度 ===")
-        for unit in units[:2]:  # 只处理前两个单元
-            levels = Level.query.filter_by(unit_id=unit.id).order_by(Level.order).all()
-            
-            for i, level in enumerate(levels):
-                # 特殊关卡处理（期中/期末）
-                if level.is_midterm or level.is_final:
-                    status = 'unlocked'
-                # 单元第一关默认解锁
-                elif i == 0:
-                    status = 'unlocked'
-                # 其他关卡基于前一关状态
-                else:
-                    prev_level = Level.query.filter_by(
-                        unit_id=unit.id,
-                        order=level.order-1
-                    ).first()
-                    prev_progress = UserProgress.query.filter_by(
-                        user_id=test_user.id,
-                        level_id=prev_level.id
-                    ).first() if prev_level else None
-                    
-                    # 如果前一关已完成则解锁当前关
-                    status = 'unlocked' if (prev_progress and prev_progress.status == 'completed') else 'locked'
-                
-                # 测试用户特殊处理：第一单元前两关completed
-                if test_user.username == 'test' and unit.order == 1 and i < 2:
-                    status = 'completed'
-                
-                # 更新或创建进度记录
-                progress = UserProgress.query.filter_by(
-                    user_id=test_user.id,
-                    level_id=level.id
-                ).first()
-                
-                if progress:
-                    progress.status = status
-                else:
-                    progress = UserProgress(
-                        user_id=test_user.id,
-                        level_id=level.id,
-                        status=status
-                    )
-                    db.session.add(progress)
-                
-                print(f"关卡: {level.title}, 状态: {status}")
-        
-        # 提交更改
-        db.session.commit()
-        print("\n进度更新完成！")
+
+        stats['users'] += len(user_ids)
+        stats['unlocked'] += len(unlock_rows)
+        stats['deleted'] += len(delete_pairs)
+        if bar:
+            bar.update(stats['users'])
+
+    if bar:
+        bar.close()
+    if dry_run:
+        for line in diff_lines:
+            print(line)
+        if hidden_diffs:
+            print(f"... 另有 {hidden_diffs} 处差异未显示")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量重算用户进度记录')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每批处理的用户数')
+    parser.add_argument('--dry-run', action='store_true', help='只输出差异，不写入数据库')
+    parser.add_argument('--max-diff-lines', type=int, default=100, help='--dry-run 时最多输出的差异行数')
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        started = time.perf_counter()
+        stats = recompute_progress(chunk_size=args.chunk_size, dry_run=args.dry_run,
+                                   max_diff_lines=args.max_diff_lines)
+        action = '需要' if args.dry_run else '已'
+        print(f"共处理 {stats['users']} 个用户，{action}新增解锁 {stats['unlocked']} 条，"
+              f"{action}删除 {stats['deleted']} 条，用时 {time.perf_counter() - started:.1f}s")
+
 
 if __name__ == "__main__":
-    update_progress()
\ No newline at end of file
+    main()
@@ -0,0 +1,106 @@
+"""
+用户身份缓存模块
+Flask-Login 每个请求都要加载当前用户，这里按用户ID缓存只含身份字段的不可变记录，
+记录与数据库会话无关，之后访问属性不会触发查询
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event
+
+from models import db, User
+
+
+class UserIdentity(namedtuple('UserIdentity', 'id username last_grade last_course')):
+    """
+    不可变的用户身份记录，提供 Flask-Login 需要的属性和方法
+
+    需要修改用户时按 id 查询或更新 User，并调用 user_identity_cache.invalidate
+    """
+
+    __slots__ = ()
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def get_id(self):
+        return str(self.id)
+
+
+class UserIdentityCache:
+    """
+    进程内的用户身份缓存
+
+    - 超过 maxsize 时按 LRU 淘汰
+    - 本进程修改用户时立即失效；其他进程的修改最迟 ttl 秒后可见
+    """
+
+    def __init__(self, maxsize=4096, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.maxsize = app.config.get('USER_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+
+    def get(self, user_id):
+        """返回用户身份记录，用户不存在时返回None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        row = db.session.query(
+            User.id, User.username, User.last_grade, User.last_course
+        ).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+
+        with self._lock:
+            self._entries[user_id] = (identity, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self, user_id=None):
+        """使指定用户（或全部用户）的缓存失效"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+user_identity_cache = UserIdentityCache()
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    # 通过 ORM 对象修改用户时自动失效；Query.update 等批量写入需要显式调用 invalidate
+    user_identity_cache.invalidate(target.id)